@@ -0,0 +1,57 @@
+"""
+Benchmark for the delivery route planner on a peak-season day.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_delivery_routing --stops 3000
+"""
+
+import argparse
+import random
+import time
+
+from project.deliveryRouting import RouteStop, TruckType, distance_matrix, plan_routes
+
+DEPOT = (44.9778, -93.2650)
+
+
+def synthetic_stops(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [
+        RouteStop(
+            deliveryId=i,
+            latitude=DEPOT[0] + rng.uniform(-0.6, 0.6),
+            longitude=DEPOT[1] + rng.uniform(-0.8, 0.8),
+            demand=rng.randint(1, 40),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stops", type=int, default=3000)
+    parser.add_argument("--cluster-size", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    stops = synthetic_stops(args.stops, args.seed)
+    trucks = [
+        TruckType(itemId=1, name="Flatbed", capacity=400, count=12),
+        TruckType(itemId=2, name="Box truck", capacity=250, count=8),
+    ]
+    for label in ("cold", "warm"):
+        if label == "cold":
+            distance_matrix.cache_clear()
+        started = time.perf_counter()
+        plan = plan_routes(DEPOT, stops, trucks, cluster_size=args.cluster_size)
+        elapsed = time.perf_counter() - started
+        total_km = sum(run.distanceKm for run in plan.runs)
+        print(
+            f"{label}: {len(stops)} stops -> {len(plan.runs)} runs, "
+            f"{total_km:,.1f} km, {len(plan.unplannedDeliveryIds)} unplanned "
+            f"in {elapsed:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
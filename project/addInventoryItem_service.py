@@ -1,9 +1,10 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 
 import prisma
 import prisma.enums
 import prisma.models
+from project.stockLedger import StockChange, apply_stock_changes
 from pydantic import BaseModel
 
 
@@ -52,23 +53,25 @@ async def addInventoryItem(
     """
     category_name = category.value
     try:
-        item = await prisma.models.Item.prisma().create(
-            data={
-                "name": name,
-                "category": category_name,
-                "stockLevel": quantity,
-                "minStockLevel": minStockLevel,
-                "reOrderNeed": quantity <= minStockLevel,
-            }
-        )
-        await prisma.models.InventoryEvent.prisma().create(
-            data={
-                "itemId": item.id,
-                "eventType": prisma.enums.InventoryEventType.RECEIVED,
-                "quantityChange": quantity,
-                "date": acquisitionDate,
-            }
-        )
+        async with prisma.get_client().tx(timeout=timedelta(seconds=30)) as transaction:
+            item = await prisma.models.Item.prisma(transaction).create(
+                data={
+                    "name": name,
+                    "category": category_name,
+                    "stockLevel": 0,
+                    "minStockLevel": minStockLevel,
+                    "reOrderNeed": False,
+                }
+            )
+            await apply_stock_changes(
+                [
+                    StockChange(
+                        item.id, quantity, prisma.enums.InventoryEventType.RECEIVED
+                    )
+                ],
+                transaction,
+                date=acquisitionDate,
+            )
         return CreateInventoryItemResponse(
             success=True, message="Inventory item successfully added.", itemId=item.id
         )
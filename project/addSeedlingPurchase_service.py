@@ -1,8 +1,11 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
 
 import prisma
 import prisma.enums
 import prisma.models
+from project.stockLedger import StockChange, apply_stock_changes
+from project.stockProjection import invalidate_stock_projection
 from pydantic import BaseModel
 
 
@@ -16,17 +19,27 @@ class SeedlingPurchaseResponse(BaseModel):
 
 
 async def addSeedlingPurchase(
-    supplier: str, quantity: int, cost: float, purchaseDate: str
+    supplier: str,
+    quantity: int,
+    cost: float,
+    purchaseDate: str,
+    fieldId: Optional[int] = None,
+    species: Optional[str] = None,
+    plantingYear: Optional[int] = None,
 ) -> SeedlingPurchaseResponse:
     """
     Adds a new seedling purchase to the system. It records details of the purchase such as quantity, supplier, and cost.
     This action subsequently updates the Inventory through an internal API call that increases inventory levels.
+    When the field and species the seedlings are planted into are given, they are added to that planting cohort, which feeds the projection of future saleable stock; the stock and the cohort are updated in one transaction.
 
     Args:
     supplier (str): The name or ID of the supplier from whom the seedlings are purchased.
     quantity (int): The number of seedlings purchased in this transaction.
     cost (float): The total cost of the seedling purchase.
     purchaseDate (str): The date the seedlings were purchased, formatted as YYYY-MM-DD.
+    fieldId (Optional[int]): The field the seedlings are planted into.
+    species (Optional[str]): The species of the seedlings, one of the known tree species; required with fieldId.
+    plantingYear (Optional[int]): The year the seedlings are planted; defaults to the year of purchase.
 
     Returns:
     SeedlingPurchaseResponse: Confirms the recording and processing of a new seedling purchase and any associated inventory updates.
@@ -38,20 +51,58 @@ async def addSeedlingPurchase(
         return SeedlingPurchaseResponse(
             success=False, message="Seedling item not found in inventory."
         )
-    try:
-        event = await prisma.models.InventoryEvent.prisma().create(
-            data={
-                "item": {"connect": {"id": seedling_item.id}},
-                "eventType": prisma.enums.InventoryEventType.RECEIVED,
-                "quantityChange": quantity,
-                "date": datetime.strptime(purchaseDate, "%Y-%m-%d"),
-            }
+    if (fieldId is None) != (species is None or not species.strip()):
+        return SeedlingPurchaseResponse(
+            success=False,
+            message="Planted seedlings need both a field and a species.",
         )
-        await prisma.models.Item.prisma().update(
-            where={"id": seedling_item.id},
-            data={"stockLevel": seedling_item.stockLevel + quantity},
+    tree_species = None
+    if fieldId is not None:
+        tree_species = await prisma.models.TreeSpecies.prisma().find_unique(
+            where={"name": species.strip()}
         )
+        if tree_species is None:
+            return SeedlingPurchaseResponse(
+                success=False, message=f"Unknown species {species.strip()!r}."
+            )
+    try:
+        purchased_on = datetime.strptime(purchaseDate, "%Y-%m-%d")
+        cohort_year = plantingYear or purchased_on.year
+        async with prisma.get_client().tx(timeout=timedelta(seconds=30)) as transaction:
+            await apply_stock_changes(
+                [
+                    StockChange(
+                        seedling_item.id,
+                        quantity,
+                        prisma.enums.InventoryEventType.RECEIVED,
+                    )
+                ],
+                transaction,
+                date=purchased_on,
+            )
+            if tree_species is not None:
+                await prisma.models.TreeCohort.prisma(transaction).upsert(
+                    where={
+                        "fieldId_speciesId_plantingYear": {
+                            "fieldId": fieldId,
+                            "speciesId": tree_species.id,
+                            "plantingYear": cohort_year,
+                        }
+                    },
+                    data={
+                        "create": {
+                            "fieldId": fieldId,
+                            "speciesId": tree_species.id,
+                            "plantingYear": cohort_year,
+                            "planted": quantity,
+                        },
+                        "update": {"planted": {"increment": quantity}},
+                    },
+                )
         response_text = f"Successfully recorded purchase and updated inventory: +{quantity} seedlings."
+        if tree_species is not None:
+            invalidate_stock_projection()
+            response_text += f" Planted into the {cohort_year} {tree_species.name} cohort of field {fieldId}."
         return SeedlingPurchaseResponse(success=True, message=response_text)
     except Exception as e:
         return SeedlingPurchaseResponse(
@@ -1,7 +1,9 @@
 from datetime import datetime
+from typing import Optional
 
 import prisma
 import prisma.models
+from project.treeHealth import parse_status, record_assessment
 from pydantic import BaseModel
 
 
@@ -10,6 +12,7 @@ class TreeHealthRecord(BaseModel):
     Detailed Pydantic model of a tree health record, capturing all necessary details.
     """
 
+    id: int
     tree_id: int
     health_status: str
     issues_detected: str
@@ -23,7 +26,7 @@ class TreeHealthPostResponse(BaseModel):
 
     success: bool
     message: str
-    tree_health_record: TreeHealthRecord
+    tree_health_record: Optional[TreeHealthRecord] = None
 
 
 async def addTreeHealthRecord(
@@ -32,10 +35,11 @@ async def addTreeHealthRecord(
     """
     Allows the creation of a new health record for a tree. Fields to input include tree ID, health status,
     issues detected, and the date of assessment. This is crucial for recording periodic health checks and treatments.
+    Records are appended to the tree's assessment history and, when newest, become its latest status.
 
     Args:
         tree_id (int): The unique identifier of the tree for which the health record is being created.
-        health_status (str): The current health status of the tree.
+        health_status (str): The current health status of the tree: Healthy, At Risk, Diseased or Dead.
         issues_detected (str): A brief description of any issues detected during the health assessment of the tree.
         date_of_assessment (datetime): The date on which the health assessment was carried out.
 
@@ -51,20 +55,28 @@ async def addTreeHealthRecord(
           )
         > TreeHealthPostResponse(success=True, message="Health record created.", ...)
     """
-    tree_check = await prisma.models.Item.prisma().find_first(
-        where={"id": tree_id, "category": "TREE"}
-    )
-    if not tree_check:
+    tree = await prisma.models.Tree.prisma().find_unique(where={"id": tree_id})
+    if not tree:
         return TreeHealthPostResponse(
             success=False,
             message="Invalid tree ID or tree does not exist.",
             tree_health_record=None,
         )
+    try:
+        status = parse_status(health_status)
+    except ValueError as e:
+        return TreeHealthPostResponse(
+            success=False, message=str(e), tree_health_record=None
+        )
+    assessment = await record_assessment(
+        tree, status, date_of_assessment, issues=issues_detected
+    )
     new_record = TreeHealthRecord(
+        id=assessment.id,
         tree_id=tree_id,
-        health_status=health_status,
+        health_status=status.value,
         issues_detected=issues_detected,
-        date_of_assessment=date_of_assessment,
+        date_of_assessment=assessment.assessedOn,
     )
     return TreeHealthPostResponse(
         success=True,
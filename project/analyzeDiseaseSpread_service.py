@@ -0,0 +1,116 @@
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional
+
+from project.scheduleTreatment_service import scheduleTreatment
+from project.treeProximity import tree_grid
+from pydantic import BaseModel
+
+MAX_RADIUS_METERS = 500.0
+INSPECTION_TREATMENT = "Disease inspection"
+INSPECTION_TIME = time(8, 0)
+
+
+class AtRiskTree(BaseModel):
+    """
+    A tree exposed to a diseased tree, why it is exposed and how far away it stands.
+    """
+
+    treeId: int
+    fieldId: int
+    row: int
+    position: int
+    distanceMeters: float
+    reasons: List[str]
+
+
+class DiseaseSpreadResponse(BaseModel):
+    """
+    The trees at risk from a diseased tree, nearest first, and the inspection scheduled for them if one was requested.
+    """
+
+    sourceTreeId: int
+    atRisk: List[AtRiskTree]
+    inspectionScheduleId: Optional[int] = None
+
+
+async def analyzeDiseaseSpread(
+    treeId: int,
+    radiusMeters: float = 10.0,
+    windFromDegrees: Optional[float] = None,
+    includeDownhill: bool = True,
+    sectorDegrees: float = 90.0,
+    scheduleInspections: bool = False,
+    inspectionDate: Optional[datetime] = None,
+) -> DiseaseSpreadResponse:
+    """
+    Finds the trees at risk from a diseased tree: every tree within the given radius, and every tree of the same field lying downhill of it or downwind of it within a sector of the given width. Positions come from the fields' planting grids and are looked up in an in-memory grid over all trees, so the analysis stays interactive across the whole registry. Optionally schedules one inspection treatment covering all trees found.
+
+    Args:
+        treeId (int): The diseased tree.
+        radiusMeters (float): Trees this close are at risk regardless of direction.
+        windFromDegrees (Optional[float]): Direction the prevailing wind blows from, in degrees clockwise from north.
+        includeDownhill (bool): Also include trees downhill of the source, if the field's slope is known.
+        sectorDegrees (float): Width of the downhill and downwind sectors in degrees.
+        scheduleInspections (bool): Schedule an inspection of the trees at risk.
+        inspectionDate (Optional[datetime]): When to inspect; defaults to 08:00 the next day.
+
+    Returns:
+        DiseaseSpreadResponse: The trees at risk from a diseased tree, nearest first, and the inspection scheduled for them if one was requested.
+
+    Raises:
+        ValueError: If the tree is unknown, a parameter is out of range, or the inspection cannot be scheduled.
+
+    Example:
+        spread = await analyzeDiseaseSpread(1042, radiusMeters=15, windFromDegrees=270, scheduleInspections=True)
+        print(len(spread.atRisk), spread.inspectionScheduleId)
+    """
+    if not 0 <= radiusMeters <= MAX_RADIUS_METERS:
+        raise ValueError(f"radiusMeters must be between 0 and {MAX_RADIUS_METERS}.")
+    if not 0 < sectorDegrees <= 360:
+        raise ValueError("sectorDegrees must be greater than 0 and at most 360.")
+    grid = await tree_grid()
+    index = grid.locate(treeId)
+    if index is None:
+        raise ValueError(f"Tree {treeId} not found.")
+    reasons: Dict[int, List[str]] = {}
+    for neighbour in grid.within(index, radiusMeters).tolist():
+        reasons.setdefault(neighbour, []).append("nearby")
+    slope = grid.fields[int(grid.columns["fieldId"][index])].slopeAspect
+    if includeDownhill and slope is not None:
+        for neighbour in grid.towards(index, slope, sectorDegrees).tolist():
+            reasons.setdefault(neighbour, []).append("downhill")
+    if windFromDegrees is not None:
+        downwind = (windFromDegrees + 180) % 360
+        for neighbour in grid.towards(index, downwind, sectorDegrees).tolist():
+            reasons.setdefault(neighbour, []).append("downwind")
+    indexes = list(reasons)
+    distances = grid.distances(index, indexes).tolist() if indexes else []
+    at_risk = sorted(
+        (
+            AtRiskTree(
+                treeId=int(grid.columns["id"][neighbour]),
+                fieldId=int(grid.columns["fieldId"][neighbour]),
+                row=int(grid.columns["row"][neighbour]),
+                position=int(grid.columns["position"][neighbour]),
+                distanceMeters=round(distance, 2),
+                reasons=reasons[neighbour],
+            )
+            for neighbour, distance in zip(indexes, distances)
+        ),
+        key=lambda tree: (tree.distanceMeters, tree.treeId),
+    )
+    response = DiseaseSpreadResponse(sourceTreeId=treeId, atRisk=at_risk)
+    if scheduleInspections and at_risk:
+        when = inspectionDate or datetime.combine(
+            datetime.now().date() + timedelta(days=1), INSPECTION_TIME
+        )
+        scheduled = await scheduleTreatment(
+            [tree.treeId for tree in at_risk],
+            INSPECTION_TREATMENT,
+            when,
+            when.time(),
+        )
+        if not scheduled.success:
+            raise ValueError(scheduled.message)
+        response.inspectionScheduleId = scheduled.scheduled_id
+    return response
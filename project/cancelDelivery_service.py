@@ -1,6 +1,10 @@
+from datetime import timedelta
+
 import prisma
 import prisma.enums
 import prisma.models
+from project.deliveryCapacity import release_delivery_slot
+from project.stockLedger import StockChange, apply_stock_changes
 from pydantic import BaseModel
 
 
@@ -15,7 +19,7 @@ class CancelDeliveryResponse(BaseModel):
 
 async def cancelDelivery(deliveryId: int) -> CancelDeliveryResponse:
     """
-    Cancels a previously scheduled delivery. This operation triggers updates in the Scheduling Module to free up transport resources and notify the Inventory to adjust stock reserved for this delivery.
+    Cancels a previously scheduled delivery. This operation triggers updates in the Scheduling Module to free up transport resources and notify the Inventory to adjust stock reserved for this delivery. The delivery is cancelled only if it is still pending, in the same transaction that cancels its open orders and returns their items to stock, so concurrent cancellations restock and free the slot once.
 
     Args:
         deliveryId (int): The unique identifier for the delivery that is to be cancelled.
@@ -30,31 +34,50 @@ async def cancelDelivery(deliveryId: int) -> CancelDeliveryResponse:
         return CancelDeliveryResponse(
             success=False, message=f"No delivery schedule found with ID {deliveryId}."
         )
-    if schedule.status in [
-        prisma.enums.ScheduleStatus.COMPLETED,
-        prisma.enums.ScheduleStatus.CANCELLED,
-    ]:
+    if schedule.status != prisma.enums.ScheduleStatus.PENDING:
         return CancelDeliveryResponse(
             success=False, message="Delivery is already completed or cancelled."
         )
-    updated_schedule = await prisma.models.Schedule.prisma().update(
-        where={"id": deliveryId}, data={"status": prisma.enums.ScheduleStatus.CANCELLED}
-    )
-    orders_linked_to_schedule = await prisma.models.Order.prisma().find_many(
-        where={"id": schedule.userId}
-    )
-    for order in orders_linked_to_schedule:
-        line_items = await prisma.models.LineItem.prisma().find_many(
-            where={"orderId": order.id}
+    async with prisma.get_client().tx(timeout=timedelta(seconds=30)) as transaction:
+        cancelled = await prisma.models.Schedule.prisma(transaction).update_many(
+            where={"id": deliveryId, "status": prisma.enums.ScheduleStatus.PENDING},
+            data={"status": prisma.enums.ScheduleStatus.CANCELLED},
         )
-        for item in line_items:
-            await prisma.models.InventoryEvent.prisma().create(
-                data={
-                    "itemId": item.itemId,
-                    "eventType": prisma.enums.InventoryEventType.ADJUSTED,
-                    "quantityChange": item.quantity,
-                }
+        if cancelled != 1:
+            return CancelDeliveryResponse(
+                success=False, message="Delivery is already completed or cancelled."
+            )
+        orders = await prisma.models.Order.prisma(transaction).find_many(
+            where={
+                "scheduleId": deliveryId,
+                "status": {
+                    "not_in": [
+                        prisma.enums.OrderStatus.DELIVERED,
+                        prisma.enums.OrderStatus.CANCELLED,
+                    ]
+                },
+            },
+            include={"lineItems": True},
+        )
+        for order in orders:
+            await apply_stock_changes(
+                [
+                    StockChange(
+                        item.itemId,
+                        item.quantity,
+                        prisma.enums.InventoryEventType.ADJUSTED,
+                    )
+                    for item in order.lineItems or []
+                ],
+                transaction,
+                order_id=order.id,
+            )
+        if orders:
+            await prisma.models.Order.prisma(transaction).update_many(
+                where={"id": {"in": [order.id for order in orders]}},
+                data={"status": prisma.enums.OrderStatus.CANCELLED},
             )
+    await release_delivery_slot(schedule.scheduledOn)
     return CancelDeliveryResponse(
         success=True,
         message="Delivery has been successfully cancelled and inventory updated.",
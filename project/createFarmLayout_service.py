@@ -1,7 +1,8 @@
-from typing import List
+from typing import Any, Dict, List, Optional
 
 import prisma
 import prisma.models
+from project.fieldIndex import field_columns, track_field
 from pydantic import BaseModel
 
 
@@ -23,6 +24,29 @@ class Coordinate(BaseModel):
     longitude: float
 
 
+class FieldInput(BaseModel):
+    """
+    A field inside the layout, outlined by its corner coordinates in order, with its planting grid: rows run rowBearing degrees clockwise from north starting at the first corner, trees are treeSpacing metres apart within a row and rows rowSpacing metres apart. slopeAspect is the direction the field slopes down towards, if known.
+    """
+
+    name: str
+    polygon: List[Coordinate]
+    rowSpacing: float = 3.0
+    treeSpacing: float = 1.5
+    rowBearing: float = 0.0
+    slopeAspect: Optional[float] = None
+
+
+class FieldOutline(BaseModel):
+    """
+    A stored field with its ID and area.
+    """
+
+    id: int
+    name: str
+    areaHectares: float
+
+
 class FarmLayoutResponse(BaseModel):
     """
     Response model returning the newly created farm layout with its ID included.
@@ -32,32 +56,72 @@ class FarmLayoutResponse(BaseModel):
     name: str
     dimensions: Dimensions
     coordinates: List[Coordinate]
+    fields: List[FieldOutline] = []
+
+
+def field_row(field: FieldInput) -> Dict[str, Any]:
+    """
+    The stored columns of a field.
+
+    Raises:
+        ValueError: If the outline has fewer than three points or a spacing is not positive.
+    """
+    if field.rowSpacing <= 0 or field.treeSpacing <= 0:
+        raise ValueError(f"Field {field.name!r} needs positive row and tree spacing.")
+    return {
+        "name": field.name,
+        **field_columns([(point.latitude, point.longitude) for point in field.polygon]),
+        "rowSpacing": field.rowSpacing,
+        "treeSpacing": field.treeSpacing,
+        "rowBearing": field.rowBearing % 360,
+        "slopeAspect": None if field.slopeAspect is None else field.slopeAspect % 360,
+    }
 
 
 async def createFarmLayout(
-    name: str, dimensions: Dimensions, coordinates: List[Coordinate]
+    name: str,
+    dimensions: Dimensions,
+    coordinates: List[Coordinate],
+    fields: Optional[List[FieldInput]] = None,
 ) -> FarmLayoutResponse:
     """
-    Allows creation of a new farm layout. Users can provide map details such as name, dimensions, and specific coordinates of areas. The server should validate the input, create a new map record in the database, and return the created object with an ID. Essential for expanding or re-configuring farm spaces.
+    Allows creation of a new farm layout. Users can provide map details such as name, dimensions, and specific coordinates of areas. The server should validate the input, create a new map record in the database, and return the created object with an ID. Essential for expanding or re-configuring farm spaces. The layout and its fields are stored in one write, and the fields are added to the spatial index used by the field lookups.
 
     Args:
         name (str): The name of the farm layout.
         dimensions (Dimensions): The dimensions of the farm layout, typically width and height.
-        coordinates (List[Coordinate]): List of coordinate objects, representing different areas of the farm layout.
+        coordinates (List[Coordinate]): List of coordinate objects outlining the boundary of the farm layout.
+        fields (Optional[List[FieldInput]]): The fields inside the layout, each outlined by at least three coordinates.
 
     Returns:
         FarmLayoutResponse: Response model returning the newly created farm layout with its ID included.
+
+    Raises:
+        ValueError: If a field outline has fewer than three points or a field's spacing is not positive.
     """
-    layout = await prisma.models.Item.prisma().create(
+    field_rows = [field_row(field) for field in fields or []]
+    layout = await prisma.models.FarmLayout.prisma().create(
         data={
             "name": name,
-            "category": "EQUIPMENT",
-            "stockLevel": 1,
-            "minStockLevel": 1,
-        }
+            "width": dimensions.width,
+            "height": dimensions.height,
+            "boundary": prisma.Json(
+                [[point.latitude, point.longitude] for point in coordinates]
+            ),
+            "fields": {"create": field_rows},
+        },
+        include={"fields": True},
     )
-    layout_id = layout.id
+    for field in layout.fields or []:
+        track_field(field)
     response = FarmLayoutResponse(
-        id=layout_id, name=name, dimensions=dimensions, coordinates=coordinates
+        id=layout.id,
+        name=name,
+        dimensions=dimensions,
+        coordinates=coordinates,
+        fields=[
+            FieldOutline(id=field.id, name=field.name, areaHectares=field.areaHectares)
+            for field in layout.fields or []
+        ],
     )
     return response
@@ -1,9 +1,12 @@
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timedelta
 from typing import List
 
 import prisma
 import prisma.enums
 import prisma.models
+from project.demandForecast import note_order
+from project.stockLedger import InsufficientStockError, StockChange, apply_stock_changes
 from pydantic import BaseModel
 
 
@@ -40,38 +43,46 @@ async def createOrder(
     Returns:
         CreateOrderResponse: Response model for the creation of a new order. Includes confirmation and order details.
     """
-    items_available = True
-    item_shortages = []
-    for item in items:
-        stock_item = await prisma.models.Item.prisma().find_unique(
-            where={"id": item.itemId}
-        )
-        if stock_item is None or stock_item.stockLevel < item.quantity:
-            items_available = False
-            item_shortages.append(item.itemId)
-    if not items_available:
+    try:
+        async with prisma.get_client().tx(timeout=timedelta(seconds=30)) as transaction:
+            order = await prisma.models.Order.prisma(transaction).create(
+                data={
+                    "customerId": customerId,
+                    "deliveryDate": expectedDeliveryDate,
+                    "status": prisma.enums.OrderStatus.PLACED,
+                }
+            )
+            line_items = [
+                {"orderId": order.id, "itemId": item.itemId, "quantity": item.quantity}
+                for item in items
+            ]
+            await prisma.models.LineItem.prisma(transaction).create_many(
+                data=line_items
+            )
+            await apply_stock_changes(
+                [
+                    StockChange(
+                        item.itemId,
+                        -item.quantity,
+                        prisma.enums.InventoryEventType.SHIPPED,
+                    )
+                    for item in items
+                ],
+                transaction,
+                check_available=True,
+                order_id=order.id,
+            )
+    except InsufficientStockError as error:
         return CreateOrderResponse(
             orderId=0,
             confirmationStatus="pending stock check due to insufficient stocks for items: "
-            + ", ".join(map(str, item_shortages)),
+            + ", ".join(map(str, error.item_ids)),
             expectedDeliveryDate=expectedDeliveryDate,
         )
-    order = await prisma.models.Order.prisma().create(
-        data={
-            "customerId": customerId,
-            "deliveryDate": expectedDeliveryDate,
-            "status": prisma.enums.OrderStatus.PLACED,
-        }
-    )
-    line_items = [
-        {"orderId": order.id, "itemId": item.itemId, "quantity": item.quantity}
-        for item in items
-    ]
-    await prisma.models.LineItem.prisma().create_many(data=line_items)
+    quantities: Counter = Counter()
     for item in items:
-        await prisma.models.Item.prisma().update(
-            where={"id": item.itemId}, data={"stockLevel": {"decrement": item.quantity}}
-        )
+        quantities[item.itemId] += item.quantity
+    await note_order(dict(quantities))
     return CreateOrderResponse(
         orderId=order.id,
         confirmationStatus="confirmed",
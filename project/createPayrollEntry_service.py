@@ -1,7 +1,9 @@
 from datetime import datetime
+from typing import Optional
 
 import prisma
 import prisma.models
+from project.payrollTaxes import load_tax_rules, year_to_date_gross
 from pydantic import BaseModel
 
 
@@ -17,7 +19,10 @@ class CreatePayrollResponse(BaseModel):
 
 
 async def createPayrollEntry(
-    userId: int, hoursWorked: float, hourlyWage: float, deductions: float
+    userId: int,
+    hoursWorked: float,
+    hourlyWage: float,
+    deductions: Optional[float] = None,
 ) -> CreatePayrollResponse:
     """
     Creates a new payroll entry. This function calculates the salary based on hours worked fetched from the Staff Scheduling Module and deductions. It integrates this data with QuickBooks to update financial records immediately. The expected response is the details of the created payroll entry, including its ID and status.
@@ -26,12 +31,17 @@ async def createPayrollEntry(
         userId (int): Unique identifier for the employee for whom the payroll is being created.
         hoursWorked (float): Total number of hours worked by the employee in the current pay period.
         hourlyWage (float): Hourly wage rate for the employee.
-        deductions (float): Any deductions from the employee's salary this period, such as taxes or benefits.
+        deductions (Optional[float]): Any deductions from the employee's salary this period, such as taxes or benefits. When omitted they are computed from the tax rules in effect, including the employee's year-to-date gross.
 
     Returns:
         CreatePayrollResponse: This model provides detailed information about the newly created payroll entry, useful for confirmation and record-keeping.
     """
     gross_payment = hoursWorked * hourlyWage
+    paid_on = datetime.now()
+    if deductions is None:
+        rules = await load_tax_rules(payment_date=paid_on)
+        ytd = await year_to_date_gross([userId], paid_on)
+        deductions = float(rules.deductions([gross_payment], [ytd.get(userId, 0.0)])[0])
     net_payment = gross_payment - deductions
     payroll = await prisma.models.Payroll.prisma().create(
         data={
@@ -39,7 +49,7 @@ async def createPayrollEntry(
             "paymentAmount": gross_payment,
             "taxDeductions": deductions,
             "netAmount": net_payment,
-            "paymentDate": datetime.now(),
+            "paymentDate": paid_on,
         }
     )
     response = CreatePayrollResponse(
@@ -3,6 +3,7 @@ from typing import Optional
 
 import prisma
 import prisma.models
+from project.performanceAnalytics import refresh_user_summary
 from pydantic import BaseModel
 
 
@@ -44,6 +45,7 @@ async def createPerformanceReview(
             "feedback": feedback,
         }
     )
+    await refresh_user_summary(userId)
     return CreatePerformanceReviewResponse(
         success=True,
         reviewId=created_review.id,
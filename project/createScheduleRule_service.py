@@ -0,0 +1,78 @@
+from datetime import datetime
+from typing import Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.recurringSchedules import last_occurrence, parse_rrule
+from project.treatmentWindow import invalidate_treatment_window
+from pydantic import BaseModel
+
+
+class ScheduleRuleResponse(BaseModel):
+    """
+    Confirms the creation of a recurring schedule and reports when its last occurrence falls, if it ends.
+    """
+
+    success: bool
+    message: str
+    ruleId: Optional[int] = None
+    lastOccurrence: Optional[datetime] = None
+
+
+async def createScheduleRule(
+    type: prisma.enums.ScheduleType,
+    userId: Optional[int],
+    startsOn: datetime,
+    durationMinutes: int,
+    rrule: str,
+    label: Optional[str],
+) -> ScheduleRuleResponse:
+    """
+    Creates a recurring schedule, such as a weekly watering or mowing rotation, stored once as an RRULE instead of one Schedule row per occurrence. Occurrences are expanded only when a date window is read.
+
+    Args:
+        type (prisma.enums.ScheduleType): The kind of work scheduled.
+        userId (Optional[int]): The staff member the occurrences are assigned to, if any.
+        startsOn (datetime): Start of the first occurrence; also fixes the time of day of every occurrence.
+        durationMinutes (int): Length of each occurrence.
+        rrule (str): Recurrence rule, e.g. "FREQ=WEEKLY;BYDAY=MO,TH;UNTIL=20240301".
+        label (Optional[str]): Short description of the task, e.g. "Watering".
+
+    Returns:
+        ScheduleRuleResponse: Confirms the creation of a recurring schedule and reports when its last occurrence falls, if it ends.
+
+    Example:
+        await createScheduleRule(
+            prisma.enums.ScheduleType.MAINTENANCE, 7, datetime(2024, 4, 1, 6), 180,
+            "FREQ=WEEKLY;BYDAY=MO,TH", "Watering"
+        )
+    """
+    if durationMinutes <= 0:
+        return ScheduleRuleResponse(
+            success=False, message="Duration must be a positive number of minutes."
+        )
+    try:
+        recurrence = parse_rrule(rrule)
+    except ValueError as e:
+        return ScheduleRuleResponse(success=False, message=str(e))
+    until = last_occurrence(startsOn, recurrence)
+    rule = await prisma.models.ScheduleRule.prisma().create(
+        data={
+            "type": type,
+            "userId": userId,
+            "startsOn": startsOn,
+            "durationMinutes": durationMinutes,
+            "rrule": rrule,
+            "until": until,
+            "label": label,
+        }
+    )
+    if type == prisma.enums.ScheduleType.TREATMENT:
+        invalidate_treatment_window()
+    return ScheduleRuleResponse(
+        success=True,
+        message="Recurring schedule created.",
+        ruleId=rule.id,
+        lastOccurrence=until,
+    )
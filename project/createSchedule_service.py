@@ -0,0 +1,91 @@
+from datetime import datetime
+from typing import List, Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.deliveryCapacity import holds_delivery_slot, reserve_delivery_slot
+from project.scheduleIntervals import load_schedule_index, track
+from project.timestamps import to_utc
+from project.treatmentWindow import invalidate_treatment_window
+from pydantic import BaseModel
+
+
+class ScheduleResponse(BaseModel):
+    """
+    Result of creating a staff schedule. When the shift overlaps shifts the user already has, nothing is written and their ids are returned.
+    """
+
+    success: bool
+    message: str
+    scheduleId: Optional[int] = None
+    conflictingScheduleIds: List[int] = []
+
+
+async def createSchedule(
+    scheduledOn: datetime,
+    endsOn: datetime,
+    type: prisma.enums.ScheduleType,
+    userId: int,
+    status: prisma.enums.ScheduleStatus,
+    resources: List[int],
+) -> ScheduleResponse:
+    """
+    Creates a new staff schedule. The shift is checked against the user's existing shifts with the in-process interval index, an O(log n) lookup, and rejected if it overlaps any of them. A pending delivery also takes a slot of its day's delivery capacity and is rejected when none is left.
+
+    Args:
+        scheduledOn (datetime): Start of the shift.
+        endsOn (datetime): End of the shift; must be after scheduledOn.
+        type (prisma.enums.ScheduleType): The kind of work scheduled.
+        userId (int): The staff member the shift is for.
+        status (prisma.enums.ScheduleStatus): Initial status of the schedule.
+        resources (List[int]): Resources involved in the shift. Not stored as the schema lacks a field.
+
+    Returns:
+        ScheduleResponse: Result of creating a staff schedule. When the shift overlaps shifts the user already has, nothing is written and their ids are returned.
+
+    Example:
+        response = await createSchedule(
+            datetime(2023, 12, 16, 7), datetime(2023, 12, 16, 15),
+            prisma.enums.ScheduleType.HARVESTING, 12, prisma.enums.ScheduleStatus.PENDING, []
+        )
+    """
+    if endsOn <= scheduledOn:
+        return ScheduleResponse(
+            success=False, message="Shift must end after it starts."
+        )
+    index = await load_schedule_index()
+    async with index.write_lock:
+        conflicts = (
+            index.overlapping(userId, to_utc(scheduledOn), to_utc(endsOn))
+            if status != prisma.enums.ScheduleStatus.CANCELLED
+            else []
+        )
+        if conflicts:
+            return ScheduleResponse(
+                success=False,
+                message=f"User {userId} already has overlapping shifts.",
+                conflictingScheduleIds=sorted(conflicts),
+            )
+        if holds_delivery_slot(type, status) and not await reserve_delivery_slot(
+            scheduledOn
+        ):
+            return ScheduleResponse(
+                success=False,
+                message="No truck or driver capacity left on the requested day.",
+            )
+        schedule = await prisma.models.Schedule.prisma().create(
+            data={
+                "scheduledOn": scheduledOn,
+                "endsOn": endsOn,
+                "type": type,
+                "userId": userId,
+                "status": status,
+            }
+        )
+        track(schedule)
+    if type == prisma.enums.ScheduleType.TREATMENT:
+        invalidate_treatment_window()
+    return ScheduleResponse(
+        success=True, message="Schedule created.", scheduleId=schedule.id
+    )
@@ -0,0 +1,78 @@
+from datetime import datetime
+from typing import List, Optional
+
+import prisma
+import prisma.enums
+import prisma.errors
+import prisma.models
+from pydantic import BaseModel
+
+
+class TaxRuleInput(BaseModel):
+    """
+    One deduction rule: rate withheld on the part of the pay between lowerBound and upperBound, measured on the payment alone or on the year-to-date gross.
+    """
+
+    name: str
+    basis: prisma.enums.TaxRuleBasis = prisma.enums.TaxRuleBasis.PERIOD
+    rate: float
+    lowerBound: float = 0.0
+    upperBound: Optional[float] = None
+
+
+class TaxRuleSetResponse(BaseModel):
+    """
+    The stored rule set version and when it takes effect.
+    """
+
+    id: int
+    version: str
+    effectiveFrom: datetime
+    ruleCount: int
+
+
+async def createTaxRuleSet(
+    version: str, effectiveFrom: datetime, rules: List[TaxRuleInput]
+) -> TaxRuleSetResponse:
+    """
+    Stores a new version of the payroll deduction rules. Versions are immutable: changing the rules means adding a version with a later effectiveFrom, so every payroll run can be recomputed from the version it recorded.
+
+    Args:
+        version (str): Unique label of the rule set, such as "2024.1".
+        effectiveFrom (datetime): First payment date the rules apply to.
+        rules (List[TaxRuleInput]): The brackets, flat rates, caps and thresholds of this version.
+
+    Returns:
+        TaxRuleSetResponse: The stored rule set version and when it takes effect.
+
+    Raises:
+        ValueError: If a rule is malformed or the version already exists.
+
+    Example:
+        await createTaxRuleSet("2024.1", datetime(2024, 1, 1), [
+            TaxRuleInput(name="Income tax 10%", rate=0.10, upperBound=1000),
+            TaxRuleInput(name="Income tax 20%", rate=0.20, lowerBound=1000),
+            TaxRuleInput(name="Social security", basis="YEAR_TO_DATE", rate=0.062, upperBound=168600),
+        ])
+    """
+    for rule in rules:
+        if not 0 <= rule.rate <= 1:
+            raise ValueError(f"Rule {rule.name!r} has a rate outside 0..1.")
+        if rule.upperBound is not None and rule.upperBound <= rule.lowerBound:
+            raise ValueError(f"Rule {rule.name!r} has an empty bound range.")
+    try:
+        ruleset = await prisma.models.TaxRuleSet.prisma().create(
+            data={
+                "version": version,
+                "effectiveFrom": effectiveFrom,
+                "rules": {"create": [rule.model_dump() for rule in rules]},
+            }
+        )
+    except prisma.errors.UniqueViolationError:
+        raise ValueError(f"Tax rule version {version!r} already exists.")
+    return TaxRuleSetResponse(
+        id=ruleset.id,
+        version=ruleset.version,
+        effectiveFrom=ruleset.effectiveFrom,
+        ruleCount=len(rules),
+    )
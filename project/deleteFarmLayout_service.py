@@ -1,6 +1,7 @@
 import prisma
-import prisma.enums
 import prisma.models
+from project.fieldIndex import field_index
+from project.treeRegistry import tree_registry
 from pydantic import BaseModel
 
 
@@ -15,8 +16,8 @@ class DeleteFarmLayoutResponse(BaseModel):
 
 async def deleteFarmLayout(layoutId: str) -> DeleteFarmLayoutResponse:
     """
-    Deletes a specified farm layout via ID. The system should ensure that the layout does not contain any active assignments
-    or important linkages with other ongoing activities before deletion. Provides a means to clean up unused or outdated maps.
+    Deletes a specified farm layout via ID together with its fields and their trees, and drops them from the spatial index and the tree registry.
+    Provides a means to clean up unused or outdated maps.
 
     Args:
         layoutId (str): The unique identifier of the farm layout to be deleted.
@@ -29,24 +30,18 @@ async def deleteFarmLayout(layoutId: str) -> DeleteFarmLayoutResponse:
         print(response.status)  # 'Success' or 'Failure'
         print(response.message)  # 'Layout deleted successfully.' or 'Layout cannot be deleted: <reason>'
     """
-    active_schedules = await prisma.models.Schedule.prisma().find_many(
-        where={
-            "userId": layoutId,
-            "status": {"not": prisma.enums.ScheduleStatus.COMPLETED},
-        }
+    layout = await prisma.models.FarmLayout.prisma().find_unique(
+        where={"id": int(layoutId)}, include={"fields": True}
     )
-    if active_schedules:
-        return DeleteFarmLayoutResponse(
-            status="Failure",
-            message="Layout cannot be deleted as it's associated with active schedules.",
-        )
-    delete_result = await prisma.models.User.prisma().delete(where={"id": layoutId})
-    if delete_result:
-        return DeleteFarmLayoutResponse(
-            status="Success", message="Layout deleted successfully."
-        )
-    else:
+    if layout is None:
         return DeleteFarmLayoutResponse(
             status="Failure",
             message="Failed to delete layout. It may not exist or some error occurred.",
         )
+    await prisma.models.FarmLayout.prisma().delete(where={"id": layout.id})
+    for field in layout.fields or []:
+        field_index.remove(field.id)
+    tree_registry.remove_fields([field.id for field in layout.fields or []])
+    return DeleteFarmLayoutResponse(
+        status="Success", message="Layout deleted successfully."
+    )
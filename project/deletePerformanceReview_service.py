@@ -1,5 +1,6 @@
 import prisma
 import prisma.models
+from project.performanceAnalytics import refresh_user_summary
 from pydantic import BaseModel
 
 
@@ -28,6 +29,8 @@ async def deletePerformanceReview(id: int) -> DeletePerformanceReviewResponse:
     deleted_review = await prisma.models.PerformanceReview.prisma().delete(
         where={"id": id}
     )
+    if deleted_review is not None:
+        await refresh_user_summary(deleted_review.userId)
     return DeletePerformanceReviewResponse(
         confirmation="Performance review successfully deleted.", deletedId=id
     )
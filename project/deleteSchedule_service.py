@@ -1,5 +1,9 @@
 import prisma
+import prisma.enums
 import prisma.models
+from project.deliveryCapacity import holds_delivery_slot, release_delivery_slot
+from project.scheduleIntervals import schedule_index
+from project.treatmentWindow import invalidate_treatment_window
 from pydantic import BaseModel
 
 
@@ -28,6 +32,11 @@ async def deleteSchedule(id: int) -> DeleteScheduleResponseModel:
     if not schedule:
         raise Exception("prisma.models.Schedule with the given ID does not exist")
     delete_result = await prisma.models.Schedule.prisma().delete(where={"id": id})
+    schedule_index.remove(id)
+    if holds_delivery_slot(schedule.type, schedule.status):
+        await release_delivery_slot(schedule.scheduledOn)
+    if schedule.type == prisma.enums.ScheduleType.TREATMENT:
+        invalidate_treatment_window()
     if delete_result:
         return DeleteScheduleResponseModel(
             message="prisma.models.Schedule deleted successfully."
@@ -1,6 +1,9 @@
+from datetime import timedelta
+
 import prisma
 import prisma.enums
 import prisma.models
+from project.stockLedger import StockChange, apply_stock_changes
 from pydantic import BaseModel
 
 
@@ -31,20 +34,20 @@ async def deleteSeedlingPurchase(purchaseId: int) -> DeleteSeedlingPurchaseRespo
             return DeleteSeedlingPurchaseResponse(
                 success=False, message="No seedling purchase found with this ID."
             )
-        updated_item = await prisma.models.Item.prisma().update(
-            where={"id": line_item.itemId},
-            data={"stockLevel": {"decrement": line_item.quantity}},
-        )
-        await prisma.models.InventoryEvent.prisma().create(
-            {
-                "data": {
-                    "itemId": line_item.itemId,
-                    "eventType": prisma.enums.InventoryEventType.ADJUSTED,
-                    "quantityChange": -line_item.quantity,
-                }
-            }
-        )
-        await prisma.models.LineItem.prisma().delete(where={"id": purchaseId})
+        async with prisma.get_client().tx(timeout=timedelta(seconds=30)) as transaction:
+            await apply_stock_changes(
+                [
+                    StockChange(
+                        line_item.itemId,
+                        -line_item.quantity,
+                        prisma.enums.InventoryEventType.ADJUSTED,
+                    )
+                ],
+                transaction,
+            )
+            await prisma.models.LineItem.prisma(transaction).delete(
+                where={"id": purchaseId}
+            )
         return DeleteSeedlingPurchaseResponse(
             success=True,
             message="Seedling purchase deleted and inventory updated successfully.",
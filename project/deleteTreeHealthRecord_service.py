@@ -1,5 +1,6 @@
 import prisma
 import prisma.models
+from project.treeHealth import delete_assessment
 from pydantic import BaseModel
 
 
@@ -15,7 +16,8 @@ class DeleteTreeHealthRecordResponse(BaseModel):
 async def deleteTreeHealthRecord(id: str) -> DeleteTreeHealthRecordResponse:
     """
     Deletes a tree health record when it is no longer needed or if entered in error. The operation requires the
-    tree health record ID and is restricted to maintain data integrity.
+    tree health record ID and is restricted to maintain data integrity. When the record was the tree's newest,
+    its latest status falls back to the previous record.
 
     Args:
         id (str): The unique identifier of the tree health record to be deleted.
@@ -23,12 +25,14 @@ async def deleteTreeHealthRecord(id: str) -> DeleteTreeHealthRecordResponse:
     Returns:
         DeleteTreeHealthRecordResponse: Response model indicating the success or failure of a tree health record deletion.
     """
-    record = await prisma.models.Item.prisma().find_unique(where={"id": int(id)})
+    record = await prisma.models.TreeHealthAssessment.prisma().find_unique(
+        where={"id": int(id)}
+    )
     if not record:
         return DeleteTreeHealthRecordResponse(
             success=False, message="Tree health record not found."
         )
-    await prisma.models.Item.prisma().delete(where={"id": int(id)})
+    await delete_assessment(record)
     return DeleteTreeHealthRecordResponse(
         success=True, message="Tree health record successfully deleted."
     )
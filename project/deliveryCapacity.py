@@ -0,0 +1,171 @@
+"""
+Per-day ledger of delivery capacity.
+
+Each DeliveryCapacity row holds the truck and driver slots for one day and how many are
+still free. Admitting a delivery is a single conditional decrement of that row, so the check
+is O(1) and two concurrent bookings cannot both take the last slot. Rows are seeded lazily
+the first time a day is touched, from the fleet size and the deliveries already booked, and
+every later touch moves their slot counts, and the free counts with them, to the current
+fleet, so trucks or drivers added or removed since count from then on. Trucks are the stock
+of TRUCK items; drivers are the users with the DRIVER role, and while there are none, driver
+capacity is not tracked separately and follows the trucks. Releasing a slot never frees more
+than the day has.
+
+A delivery holds a slot while it is a PENDING DELIVERY schedule; services that change a
+schedule's type, status or day move the slot with move_delivery_slot.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+
+import prisma
+import prisma.enums
+import prisma.errors
+import prisma.models
+from project.timestamps import to_utc
+
+DELIVERIES_PER_TRUCK_PER_DAY = 4
+DELIVERIES_PER_DRIVER_PER_DAY = 4
+
+
+def day_key(moment: datetime | date) -> datetime:
+    """
+    The ledger key for the day containing moment.
+    """
+    day = moment.date() if isinstance(moment, datetime) else moment
+    return datetime.combine(day, time.min)
+
+
+async def _fleet_slots() -> Dict[str, int]:
+    trucks = await prisma.models.Item.prisma().find_many(
+        where={"category": prisma.enums.Category.TRUCK, "stockLevel": {"gt": 0}}
+    )
+    truck_slots = sum(item.stockLevel for item in trucks) * DELIVERIES_PER_TRUCK_PER_DAY
+    drivers = await prisma.models.User.prisma().count(
+        where={"role": prisma.enums.Role.DRIVER}
+    )
+    return {
+        "truckSlots": truck_slots,
+        "driverSlots": (
+            drivers * DELIVERIES_PER_DRIVER_PER_DAY if drivers else truck_slots
+        ),
+    }
+
+
+def holds_delivery_slot(
+    type: prisma.enums.ScheduleType, status: prisma.enums.ScheduleStatus
+) -> bool:
+    """
+    Whether a schedule of this type and status holds a delivery slot on its day.
+    """
+    return (
+        type == prisma.enums.ScheduleType.DELIVERY
+        and status == prisma.enums.ScheduleStatus.PENDING
+    )
+
+
+async def ensure_days(days: List[datetime]) -> None:
+    """
+    Seeds ledger rows for the given day keys that do not have one yet and brings existing
+    ones to the current fleet. Each new row starts from the fleet size minus the pending
+    deliveries already booked on that day; a fleet change shifts an existing row's free
+    slots by the same amount as its slots, which may leave them negative until enough
+    deliveries are cancelled.
+    """
+    slots = await _fleet_slots()
+    existing = await prisma.models.DeliveryCapacity.prisma().find_many(
+        where={"day": {"in": days}}
+    )
+    stale = [
+        row.day
+        for row in existing
+        if row.truckSlots != slots["truckSlots"]
+        or row.driverSlots != slots["driverSlots"]
+    ]
+    if stale:
+        placeholders = ", ".join(f"${slot}::date" for slot in range(3, len(stale) + 3))
+        await prisma.get_client().execute_raw(
+            'UPDATE "DeliveryCapacity" SET'
+            ' "trucksRemaining" = "trucksRemaining" + $1 - "truckSlots",'
+            ' "driversRemaining" = "driversRemaining" + $2 - "driverSlots",'
+            ' "truckSlots" = $1, "driverSlots" = $2'
+            f' WHERE "day" IN ({placeholders})',
+            slots["truckSlots"],
+            slots["driverSlots"],
+            *stale,
+        )
+    missing = sorted(set(days) - {to_utc(row.day) for row in existing})
+    for day in missing:
+        booked = await prisma.models.Schedule.prisma().count(
+            where={
+                "type": prisma.enums.ScheduleType.DELIVERY,
+                "status": prisma.enums.ScheduleStatus.PENDING,
+                "scheduledOn": {"gte": day, "lt": day + timedelta(days=1)},
+            }
+        )
+        try:
+            await prisma.models.DeliveryCapacity.prisma().create(
+                data={
+                    "day": day,
+                    "truckSlots": slots["truckSlots"],
+                    "driverSlots": slots["driverSlots"],
+                    "trucksRemaining": slots["truckSlots"] - booked,
+                    "driversRemaining": slots["driverSlots"] - booked,
+                }
+            )
+        except prisma.errors.UniqueViolationError:
+            # Another request seeded the same day first; its row wins.
+            pass
+
+
+async def reserve_delivery_slot(moment: datetime) -> bool:
+    """
+    Takes one truck slot and one driver slot on the day of moment. Returns False, without
+    changing anything, if either resource is exhausted.
+    """
+    day = day_key(moment)
+    await ensure_days([day])
+    reserved = await prisma.models.DeliveryCapacity.prisma().update_many(
+        where={
+            "day": day,
+            "trucksRemaining": {"gt": 0},
+            "driversRemaining": {"gt": 0},
+        },
+        data={
+            "trucksRemaining": {"decrement": 1},
+            "driversRemaining": {"decrement": 1},
+        },
+    )
+    return reserved == 1
+
+
+async def release_delivery_slot(moment: datetime) -> None:
+    """
+    Gives back the truck and driver slot held by a delivery on the day of moment, never
+    freeing more slots than the day has.
+    """
+    await prisma.get_client().execute_raw(
+        'UPDATE "DeliveryCapacity" SET'
+        ' "trucksRemaining" = LEAST("trucksRemaining" + 1, "truckSlots"),'
+        ' "driversRemaining" = LEAST("driversRemaining" + 1, "driverSlots")'
+        ' WHERE "day" = $1::date',
+        day_key(moment),
+    )
+
+
+async def move_delivery_slot(
+    old_moment: Optional[datetime], new_moment: Optional[datetime]
+) -> bool:
+    """
+    Moves the slot of a delivery that held one on the day of old_moment, if any, to the day
+    of new_moment, if it needs one. Returns False, without changing anything, if the new
+    day has no free slot.
+    """
+    if old_moment is not None and new_moment is not None:
+        if day_key(old_moment) == day_key(new_moment):
+            return True
+    if new_moment is not None and not await reserve_delivery_slot(new_moment):
+        return False
+    if old_moment is not None:
+        await release_delivery_slot(old_moment)
+    return True
@@ -0,0 +1,255 @@
+"""
+Delivery route planning for a day's truck runs.
+
+Stops are swept into angular clusters around the depot, each cluster is turned into
+capacity-feasible runs with the Clarke-Wright savings heuristic, every run is tightened
+with 2-opt, and the runs are then handed out to the available trucks. The module has no
+database access so it can be benchmarked and reused offline.
+"""
+
+import math
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+from pydantic import BaseModel
+
+EARTH_RADIUS_KM = 6371.0088
+
+Point = Tuple[float, float]
+
+
+class RouteStop(BaseModel):
+    """
+    A delivery stop with its geocoded position and the number of units to drop off.
+    """
+
+    deliveryId: int
+    latitude: float
+    longitude: float
+    demand: int
+
+
+class TruckType(BaseModel):
+    """
+    A truck model available for deliveries, how many of them we own and how many units each carries.
+    """
+
+    itemId: int
+    name: str
+    capacity: int
+    count: int
+
+
+class TruckRun(BaseModel):
+    """
+    One trip of one truck: depot, the stops in visiting order, back to the depot.
+    """
+
+    truckItemId: int
+    truckName: str
+    truckNumber: int
+    tripNumber: int
+    capacity: int
+    load: int
+    distanceKm: float
+    deliveryIds: List[int]
+
+
+class RoutePlan(BaseModel):
+    """
+    The runs planned for a day and the stops that could not be placed on any truck.
+    """
+
+    runs: List[TruckRun]
+    unplannedDeliveryIds: List[int]
+
+
+def haversine_km(a: Point, b: Point) -> float:
+    """
+    Great-circle distance in kilometres between two (latitude, longitude) points.
+    """
+    lat1, lon1 = math.radians(a[0]), math.radians(a[1])
+    lat2, lon2 = math.radians(b[0]), math.radians(b[1])
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+@lru_cache(maxsize=256)
+def distance_matrix(points: Tuple[Point, ...]) -> Tuple[Tuple[float, ...], ...]:
+    """
+    Symmetric distance matrix for the given points. Cached on the exact point tuple, so
+    re-planning a day whose stops have not moved does not recompute any distances.
+    """
+    n = len(points)
+    rows = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        row_i = rows[i]
+        for j in range(i + 1, n):
+            d = haversine_km(points[i], points[j])
+            row_i[j] = d
+            rows[j][i] = d
+    return tuple(tuple(row) for row in rows)
+
+
+def sweep_clusters(
+    depot: Point, stops: Sequence[RouteStop], cluster_size: int
+) -> List[List[RouteStop]]:
+    """
+    Splits the stops into consecutive slices of at most cluster_size by their bearing from the depot.
+    """
+    ordered = sorted(
+        stops,
+        key=lambda s: math.atan2(s.latitude - depot[0], s.longitude - depot[1]),
+    )
+    return [
+        ordered[start : start + cluster_size]
+        for start in range(0, len(ordered), cluster_size)
+    ]
+
+
+def savings_routes(
+    dist: Sequence[Sequence[float]], demands: Sequence[int], capacity: int
+) -> List[List[int]]:
+    """
+    Clarke-Wright savings. Node 0 is the depot; returns routes as lists of node indices
+    without the depot, each with a total demand no greater than capacity.
+    """
+    n = len(demands)
+    routes: Dict[int, List[int]] = {i: [i] for i in range(1, n)}
+    loads: Dict[int, int] = {i: demands[i] for i in range(1, n)}
+    route_of = list(range(n))
+    d0 = dist[0]
+    savings = []
+    for i in range(1, n):
+        row_i = dist[i]
+        for j in range(i + 1, n):
+            s = d0[i] + d0[j] - row_i[j]
+            if s > 0:
+                savings.append((s, i, j))
+    savings.sort(reverse=True)
+    for _, i, j in savings:
+        ri, rj = route_of[i], route_of[j]
+        if ri == rj or loads[ri] + loads[rj] > capacity:
+            continue
+        a, b = routes[ri], routes[rj]
+        if a[-1] == i and b[0] == j:
+            merged = a + b
+        elif a[0] == i and b[-1] == j:
+            merged = b + a
+        elif a[-1] == i and b[-1] == j:
+            merged = a + b[::-1]
+        elif a[0] == i and b[0] == j:
+            merged = a[::-1] + b
+        else:
+            continue
+        routes[ri] = merged
+        loads[ri] += loads.pop(rj)
+        del routes[rj]
+        for node in b:
+            route_of[node] = ri
+    return list(routes.values())
+
+
+def two_opt(route: List[int], dist: Sequence[Sequence[float]]) -> List[int]:
+    """
+    Improves a single route (depot excluded) by reversing segments while that shortens the tour.
+    """
+    tour = [0] + route + [0]
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(tour) - 2):
+            a, b = tour[i - 1], tour[i]
+            d_ab = dist[a][b]
+            for k in range(i + 1, len(tour) - 1):
+                c, e = tour[k], tour[k + 1]
+                if dist[a][c] + dist[b][e] < d_ab + dist[c][e] - 1e-9:
+                    tour[i : k + 1] = tour[i : k + 1][::-1]
+                    b = tour[i]
+                    d_ab = dist[a][b]
+                    improved = True
+    return tour[1:-1]
+
+
+def route_length(route: Sequence[int], dist: Sequence[Sequence[float]]) -> float:
+    """
+    Length of depot -> route -> depot.
+    """
+    tour = [0, *route, 0]
+    return sum(dist[tour[k]][tour[k + 1]] for k in range(len(tour) - 1))
+
+
+def plan_routes(
+    depot: Point,
+    stops: Sequence[RouteStop],
+    trucks: Sequence[TruckType],
+    cluster_size: int = 150,
+) -> RoutePlan:
+    """
+    Plans the day's truck runs. Runs are built against the largest truck capacity, then
+    assigned largest-load first to the eligible truck with the least distance so far, so a
+    truck may make several trips. Stops that exceed every truck's capacity are left unplanned.
+
+    Args:
+        depot (Point): (latitude, longitude) the trucks leave from and return to.
+        stops (Sequence[RouteStop]): The day's delivery stops.
+        trucks (Sequence[TruckType]): Truck models available, with capacity and count.
+        cluster_size (int): Maximum number of stops routed together; bounds the savings and distance matrix cost.
+
+    Returns:
+        RoutePlan: The runs planned for a day and the stops that could not be placed on any truck.
+    """
+    fleet = [
+        (truck, number)
+        for truck in trucks
+        if truck.capacity > 0
+        for number in range(1, truck.count + 1)
+    ]
+    if not fleet:
+        return RoutePlan(runs=[], unplannedDeliveryIds=[s.deliveryId for s in stops])
+    max_capacity = max(truck.capacity for truck, _ in fleet)
+    routable = [s for s in stops if s.demand <= max_capacity]
+    unplanned = [s.deliveryId for s in stops if s.demand > max_capacity]
+    built: List[Tuple[int, float, List[int]]] = []
+    for cluster in sweep_clusters(depot, routable, cluster_size):
+        points = (depot, *((s.latitude, s.longitude) for s in cluster))
+        dist = distance_matrix(points)
+        demands = [0, *(s.demand for s in cluster)]
+        for route in savings_routes(dist, demands, max_capacity):
+            route = two_opt(route, dist)
+            built.append(
+                (
+                    sum(demands[node] for node in route),
+                    route_length(route, dist),
+                    [cluster[node - 1].deliveryId for node in route],
+                )
+            )
+    built.sort(key=lambda r: r[0], reverse=True)
+    driven = {key: 0.0 for key in range(len(fleet))}
+    trips = {key: 0 for key in range(len(fleet))}
+    runs = []
+    for load, length, delivery_ids in built:
+        key = min(
+            (k for k, (truck, _) in enumerate(fleet) if truck.capacity >= load),
+            key=lambda k: driven[k],
+        )
+        truck, number = fleet[key]
+        driven[key] += length
+        trips[key] += 1
+        runs.append(
+            TruckRun(
+                truckItemId=truck.itemId,
+                truckName=truck.name,
+                truckNumber=number,
+                tripNumber=trips[key],
+                capacity=truck.capacity,
+                load=load,
+                distanceKm=round(length, 3),
+                deliveryIds=delivery_ids,
+            )
+        )
+    runs.sort(key=lambda r: (r.truckItemId, r.truckNumber, r.tripNumber))
+    return RoutePlan(runs=runs, unplannedDeliveryIds=unplanned)
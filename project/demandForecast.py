@@ -0,0 +1,240 @@
+"""
+Per-item demand forecasts and the reorder points derived from them.
+
+Demand is what leaves stock: line items of orders that were not cancelled, by the day the
+order was placed, plus SHIPPED inventory events not already counted through an order. The
+last HISTORY_DAYS days of it are read with one grouped query into an (item x day) matrix,
+and every item is fitted at once: the daily demand is an exponentially weighted mean that
+favours recent days, and its spread the matching weighted standard deviation, both a single
+matrix-vector product. An item's reorder point covers its expected demand over its lead
+time plus SERVICE_LEVEL_Z standard deviations of it; the fixed minStockLevel stays as a
+floor, so items without history keep behaving as before. Time to stockout is the current
+stock divided by the daily demand and is computed on read, since stock changes between
+fits.
+
+Forecasts are refitted for all items once a night, by whichever worker process takes the
+advisory lock first, and at startup when they are more than a day old. An order taking more
+than LARGE_ORDER_DAYS days of an item's forecast demand refits that item at once. Each fit
+also recomputes the items' reOrderNeed flags against the new reorder points, queueing the
+items whose flag changed in the reorder queue like any stock change does.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import prisma
+import prisma.models
+from project.sensorSeries import ROWS_PER_STATEMENT, values_sql
+from project.stockLedger import queue_crossings
+from project.timestamps import parse_timestamp, to_utc
+
+HISTORY_DAYS = 182
+# Weight of the most recent day in the exponentially weighted mean.
+SMOOTHING = 0.05
+# About a 95% chance of not running out during the lead time.
+SERVICE_LEVEL_Z = 1.65
+LARGE_ORDER_DAYS = 7
+REFRESH_TIME = time(2, 0)
+STALE_AFTER = timedelta(days=1)
+_REFRESH_LOCK_KEY = 47001
+
+logger = logging.getLogger(__name__)
+
+
+def demand_weights(days: int, smoothing: float = SMOOTHING) -> np.ndarray:
+    """
+    Exponential weights for days oldest first, summing to one.
+    """
+    weights = smoothing * (1 - smoothing) ** np.arange(days - 1, -1, -1)
+    return weights / weights.sum()
+
+
+def fit_demand(history: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Weighted mean and standard deviation of daily demand per item (rows of history).
+    """
+    weights = demand_weights(history.shape[1])
+    mean = history @ weights
+    variance = ((history - mean[:, None]) ** 2) @ weights
+    return {"dailyDemand": mean, "demandStdDev": np.sqrt(variance)}
+
+
+def reorder_points(
+    daily_demand: np.ndarray, std_dev: np.ndarray, lead_days: np.ndarray
+) -> np.ndarray:
+    """
+    Stock levels that cover the lead time's demand at the target service level.
+    """
+    cover = daily_demand * lead_days + SERVICE_LEVEL_Z * std_dev * np.sqrt(lead_days)
+    # Rounded first so that float noise does not push whole numbers up by one.
+    return np.ceil(np.round(cover, 6)).astype(np.int64)
+
+
+def reorder_level(
+    item: prisma.models.Item, forecast: Optional[prisma.models.ItemForecast]
+) -> int:
+    """
+    The stock level at or below which an item needs reordering.
+    """
+    return max(item.minStockLevel, forecast.reorderPoint if forecast else 0)
+
+
+def days_to_stockout(
+    stock_level: int, forecast: Optional[prisma.models.ItemForecast]
+) -> Optional[float]:
+    """
+    Days until the stock runs out at the forecast demand; None without demand.
+    """
+    if forecast is None or forecast.dailyDemand <= 0:
+        return None
+    return round(max(stock_level, 0) / forecast.dailyDemand, 1)
+
+
+async def _history(
+    client: prisma.Prisma, item_ids: List[int], start: datetime
+) -> np.ndarray:
+    slots = {item_id: slot for slot, item_id in enumerate(item_ids)}
+    history = np.zeros((len(item_ids), HISTORY_DAYS))
+    rows = await client.query_raw(
+        'SELECT li."itemId", date_trunc(\'day\', o."createdDate") AS "day",'
+        ' SUM(li."quantity")::float AS "quantity"'
+        ' FROM "LineItem" li JOIN "Order" o ON o."id" = li."orderId"'
+        ' WHERE o."createdDate" >= $1::timestamp AND o."createdDate" < $2::timestamp'
+        " AND o.\"status\" <> 'CANCELLED'"
+        " GROUP BY 1, 2"
+        ' UNION ALL SELECT e."itemId", date_trunc(\'day\', e."date"),'
+        ' SUM(ABS(e."quantityChange"))::float'
+        ' FROM "InventoryEvent" e'
+        ' WHERE e."eventType" = \'SHIPPED\' AND e."orderId" IS NULL'
+        ' AND e."date" >= $1::timestamp AND e."date" < $2::timestamp'
+        " GROUP BY 1, 2",
+        start,
+        start + timedelta(days=HISTORY_DAYS),
+    )
+    for row in rows:
+        slot = slots.get(row["itemId"])
+        if slot is not None:
+            day = parse_timestamp(row["day"])
+            history[slot, (day - start).days] += row["quantity"]
+    return history
+
+
+async def refresh_forecasts(
+    item_ids: Optional[List[int]] = None, now: Optional[datetime] = None
+) -> int:
+    """
+    Refits the given items, or all items, and updates their reOrderNeed flags. Returns the
+    number of items fitted; 0 when another process is already refitting all items.
+    """
+    now = now or datetime.utcnow()
+    start = datetime.combine(now.date(), time.min) - timedelta(days=HISTORY_DAYS)
+    async with prisma.get_client().tx(timeout=timedelta(minutes=2)) as transaction:
+        if item_ids is None:
+            locked = await transaction.query_raw(
+                'SELECT pg_try_advisory_xact_lock($1) AS "locked"', _REFRESH_LOCK_KEY
+            )
+            if not locked[0]["locked"]:
+                return 0
+        items = await prisma.models.Item.prisma(transaction).find_many(
+            where={} if item_ids is None else {"id": {"in": item_ids}},
+            order={"id": "asc"},
+        )
+        if not items:
+            return 0
+        ids = [item.id for item in items]
+        fitted = fit_demand(await _history(transaction, ids, start))
+        points = reorder_points(
+            fitted["dailyDemand"],
+            fitted["demandStdDev"],
+            np.array([item.leadTimeDays for item in items], dtype=np.float64),
+        )
+        rows = [
+            [item_id, float(daily), float(spread), int(point), now]
+            for item_id, daily, spread, point in zip(
+                ids, fitted["dailyDemand"], fitted["demandStdDev"], points
+            )
+        ]
+        casts = ("", "", "", "", "::timestamp")
+        for offset in range(0, len(rows), ROWS_PER_STATEMENT):
+            values, params = values_sql(
+                rows[offset : offset + ROWS_PER_STATEMENT], casts
+            )
+            await transaction.execute_raw(
+                'INSERT INTO "ItemForecast" ("itemId", "dailyDemand", "demandStdDev",'
+                ' "reorderPoint", "fittedAt")'
+                f" VALUES {values}"
+                ' ON CONFLICT ("itemId") DO UPDATE SET'
+                ' "dailyDemand" = EXCLUDED."dailyDemand",'
+                ' "demandStdDev" = EXCLUDED."demandStdDev",'
+                ' "reorderPoint" = EXCLUDED."reorderPoint",'
+                ' "fittedAt" = EXCLUDED."fittedAt"',
+                *params,
+            )
+            crossings = await transaction.query_raw(
+                'UPDATE "Item" i SET "reOrderNeed" = NOT i."reOrderNeed"'
+                ' FROM "ItemForecast" f WHERE f."itemId" = i."id"'
+                ' AND i."id" BETWEEN $1 AND $2 AND i."reOrderNeed" <>'
+                ' (i."stockLevel" <= GREATEST(i."minStockLevel", f."reorderPoint"))'
+                ' RETURNING i."id", i."reOrderNeed", i."stockLevel",'
+                ' GREATEST(i."minStockLevel", f."reorderPoint") AS "reorderLevel"',
+                rows[offset][0],
+                rows[min(offset + ROWS_PER_STATEMENT, len(rows)) - 1][0],
+            )
+            await queue_crossings(transaction, crossings)
+    return len(items)
+
+
+async def note_order(quantities: Dict[int, int]) -> None:
+    """
+    Refits the items of an order that took more than LARGE_ORDER_DAYS days of their
+    forecast demand, or that have no forecast yet.
+    """
+    forecasts = {
+        forecast.itemId: forecast
+        for forecast in await prisma.models.ItemForecast.prisma().find_many(
+            where={"itemId": {"in": list(quantities)}}
+        )
+    }
+    large = [
+        item_id
+        for item_id, quantity in quantities.items()
+        if item_id not in forecasts
+        or quantity > LARGE_ORDER_DAYS * forecasts[item_id].dailyDemand
+    ]
+    if large:
+        await refresh_forecasts(sorted(large))
+
+
+async def refresh_if_stale(now: Optional[datetime] = None) -> None:
+    """
+    Refits all items when the oldest forecast is more than a day old or items lack one.
+    """
+    now = now or datetime.utcnow()
+    oldest = await prisma.models.ItemForecast.prisma().find_first(
+        order={"fittedAt": "asc"}
+    )
+    fitted = await prisma.models.ItemForecast.prisma().count()
+    if fitted < await prisma.models.Item.prisma().count() or (
+        oldest is not None and now - to_utc(oldest.fittedAt) > STALE_AFTER
+    ):
+        await refresh_forecasts(now=now)
+
+
+async def refresh_nightly() -> None:
+    """
+    Refits all items every night at REFRESH_TIME until cancelled.
+    """
+    while True:
+        now = datetime.now()
+        next_run = datetime.combine(now.date(), REFRESH_TIME)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        await asyncio.sleep((next_run - now).total_seconds())
+        try:
+            fitted = await refresh_forecasts()
+            logger.info("Refitted demand forecasts of %d items", fitted)
+        except Exception:
+            logger.exception("Nightly demand forecast refresh failed")
@@ -1,8 +1,10 @@
 from enum import Enum
-from typing import List
+from typing import List, Optional
 
 import prisma
+import prisma.enums
 import prisma.models
+from project.demandForecast import days_to_stockout, reorder_level
 from pydantic import BaseModel
 
 
@@ -33,6 +35,9 @@ class InventoryReportDetail(BaseModel):
     minStockLevel: int
     stockStatus: str
     pendingTransactions: int
+    reorderLevel: int
+    dailyDemand: float = 0.0
+    daysToStockout: Optional[float] = None
 
 
 class InventoryReportResponse(BaseModel):
@@ -50,6 +55,7 @@ async def fetchInventoryReports(
     Provides comprehensive inventory reports, combining information from Inventory Management.
     The expected response includes current stock levels, pending orders, and item usage statistics.
     Data is sourced from the Inventory Module to maintain updated and consistent inventory tracking.
+    Stock status is judged against each item's forecast reorder level, and event totals are summed by the database.
 
     Args:
         request (InventoryReportRequest): Model used to fetch data required to generate a detailed inventory report.
@@ -58,22 +64,22 @@ async def fetchInventoryReports(
         InventoryReportResponse: This response model provides detailed inventory status categorized by item type,
                                  stock status, and alerts for any impending stock-outs.
     """
-    items = await prisma.models.Item.prisma().find_many(
-        include={"inventoryEvents": True}
-    )
+    items = await prisma.models.Item.prisma().find_many(include={"forecast": True})
+    pending = {
+        group["itemId"]: group["_sum"]["quantityChange"] or 0
+        for group in await prisma.models.InventoryEvent.prisma().group_by(
+            by=["itemId"],
+            where={"eventType": {"not": prisma.enums.InventoryEventType.SHIPPED}},
+            sum={"quantityChange": True},
+        )
+    }
     details = []
     for item in items:
-        pending_transactions = sum(
-            (
-                event.quantityChange
-                for event in item.inventoryEvents
-                if event.eventType != "SHIPPED"
-            )
-        )
+        level = reorder_level(item, item.forecast)
         stock_status = "Sufficient"
-        if item.stockLevel <= item.minStockLevel / 2:
+        if item.stockLevel <= level / 2:
             stock_status = "Critical"
-        elif item.stockLevel < item.minStockLevel:
+        elif item.stockLevel < level:
             stock_status = "Low"
         detail = InventoryReportDetail(
             itemCategory=item.category,
@@ -81,7 +87,10 @@ async def fetchInventoryReports(
             currentStock=item.stockLevel,
             minStockLevel=item.minStockLevel,
             stockStatus=stock_status,
-            pendingTransactions=pending_transactions,
+            pendingTransactions=pending.get(item.id, 0),
+            reorderLevel=level,
+            dailyDemand=item.forecast.dailyDemand if item.forecast else 0.0,
+            daysToStockout=days_to_stockout(item.stockLevel, item.forecast),
         )
         details.append(detail)
     return InventoryReportResponse(reports=details)
@@ -0,0 +1,110 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+from pydantic import BaseModel
+
+
+class UserPerformance(BaseModel):
+    """
+    Review statistics of one staff member: latest score, all-time and rolling averages, and how the rolling average moved.
+    """
+
+    userId: int
+    role: prisma.enums.Role
+    reviewCount: int
+    averageScore: float
+    latestScore: int
+    latestReviewDate: datetime
+    rollingAverage: float
+    trend: float
+
+
+class RolePerformance(BaseModel):
+    """
+    Review statistics of all reviewed staff holding a role.
+    """
+
+    role: prisma.enums.Role
+    staffCount: int
+    reviewCount: int
+    averageLatestScore: float
+    averageRollingScore: float
+    averageTrend: float
+
+
+class PerformanceReportsResponse(BaseModel):
+    """
+    Per-user and per-role performance statistics, precomputed from the reviews.
+    """
+
+    users: List[UserPerformance]
+    roles: List[RolePerformance]
+
+
+async def fetchPerformanceReports(
+    userId: Optional[int], startDate: Optional[datetime], endDate: Optional[datetime]
+) -> PerformanceReportsResponse:
+    """
+    Generates staff performance reports using data from Staff Performance Management. Figures come from the per-user summaries kept current whenever a review is written, so a report reads one row per staff member rather than their review history; role figures are grouped from those rows by the database.
+
+    Args:
+        userId (Optional[int]): Restricts the report to one staff member.
+        startDate (Optional[datetime]): Restricts the report to staff whose latest review is on or after this date.
+        endDate (Optional[datetime]): Restricts the report to staff whose latest review is before this date.
+
+    Returns:
+        PerformanceReportsResponse: Per-user and per-role performance statistics, precomputed from the reviews.
+
+    Example:
+        report = await fetchPerformanceReports(None, datetime(2023, 1, 1), None)
+        print([(role.role, role.averageRollingScore) for role in report.roles])
+    """
+    where: Dict[str, Any] = {}
+    if userId is not None:
+        where["userId"] = userId
+    if startDate or endDate:
+        where["latestReviewDate"] = {}
+        if startDate:
+            where["latestReviewDate"]["gte"] = startDate
+        if endDate:
+            where["latestReviewDate"]["lt"] = endDate
+    summaries = await prisma.models.PerformanceSummary.prisma().find_many(
+        where=where, order={"userId": "asc"}
+    )
+    groups = await prisma.models.PerformanceSummary.prisma().group_by(
+        by=["role"],
+        where=where,
+        sum={"reviewCount": True},
+        avg={"latestScore": True, "rollingAverage": True, "trend": True},
+        count=True,
+        order={"role": "asc"},
+    )
+    return PerformanceReportsResponse(
+        users=[
+            UserPerformance(
+                userId=summary.userId,
+                role=summary.role,
+                reviewCount=summary.reviewCount,
+                averageScore=summary.averageScore,
+                latestScore=summary.latestScore,
+                latestReviewDate=summary.latestReviewDate,
+                rollingAverage=summary.rollingAverage,
+                trend=summary.trend,
+            )
+            for summary in summaries
+        ],
+        roles=[
+            RolePerformance(
+                role=group["role"],
+                staffCount=group["_count"]["_all"],
+                reviewCount=group["_sum"]["reviewCount"],
+                averageLatestScore=group["_avg"]["latestScore"],
+                averageRollingScore=group["_avg"]["rollingAverage"],
+                averageTrend=group["_avg"]["trend"],
+            )
+            for group in groups
+        ],
+    )
@@ -0,0 +1,323 @@
+"""
+In-process spatial index over field polygons.
+
+Fields are projected once to local metres (equirectangular around a reference latitude, which
+is accurate to well under a metre across a farm) and registered in every cell of a uniform
+grid their bounding box touches. A point query looks at one cell and ray-casts the few
+polygons registered there; a bounding-box query visits the cells the box covers within the
+indexed extent, or, when that is more cells than there are fields, tests every field's
+bounding box at once with NumPy, so even a whole-world map tile costs at most one vectorised
+pass over the fields; a nearest query walks rings of cells outwards from the point and stops
+as soon as no unvisited cell can hold anything closer. The index is built from the database
+at startup and kept current by the services that create, change or delete layouts.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import prisma
+import prisma.models
+
+CELL_METERS = 200.0
+METERS_PER_DEGREE_LATITUDE = 110_574.0
+METERS_PER_DEGREE_LONGITUDE = 111_320.0
+
+Point = Tuple[float, float]
+
+
+def polygon_area_hectares(polygon: Sequence[Point]) -> float:
+    """
+    Area of a [(latitude, longitude), ...] polygon in hectares.
+    """
+    scale = math.cos(math.radians(sum(lat for lat, _ in polygon) / len(polygon)))
+    points = [
+        (lon * METERS_PER_DEGREE_LONGITUDE * scale, lat * METERS_PER_DEGREE_LATITUDE)
+        for lat, lon in polygon
+    ]
+    twice_area = sum(
+        x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1])
+    )
+    return abs(twice_area) / 2 / 10_000
+
+
+def polygon_bounds(polygon: Sequence[Point]) -> Dict[str, float]:
+    """
+    The bounding-box columns stored with a field.
+    """
+    return {
+        "minLatitude": min(lat for lat, _ in polygon),
+        "minLongitude": min(lon for _, lon in polygon),
+        "maxLatitude": max(lat for lat, _ in polygon),
+        "maxLongitude": max(lon for _, lon in polygon),
+    }
+
+
+def field_columns(polygon: Sequence[Point]) -> Dict[str, Any]:
+    """
+    The stored columns of a field with the given [(latitude, longitude), ...] outline.
+
+    Raises:
+        ValueError: If the outline has fewer than three points.
+    """
+    if len(polygon) < 3:
+        raise ValueError("A field outline needs at least three points.")
+    return {
+        "polygon": prisma.Json([[lat, lon] for lat, lon in polygon]),
+        "areaHectares": round(polygon_area_hectares(polygon), 4),
+        **polygon_bounds(polygon),
+    }
+
+
+def _segment_distance(point: Point, start: Point, end: Point) -> float:
+    (px, py), (ax, ay), (bx, by) = point, start, end
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    t = (
+        0.0
+        if length == 0
+        else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length))
+    )
+    return math.hypot(px - ax - t * dx, py - ay - t * dy)
+
+
+class FieldShape:
+    """
+    A field's polygon in projected metres with its bounding box.
+    """
+
+    def __init__(
+        self, field_id: int, layout_id: int, name: str, points: List[Point]
+    ) -> None:
+        self.field_id = field_id
+        self.layout_id = layout_id
+        self.name = name
+        self.points = points
+        # Set by the index; changes whenever the field's outline is replaced.
+        self.revision = 0
+        self.min_x = min(x for x, _ in points)
+        self.min_y = min(y for _, y in points)
+        self.max_x = max(x for x, _ in points)
+        self.max_y = max(y for _, y in points)
+
+    def contains(self, x: float, y: float) -> bool:
+        if not (self.min_x <= x <= self.max_x and self.min_y <= y <= self.max_y):
+            return False
+        inside = False
+        for (x1, y1), (x2, y2) in zip(self.points, self.points[-1:] + self.points[:-1]):
+            if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                inside = not inside
+        return inside
+
+    def distance(self, x: float, y: float) -> float:
+        if self.contains(x, y):
+            return 0.0
+        return min(
+            _segment_distance((x, y), start, end)
+            for start, end in zip(self.points, self.points[1:] + self.points[:1])
+        )
+
+
+class FieldIndex:
+    """
+    Uniform grid of field shapes keyed by cell.
+    """
+
+    def __init__(self) -> None:
+        self.shapes: Dict[int, FieldShape] = {}
+        self.cells: Dict[Tuple[int, int], Set[int]] = {}
+        self.reference_latitude: Optional[float] = None
+        self.extent: Optional[Tuple[int, int, int, int]] = None
+        self.revision = 0
+        self.loaded = False
+        # Field ids and (min_x, min_y, max_x, max_y) rows, rebuilt after any change.
+        self._boxes: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def _project(self, latitude: float, longitude: float) -> Point:
+        if self.reference_latitude is None:
+            self.reference_latitude = latitude
+        scale = math.cos(math.radians(self.reference_latitude))
+        return (
+            longitude * METERS_PER_DEGREE_LONGITUDE * scale,
+            latitude * METERS_PER_DEGREE_LATITUDE,
+        )
+
+    @staticmethod
+    def _cell(x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / CELL_METERS), math.floor(y / CELL_METERS)
+
+    def _cells_between(self, min_x: float, min_y: float, max_x: float, max_y: float):
+        low_i, low_j = self._cell(min_x, min_y)
+        high_i, high_j = self._cell(max_x, max_y)
+        for i in range(low_i, high_i + 1):
+            for j in range(low_j, high_j + 1):
+                yield i, j
+
+    def add(
+        self, field_id: int, layout_id: int, name: str, polygon: Sequence[Point]
+    ) -> None:
+        self.remove(field_id)
+        shape = FieldShape(
+            field_id,
+            layout_id,
+            name,
+            [self._project(lat, lon) for lat, lon in polygon],
+        )
+        self.revision += 1
+        shape.revision = self.revision
+        self.shapes[field_id] = shape
+        self._boxes = None
+        for cell in self._cells_between(
+            shape.min_x, shape.min_y, shape.max_x, shape.max_y
+        ):
+            self.cells.setdefault(cell, set()).add(field_id)
+        low_i, low_j = self._cell(shape.min_x, shape.min_y)
+        high_i, high_j = self._cell(shape.max_x, shape.max_y)
+        if self.extent is not None:
+            low_i, low_j = min(low_i, self.extent[0]), min(low_j, self.extent[1])
+            high_i, high_j = max(high_i, self.extent[2]), max(high_j, self.extent[3])
+        # Removals never shrink the extent; a stale extent only widens nearest searches.
+        self.extent = (low_i, low_j, high_i, high_j)
+
+    def remove(self, field_id: int) -> None:
+        shape = self.shapes.pop(field_id, None)
+        if shape is None:
+            return
+        self._boxes = None
+        for cell in self._cells_between(
+            shape.min_x, shape.min_y, shape.max_x, shape.max_y
+        ):
+            members = self.cells.get(cell)
+            if members is not None:
+                members.discard(field_id)
+                if not members:
+                    del self.cells[cell]
+
+    def _all_boxes(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._boxes is None:
+            ids = np.array(sorted(self.shapes), dtype=np.int64)
+            boxes = np.array(
+                [
+                    (shape.min_x, shape.min_y, shape.max_x, shape.max_y)
+                    for shape in (self.shapes[field_id] for field_id in ids.tolist())
+                ],
+                dtype=np.float64,
+            ).reshape(-1, 4)
+            self._boxes = (ids, boxes)
+        return self._boxes
+
+    def containing(self, latitude: float, longitude: float) -> List[int]:
+        """
+        Ids of the fields whose polygon contains the point.
+        """
+        if not self.shapes:
+            return []
+        x, y = self._project(latitude, longitude)
+        return sorted(
+            field_id
+            for field_id in self.cells.get(self._cell(x, y), ())
+            if self.shapes[field_id].contains(x, y)
+        )
+
+    def in_box(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+    ) -> List[int]:
+        """
+        Ids of the fields whose bounding box intersects the given box.
+        """
+        if not self.shapes:
+            return []
+        min_x, min_y = self._project(min_latitude, min_longitude)
+        max_x, max_y = self._project(max_latitude, max_longitude)
+        low_i, low_j = self._cell(min_x, min_y)
+        high_i, high_j = self._cell(max_x, max_y)
+        low_i, low_j = max(low_i, self.extent[0]), max(low_j, self.extent[1])
+        high_i, high_j = min(high_i, self.extent[2]), min(high_j, self.extent[3])
+        if low_i > high_i or low_j > high_j:
+            return []
+        if (high_i - low_i + 1) * (high_j - low_j + 1) > len(self.shapes):
+            ids, boxes = self._all_boxes()
+            hit = (
+                (boxes[:, 0] <= max_x)
+                & (boxes[:, 2] >= min_x)
+                & (boxes[:, 1] <= max_y)
+                & (boxes[:, 3] >= min_y)
+            )
+            return ids[hit].tolist()
+        found: Set[int] = set()
+        for cell in (
+            (i, j) for i in range(low_i, high_i + 1) for j in range(low_j, high_j + 1)
+        ):
+            for field_id in self.cells.get(cell, ()):
+                shape = self.shapes[field_id]
+                if (
+                    shape.min_x <= max_x
+                    and shape.max_x >= min_x
+                    and shape.min_y <= max_y
+                    and shape.max_y >= min_y
+                ):
+                    found.add(field_id)
+        return sorted(found)
+
+    def nearest(self, latitude: float, longitude: float) -> Optional[Tuple[int, float]]:
+        """
+        The field closest to the point and its distance in metres, 0 when the point is inside.
+        """
+        if not self.cells:
+            return None
+        x, y = self._project(latitude, longitude)
+        ci, cj = self._cell(x, y)
+        low_i, low_j, high_i, high_j = self.extent
+        ring = max(0, low_i - ci, ci - high_i, low_j - cj, cj - high_j)
+        last_ring = max(
+            abs(ci - low_i), abs(ci - high_i), abs(cj - low_j), abs(cj - high_j)
+        )
+        best: Optional[Tuple[int, float]] = None
+        seen: Set[int] = set()
+        while ring <= last_ring:
+            if best is not None and best[1] <= (ring - 1) * CELL_METERS:
+                break
+            if ring == 0:
+                cells = [(ci, cj)]
+            else:
+                cells = [(ci + d, cj - ring) for d in range(-ring, ring + 1)]
+                cells += [(ci + d, cj + ring) for d in range(-ring, ring + 1)]
+                cells += [(ci - ring, cj + d) for d in range(-ring + 1, ring)]
+                cells += [(ci + ring, cj + d) for d in range(-ring + 1, ring)]
+            for cell in cells:
+                for field_id in self.cells.get(cell, ()):
+                    if field_id in seen:
+                        continue
+                    seen.add(field_id)
+                    distance = self.shapes[field_id].distance(x, y)
+                    if best is None or (distance, field_id) < (best[1], best[0]):
+                        best = (field_id, distance)
+            ring += 1
+        return best
+
+
+field_index = FieldIndex()
+
+
+def track_field(field: prisma.models.Field) -> None:
+    """
+    Adds or replaces a stored field in the index.
+    """
+    field_index.add(
+        field.id, field.layoutId, field.name, [(lat, lon) for lat, lon in field.polygon]
+    )
+
+
+async def load_field_index() -> FieldIndex:
+    """
+    Builds the index from the stored fields. Called once at startup.
+    """
+    if not field_index.loaded:
+        for field in await prisma.models.Field.prisma().find_many():
+            track_field(field)
+        field_index.loaded = True
+    return field_index
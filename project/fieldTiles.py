@@ -0,0 +1,193 @@
+"""
+Field condition heatmap tiles.
+
+Tiles follow the XYZ (web mercator) scheme used by web maps. A tile is rendered by colouring
+the pixels of every field whose outline overlaps it after the field's latest probe reading;
+the rasterisation is a vectorised point-in-polygon test over the tile's pixel centres and runs
+in the worker pool, so panning never blocks the event loop.
+
+Rendered tiles are cached in process under a content version: a digest of the outline
+revision and latest readings of exactly the fields the tile covers. A batch of readings
+therefore only changes the version of the tiles its fields touch; every other tile keeps
+being served from the cache, and clients can revalidate with the version as an ETag.
+"""
+
+import hashlib
+import math
+import struct
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import prisma.enums
+from project.fieldIndex import METERS_PER_DEGREE_LATITUDE, METERS_PER_DEGREE_LONGITUDE
+from project.getFieldCondition_service import MOISTURE_RANGE, TEMPERATURE_RANGE
+
+TILE_SIZE = 256
+MAX_ZOOM = 22
+MAX_CACHED_TILES = 4096
+LAYERS = ("moisture", "temperature", "health")
+
+Color = Tuple[int, int, int, int]
+Point = Tuple[float, float]
+
+NO_DATA_COLOR: Color = (150, 150, 150, 90)
+HEALTHY_COLOR: Color = (60, 170, 75, 170)
+AT_RISK_COLOR: Color = (215, 60, 50, 170)
+# (value at the low end, value at the high end, colour at the low end, colour at the high end)
+RAMPS = {
+    "moisture": (0.0, 60.0, (210, 180, 140), (30, 90, 200)),
+    "temperature": (0.0, 40.0, (50, 100, 220), (220, 60, 40)),
+}
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    (min latitude, min longitude, max latitude, max longitude) of an XYZ tile.
+
+    Raises:
+        ValueError: If the tile does not exist at that zoom level.
+    """
+    if not 0 <= z <= MAX_ZOOM or not (0 <= x < 2**z and 0 <= y < 2**z):
+        raise ValueError(f"Tile {z}/{x}/{y} does not exist.")
+    n = 2**z
+
+    def latitude(row: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return latitude(y + 1), x / n * 360 - 180, latitude(y), (x + 1) / n * 360 - 180
+
+
+def field_color(layer: str, readings: Dict[prisma.enums.SensorMetric, float]) -> Color:
+    """
+    Colour of a field on a layer given its latest reading per metric.
+    """
+    moisture = readings.get(prisma.enums.SensorMetric.SOIL_MOISTURE)
+    temperature = readings.get(prisma.enums.SensorMetric.SOIL_TEMPERATURE)
+    if layer == "health":
+        if moisture is None and temperature is None:
+            return NO_DATA_COLOR
+        healthy = all(
+            value is None or low <= value <= high
+            for value, (low, high) in (
+                (moisture, MOISTURE_RANGE),
+                (temperature, TEMPERATURE_RANGE),
+            )
+        )
+        return HEALTHY_COLOR if healthy else AT_RISK_COLOR
+    value = moisture if layer == "moisture" else temperature
+    if value is None:
+        return NO_DATA_COLOR
+    low, high, start, end = RAMPS[layer]
+    t = min(1.0, max(0.0, (value - low) / (high - low)))
+    return (*(round(a + (b - a) * t) for a, b in zip(start, end)), 170)
+
+
+def content_version(layer: str, signature: Sequence[tuple]) -> str:
+    """
+    Digest identifying what a tile shows; equal versions render to equal tiles.
+    """
+    return hashlib.sha1(repr((layer, sorted(signature))).encode()).hexdigest()[:20]
+
+
+def encode_png(image: np.ndarray) -> bytes:
+    """
+    Encodes a height x width x 4 uint8 RGBA array as a PNG.
+    """
+    height, width, _ = image.shape
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    # Every scanline is prefixed with filter type 0 (none).
+    raw = np.concatenate(
+        [np.zeros((height, 1), dtype=np.uint8), image.reshape(height, width * 4)],
+        axis=1,
+    )
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def render_tile(
+    z: int,
+    x: int,
+    y: int,
+    reference_latitude: float,
+    polygons: List[Tuple[List[Point], Color]],
+) -> bytes:
+    """
+    Renders the given projected field outlines and colours onto one tile as a PNG.
+
+    Outlines are in the index's projected metres around reference_latitude. Runs in the
+    worker pool.
+    """
+    n = 2**z
+    offsets = (np.arange(TILE_SIZE) + 0.5) / TILE_SIZE
+    longitudes = (x + offsets) / n * 360 - 180
+    latitudes = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / n))))
+    xs = (
+        longitudes
+        * METERS_PER_DEGREE_LONGITUDE
+        * math.cos(math.radians(reference_latitude))
+    )
+    ys = latitudes * METERS_PER_DEGREE_LATITUDE
+    image = np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+    for points, color in polygons:
+        px = np.array([p[0] for p in points])
+        py = np.array([p[1] for p in points])
+        columns = np.nonzero((xs >= px.min()) & (xs <= px.max()))[0]
+        rows = np.nonzero((ys >= py.min()) & (ys <= py.max()))[0]
+        if not len(columns) or not len(rows):
+            continue
+        grid_x, grid_y = np.meshgrid(
+            xs[columns[0] : columns[-1] + 1], ys[rows[0] : rows[-1] + 1]
+        )
+        inside = np.zeros(grid_x.shape, dtype=bool)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for x1, y1, x2, y2 in zip(px, py, np.roll(px, 1), np.roll(py, 1)):
+                crosses = (y1 > grid_y) != (y2 > grid_y)
+                inside ^= crosses & (
+                    grid_x < (x2 - x1) * (grid_y - y1) / (y2 - y1) + x1
+                )
+        window = image[rows[0] : rows[-1] + 1, columns[0] : columns[-1] + 1]
+        window[inside] = color
+    return encode_png(image)
+
+
+class TileCache:
+    """
+    Bounded least-recently-used map of (layer, z, x, y) to (content version, PNG).
+    """
+
+    def __init__(self, capacity: int = MAX_CACHED_TILES) -> None:
+        self.capacity = capacity
+        self.tiles: "OrderedDict[Tuple[str, int, int, int], Tuple[str, bytes]]" = (
+            OrderedDict()
+        )
+
+    def get(self, key: Tuple[str, int, int, int], version: str) -> Optional[bytes]:
+        cached = self.tiles.get(key)
+        if cached is None or cached[0] != version:
+            return None
+        self.tiles.move_to_end(key)
+        return cached[1]
+
+    def put(self, key: Tuple[str, int, int, int], version: str, png: bytes) -> None:
+        self.tiles[key] = (version, png)
+        self.tiles.move_to_end(key)
+        while len(self.tiles) > self.capacity:
+            self.tiles.popitem(last=False)
+
+
+tile_cache = TileCache()
+EMPTY_TILE = encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
@@ -0,0 +1,47 @@
+from typing import List
+
+from project.fieldIndex import field_index
+from project.locateField_service import FieldMatch
+from pydantic import BaseModel
+
+
+class FieldsInBoxResponse(BaseModel):
+    """
+    The fields whose extent intersects the requested bounding box.
+    """
+
+    fields: List[FieldMatch]
+
+
+async def findFieldsInBox(
+    minLatitude: float, minLongitude: float, maxLatitude: float, maxLongitude: float
+) -> FieldsInBoxResponse:
+    """
+    Lists the fields whose extent intersects a bounding box, such as the area shown on a map screen. The in-process spatial index visits only the grid cells the box covers within the farm's extent, or checks every field's extent at once when the box is larger than that, so even a box around the whole world stays cheap.
+
+    Args:
+        minLatitude (float): Southern edge of the box.
+        minLongitude (float): Western edge of the box.
+        maxLatitude (float): Northern edge of the box.
+        maxLongitude (float): Eastern edge of the box.
+
+    Returns:
+        FieldsInBoxResponse: The fields whose extent intersects the requested bounding box.
+
+    Raises:
+        ValueError: If the box is inverted.
+    """
+    if minLatitude > maxLatitude or minLongitude > maxLongitude:
+        raise ValueError("The minimum corner must lie south-west of the maximum.")
+    return FieldsInBoxResponse(
+        fields=[
+            FieldMatch(
+                fieldId=field_id,
+                layoutId=field_index.shapes[field_id].layout_id,
+                name=field_index.shapes[field_id].name,
+            )
+            for field_id in field_index.in_box(
+                minLatitude, minLongitude, maxLatitude, maxLongitude
+            )
+        ]
+    )
@@ -0,0 +1,72 @@
+from datetime import date, datetime, time, timedelta
+from typing import List
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.scheduleIntervals import find_overlaps
+from pydantic import BaseModel
+
+
+class ShiftConflict(BaseModel):
+    """
+    Two shifts of the same user that overlap, and the overlapping period.
+    """
+
+    userId: int
+    scheduleId: int
+    conflictingScheduleId: int
+    overlapStart: datetime
+    overlapEnd: datetime
+
+
+class ScheduleConflictsResponse(BaseModel):
+    """
+    All double-bookings among shifts that touch the requested week.
+    """
+
+    weekStart: date
+    conflicts: List[ShiftConflict]
+
+
+async def findScheduleConflicts(weekStart: date) -> ScheduleConflictsResponse:
+    """
+    Finds every pair of overlapping shifts held by the same user during the week starting at weekStart. The week's shifts are read in one query and swept in start order, so the cost is O(n log n) in the shifts of that week.
+
+    Args:
+        weekStart (date): First day of the week to check.
+
+    Returns:
+        ScheduleConflictsResponse: All double-bookings among shifts that touch the requested week.
+
+    Example:
+        report = await findScheduleConflicts(date(2023, 12, 11))
+        for conflict in report.conflicts:
+            print(conflict.userId, conflict.scheduleId, conflict.conflictingScheduleId)
+    """
+    start = datetime.combine(weekStart, time.min)
+    end = start + timedelta(days=7)
+    schedules = await prisma.models.Schedule.prisma().find_many(
+        where={
+            "userId": {"not": None},
+            "status": {"not": prisma.enums.ScheduleStatus.CANCELLED},
+            "endsOn": {"gt": start},
+            "scheduledOn": {"lt": end},
+        }
+    )
+    by_id = {schedule.id: schedule for schedule in schedules}
+    pairs = find_overlaps(
+        (schedule.id, schedule.userId, schedule.scheduledOn, schedule.endsOn)
+        for schedule in schedules
+    )
+    conflicts = [
+        ShiftConflict(
+            userId=user_id,
+            scheduleId=first_id,
+            conflictingScheduleId=second_id,
+            overlapStart=max(by_id[first_id].scheduledOn, by_id[second_id].scheduledOn),
+            overlapEnd=min(by_id[first_id].endsOn, by_id[second_id].endsOn),
+        )
+        for user_id, first_id, second_id in pairs
+    ]
+    return ScheduleConflictsResponse(weekStart=weekStart, conflicts=conflicts)
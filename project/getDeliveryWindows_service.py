@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+from typing import List
+
+import prisma
+import prisma.models
+from project.deliveryCapacity import day_key, ensure_days
+from pydantic import BaseModel
+
+MAX_HORIZON_DAYS = 120
+
+
+class DeliveryWindow(BaseModel):
+    """
+    A day on which at least one more delivery can be admitted, with the truck and driver slots still free.
+    """
+
+    day: date
+    trucksRemaining: int
+    driversRemaining: int
+
+
+class DeliveryWindowsResponse(BaseModel):
+    """
+    The next feasible delivery windows in date order.
+    """
+
+    windows: List[DeliveryWindow]
+
+
+async def getDeliveryWindows(fromDate: date, count: int) -> DeliveryWindowsResponse:
+    """
+    Returns the next feasible delivery windows on or after fromDate. Answers come from the per-day capacity ledger, read in chunks of days, so the cost depends on how far ahead the free days are rather than on how many schedules exist.
+
+    Args:
+        fromDate (date): The first day to consider.
+        count (int): How many feasible windows to return.
+
+    Returns:
+        DeliveryWindowsResponse: The next feasible delivery windows in date order.
+
+    Example:
+        windows = await getDeliveryWindows(date(2023, 12, 1), 5)
+        print([window.day for window in windows.windows])
+    """
+    windows: List[DeliveryWindow] = []
+    offset = 0
+    chunk = max(count, 7)
+    while len(windows) < count and offset < MAX_HORIZON_DAYS:
+        days = [
+            day_key(fromDate + timedelta(days=offset + i))
+            for i in range(min(chunk, MAX_HORIZON_DAYS - offset))
+        ]
+        await ensure_days(days)
+        rows = await prisma.models.DeliveryCapacity.prisma().find_many(
+            where={
+                "day": {"gte": days[0], "lte": days[-1]},
+                "trucksRemaining": {"gt": 0},
+                "driversRemaining": {"gt": 0},
+            },
+            order={"day": "asc"},
+        )
+        windows.extend(
+            DeliveryWindow(
+                day=row.day.date(),
+                trucksRemaining=row.trucksRemaining,
+                driversRemaining=row.driversRemaining,
+            )
+            for row in rows
+        )
+        offset += len(days)
+    return DeliveryWindowsResponse(windows=windows[:count])
@@ -1,5 +1,8 @@
 from typing import List
 
+import prisma
+import prisma.models
+from project.fieldIndex import polygon_area_hectares
 from pydantic import BaseModel
 
 
@@ -11,14 +14,27 @@ class GetFarmLayoutsRequest(BaseModel):
     pass
 
 
+class FieldLayout(BaseModel):
+    """
+    A field of a farm layout with its size in hectares and its outline as "latitude,longitude" pairs separated by semicolons.
+    """
+
+    id: int
+    name: str
+    size: float
+    coordinates: str
+
+
 class FarmLayout(BaseModel):
     """
     Represents a single farm layout with field names, sizes, and coordinates.
     """
 
+    id: int
     name: str
     size: float
     coordinates: str
+    fields: List[FieldLayout] = []
 
 
 class GetFarmLayoutsResponse(BaseModel):
@@ -29,9 +45,13 @@ class GetFarmLayoutsResponse(BaseModel):
     farm_layouts: List[FarmLayout]
 
 
+def _outline(points: List[List[float]]) -> str:
+    return ";".join(f"{lat},{lon}" for lat, lon in points)
+
+
 async def getFarmLayout(request: GetFarmLayoutsRequest) -> GetFarmLayoutsResponse:
     """
-    Retrieves all farm layouts. This would typically return a list of all farm maps, including field names, sizes, and mapped coordinates. The function queries the database for stored maps and formats them for client use. Useful for planning and operational purposes by Field Managers.
+    Retrieves all farm layouts. This returns a list of all farm maps, including field names, sizes in hectares, and mapped coordinates. The function queries the database for stored maps and formats them for client use. Useful for planning and operational purposes by Field Managers.
 
     Args:
         request (GetFarmLayoutsRequest): Request model for fetching all farm layouts. This endpoint does not require any specific parameters as it fetches all farm layouts available in the database.
@@ -39,9 +59,30 @@ async def getFarmLayout(request: GetFarmLayoutsRequest) -> GetFarmLayoutsRespons
     Returns:
         GetFarmLayoutsResponse: Response model for fetching farm layouts. It contains a list of all farm layouts with essential details such as field names, sizes, and mapped coordinates.
     """
+    layouts = await prisma.models.FarmLayout.prisma().find_many(
+        include={"fields": {"order_by": {"id": "asc"}}}, order={"id": "asc"}
+    )
     farm_layouts = [
-        FarmLayout(name="Field 1", size=50.5, coordinates="100,200;101,201"),
-        FarmLayout(name="Field 2", size=70.3, coordinates="110,220;111,221"),
+        FarmLayout(
+            id=layout.id,
+            name=layout.name,
+            size=(
+                round(polygon_area_hectares(layout.boundary), 4)
+                if len(layout.boundary) >= 3
+                else 0.0
+            ),
+            coordinates=_outline(layout.boundary),
+            fields=[
+                FieldLayout(
+                    id=field.id,
+                    name=field.name,
+                    size=field.areaHectares,
+                    coordinates=_outline(field.polygon),
+                )
+                for field in layout.fields or []
+            ],
+        )
+        for layout in layouts
     ]
     response = GetFarmLayoutsResponse(farm_layouts=farm_layouts)
     return response
@@ -0,0 +1,97 @@
+from typing import Dict
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.fieldIndex import field_index
+from project.fieldTiles import (
+    EMPTY_TILE,
+    LAYERS,
+    content_version,
+    field_color,
+    render_tile,
+    tile_bounds,
+    tile_cache,
+)
+from project.workerPool import run_in_process
+from pydantic import BaseModel
+
+
+class FieldConditionTile(BaseModel):
+    """
+    A rendered PNG map tile and the content version it was rendered from.
+    """
+
+    version: str
+    content: bytes
+
+
+async def getFieldConditionTile(
+    layer: str, z: int, x: int, y: int
+) -> FieldConditionTile:
+    """
+    Returns one XYZ map tile of the field condition heatmap. The fields on the tile come from the in-process spatial index and their latest readings from the per-field latest values; a tile is only re-rendered, in the worker pool, when the outline or latest reading of one of its own fields changed since it was cached.
+
+    Args:
+        layer (str): What to colour the fields by: moisture, temperature or health.
+        z (int): Zoom level of the tile.
+        x (int): Column of the tile.
+        y (int): Row of the tile.
+
+    Returns:
+        FieldConditionTile: A rendered PNG map tile and the content version it was rendered from.
+
+    Raises:
+        ValueError: If the layer is unknown or the tile does not exist.
+
+    Example:
+        tile = await getFieldConditionTile("moisture", 15, 5241, 11718)
+        open("tile.png", "wb").write(tile.content)
+    """
+    if layer not in LAYERS:
+        raise ValueError(f"layer must be one of {', '.join(LAYERS)}.")
+    field_ids = field_index.in_box(*tile_bounds(z, x, y))
+    if not field_ids:
+        return FieldConditionTile(
+            version=content_version(layer, []), content=EMPTY_TILE
+        )
+    shapes = {field_id: field_index.shapes[field_id] for field_id in field_ids}
+    reference_latitude = field_index.reference_latitude
+    latest = await prisma.models.FieldSensorLatest.prisma().find_many(
+        where={"fieldId": {"in": field_ids}}
+    )
+    readings: Dict[int, Dict[prisma.enums.SensorMetric, float]] = {
+        field_id: {} for field_id in field_ids
+    }
+    for reading in latest:
+        readings[reading.fieldId][reading.metric] = reading.value
+    signature = [
+        (
+            field_id,
+            shapes[field_id].revision,
+            sorted(
+                (str(metric), value) for metric, value in readings[field_id].items()
+            ),
+        )
+        for field_id in field_ids
+    ]
+    version = content_version(layer, signature)
+    key = (layer, z, x, y)
+    content = tile_cache.get(key, version)
+    if content is None:
+        content = await run_in_process(
+            render_tile,
+            z,
+            x,
+            y,
+            reference_latitude,
+            [
+                (
+                    shapes[field_id].points,
+                    field_color(layer, readings[field_id]),
+                )
+                for field_id in field_ids
+            ],
+        )
+        tile_cache.put(key, version, content)
+    return FieldConditionTile(version=version, content=content)
@@ -1,7 +1,43 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
 import prisma
+import prisma.enums
 import prisma.models
+from project.sensorSeries import field_series
 from pydantic import BaseModel
 
+# Volumetric water content in percent and soil temperature in degrees Celsius.
+MOISTURE_RANGE = (20.0, 40.0)
+TEMPERATURE_RANGE = (5.0, 30.0)
+
+
+class TrendPoint(BaseModel):
+    """
+    Statistics of the readings within one hourly or daily bucket.
+    """
+
+    bucketStart: datetime
+    average: float
+    minimum: float
+    maximum: float
+    count: int
+
+
+class MetricCondition(BaseModel):
+    """
+    Latest reading of one metric of a field with its hourly and daily trend.
+    """
+
+    metric: prisma.enums.SensorMetric
+    latestValue: float
+    recordedAt: datetime
+    average24h: Optional[float]
+    average7d: Optional[float]
+    trend: Optional[float]
+    hourly: List[TrendPoint]
+    daily: List[TrendPoint]
+
 
 class FieldConditionResponse(BaseModel):
     """
@@ -11,13 +47,33 @@ class FieldConditionResponse(BaseModel):
     soilQuality: str
     moistureLevel: str
     cropHealth: str
+    moisture: Optional[MetricCondition] = None
+    temperature: Optional[MetricCondition] = None
+
+
+def _average(points: List[TrendPoint]) -> Optional[float]:
+    count = sum(point.count for point in points)
+    if not count:
+        return None
+    return round(sum(point.average * point.count for point in points) / count, 2)
+
+
+def _level(
+    condition: Optional[MetricCondition], bounds: Tuple[float, float]
+) -> Optional[str]:
+    if condition is None:
+        return None
+    value = condition.latestValue
+    return "Low" if value < bounds[0] else "High" if value > bounds[1] else "Optimal"
 
 
 async def getFieldCondition(fieldId: int) -> FieldConditionResponse:
     """
     Fetches the current condition of a specified field, including soil quality, moisture levels, and crop health.
     Useful for Field Managers and Health Specialists to monitor and manage field conditions
-    effectively and plan interventions.
+    effectively and plan interventions. The condition is derived from the field probes: the latest
+    soil moisture and temperature come from the per-field latest readings and the trends from the
+    hourly and daily rollups, so the cost does not grow with the amount of stored readings.
 
     Args:
         fieldId (int): The unique identifier for the field whose condition is being requested.
@@ -25,23 +81,65 @@ async def getFieldCondition(fieldId: int) -> FieldConditionResponse:
     Returns:
         FieldConditionResponse: Provides detailed information about the soil quality, moisture levels,
         and crop health of a specific field. This helps in effective field management and planning interventions.
+
+    Raises:
+        ValueError: If the field does not exist.
     """
-    soil_item = await prisma.models.Item.prisma().find_unique(where={"id": fieldId})
-    moisture_item = await prisma.models.Item.prisma().find_unique(
-        where={"id": fieldId + 1}
-    )
-    crop_health_item = await prisma.models.Item.prisma().find_unique(
-        where={"id": fieldId + 2}
-    )
-    soil_quality = "Good" if soil_item and soil_item.stockLevel > 50 else "Poor"
-    moisture_level = (
-        "Optimal" if moisture_item and moisture_item.stockLevel > 40 else "Low"
-    )
-    crop_health = (
-        "Healthy"
-        if crop_health_item and crop_health_item.stockLevel > 30
-        else "At Risk"
-    )
+    field = await prisma.models.Field.prisma().find_unique(where={"id": fieldId})
+    if field is None:
+        raise ValueError(f"Field {fieldId} not found.")
+    latest, rollups = await field_series(fieldId)
+    conditions = {}
+    for reading in latest:
+        points = {
+            resolution: [
+                TrendPoint(
+                    bucketStart=rollup.bucketStart,
+                    average=round(rollup.sum / rollup.count, 2),
+                    minimum=rollup.min,
+                    maximum=rollup.max,
+                    count=rollup.count,
+                )
+                for rollup in rollups
+                if rollup.metric == reading.metric and rollup.resolution == resolution
+            ]
+            for resolution in prisma.enums.RollupResolution
+        }
+        hourly = points[prisma.enums.RollupResolution.HOUR]
+        daily = points[prisma.enums.RollupResolution.DAY]
+        average24h, average7d = _average(hourly), _average(daily)
+        conditions[reading.metric] = MetricCondition(
+            metric=reading.metric,
+            latestValue=reading.value,
+            recordedAt=reading.recordedAt,
+            average24h=average24h,
+            average7d=average7d,
+            trend=(
+                round(average24h - average7d, 2)
+                if average24h is not None and average7d is not None
+                else None
+            ),
+            hourly=hourly,
+            daily=daily,
+        )
+    moisture = conditions.get(prisma.enums.SensorMetric.SOIL_MOISTURE)
+    temperature = conditions.get(prisma.enums.SensorMetric.SOIL_TEMPERATURE)
+    moisture_level = _level(moisture, MOISTURE_RANGE)
+    temperature_level = _level(temperature, TEMPERATURE_RANGE)
+    if moisture_level is None and temperature_level is None:
+        crop_health = "Unknown"
+    elif moisture_level in (None, "Optimal") and temperature_level in (None, "Optimal"):
+        crop_health = "Healthy"
+    else:
+        crop_health = "At Risk"
     return FieldConditionResponse(
-        soilQuality=soil_quality, moistureLevel=moisture_level, cropHealth=crop_health
+        soilQuality=(
+            "Unknown"
+            if temperature_level is None
+            else "Good" if temperature_level == "Optimal" else "Poor"
+        ),
+        moistureLevel=moisture_level or "Unknown",
+        cropHealth=crop_health,
+        moisture=moisture,
+        temperature=temperature,
     )
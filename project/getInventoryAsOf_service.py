@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import List, Optional
+
+from project.inventoryCheckpoints import stock_as_of
+from pydantic import BaseModel
+
+
+class ItemStockAsOf(BaseModel):
+    """
+    An item's stock at the requested instant and the checkpoint it was replayed from.
+    """
+
+    itemId: int
+    name: str
+    stockLevel: int
+    checkpointAt: Optional[datetime] = None
+
+
+class InventoryAsOfResponse(BaseModel):
+    """
+    The stock of the requested items at the requested instant, in item id order.
+    """
+
+    asOf: datetime
+    items: List[ItemStockAsOf]
+
+
+async def getInventoryAsOf(
+    asOf: datetime, itemIds: Optional[List[int]] = None
+) -> InventoryAsOfResponse:
+    """
+    Answers what stock was held at a past instant, for audits. Each item's stock is its latest daily checkpoint at or before the instant plus the inventory events recorded between the two, so any date resolves with a bounded amount of work however long the history is.
+
+    Args:
+        asOf (datetime): The instant to report stock for; events dated at it are included.
+        itemIds (Optional[List[int]]): Only report these items; all items by default.
+
+    Returns:
+        InventoryAsOfResponse: The stock of the requested items at the requested instant, in item id order.
+
+    Example:
+        response = await getInventoryAsOf(datetime(2023, 12, 31, 23, 59, 59), [1, 2])
+        print(response.items[0].stockLevel)
+    """
+    rows = await stock_as_of(asOf, itemIds)
+    return InventoryAsOfResponse(
+        asOf=asOf,
+        items=[
+            ItemStockAsOf(
+                itemId=row["id"],
+                name=row["name"],
+                stockLevel=row["stockLevel"],
+                checkpointAt=row["checkpointAt"],
+            )
+            for row in rows
+        ],
+    )
@@ -1,12 +1,18 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
-from typing import List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import prisma
 import prisma.enums
 import prisma.models
+from project.timestamps import to_utc
 from pydantic import BaseModel
 
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+# Cursors hold an event's date as microseconds since EPOCH, so they need no URL escaping.
+EPOCH = datetime(1970, 1, 1)
+
 
 class Category(Enum):
     """
@@ -28,7 +34,7 @@ class InventoryEventDetail(BaseModel):
 
 class InventoryItemDetailsResponse(BaseModel):
     """
-    Provides a detailed view of an inventory item, including current stock levels, sourcing details, and a history of inventory events.
+    Provides a detailed view of an inventory item, including current stock levels, sourcing details, and its most recent inventory events. Pass nextCursor back as cursor to fetch older events.
     """
 
     id: int
@@ -38,49 +44,118 @@ class InventoryItemDetailsResponse(BaseModel):
     minStockLevel: int
     reOrderNeed: bool
     inventoryEvents: List[InventoryEventDetail]
+    nextCursor: Optional[str] = None
+
+
+def _encode_cursor(event: prisma.models.InventoryEvent) -> str:
+    micros = (to_utc(event.date) - EPOCH) // timedelta(microseconds=1)
+    return f"{micros}_{event.id}"
+
 
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    micros, _, event_id = cursor.partition("_")
+    try:
+        return EPOCH + timedelta(microseconds=int(micros)), int(event_id)
+    except (ValueError, OverflowError):
+        raise ValueError(f"Invalid cursor {cursor!r}.")
 
-async def getInventoryItem(itemId: int) -> InventoryItemDetailsResponse:
+
+async def _events_page(
+    item_id: int, before: Optional[Tuple[datetime, int]], take: int
+) -> List[prisma.models.InventoryEvent]:
+    """
+    Up to take events of the item older than before, newest first, read from the (itemId, date, id) index.
+    """
+    where: Dict[str, Any] = {"itemId": item_id}
+    if before is not None:
+        date, event_id = before
+        where["OR"] = [
+            {"date": {"lt": date}},
+            {"date": date, "id": {"lt": event_id}},
+        ]
+    return await prisma.models.InventoryEvent.prisma().find_many(
+        where=where, order=[{"date": "desc"}, {"id": "desc"}], take=take
+    )
+
+
+def _event_detail(event: prisma.models.InventoryEvent) -> InventoryEventDetail:
+    return InventoryEventDetail(
+        eventType=event.eventType,
+        quantityChange=event.quantityChange,
+        date=event.date,
+    )
+
+
+async def getInventoryItem(
+    itemId: int, cursor: Optional[str] = None, limit: int = 100
+) -> InventoryItemDetailsResponse:
     """
     Retrieves detailed information for a specific inventory item by ID, including stock levels, sourcing information,
-    and item history. Useful for audits and detailed reports.
+    and item history. Useful for audits and detailed reports. The history is paged most recent first with a keyset
+    cursor over the (itemId, date, id) index, so a page costs the same however many events the item has; use
+    streamInventoryEvents for the full history.
 
     Args:
         itemId (int): The unique identifier for the inventory item whose details are being requested.
+        cursor (Optional[str]): The nextCursor of the previous page, if any.
+        limit (int): Maximum number of events to return, at most MAX_PAGE_SIZE.
 
     Returns:
         InventoryItemDetailsResponse: Provides a detailed view of an inventory item, including current stock levels,
-        sourcing details, and a history of inventory events.
+        sourcing details, and its most recent inventory events.
+
+    Raises:
+        ValueError: If the item does not exist, the limit is out of range or the cursor is malformed.
 
     Example:
         # Assume you have an inventory item with ID 1
         details = await getInventoryItem(1)
-        print(details)
+        older = await getInventoryItem(1, details.nextCursor)
     """
-    item = await prisma.models.Item.prisma().find_unique(
-        where={"id": itemId}, include={"inventoryEvents": True}
-    )
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+    item = await prisma.models.Item.prisma().find_unique(where={"id": itemId})
     if item is None:
         raise ValueError(f"Inventory item with ID {itemId} not found.")
-    inventory_events_details = (
-        [
-            {
-                "eventType": event.eventType.value,
-                "quantityChange": event.quantityChange,
-                "date": event.date.isoformat(),
-            }
-            for event in item.inventoryEvents
-        ]
-        if item.inventoryEvents
-        else []
+    events = await _events_page(
+        itemId, _decode_cursor(cursor) if cursor else None, limit + 1
     )
-    item_details = InventoryItemDetailsResponse(
+    return InventoryItemDetailsResponse(
         id=item.id,
         name=item.name,
         category=item.category.value,
         stockLevel=item.stockLevel,
         minStockLevel=item.minStockLevel,
         reOrderNeed=item.reOrderNeed,
-        inventoryEvents=inventory_events_details,
+        inventoryEvents=[_event_detail(event) for event in events[:limit]],
+        nextCursor=_encode_cursor(events[limit - 1]) if len(events) > limit else None,
     )
-    return item_details
+
+
+async def _stream(item_id: int) -> AsyncIterator[str]:
+    before = None
+    while True:
+        events = await _events_page(item_id, before, STREAM_BATCH_SIZE)
+        for event in events:
+            yield _event_detail(event).model_dump_json() + "\n"
+        if len(events) < STREAM_BATCH_SIZE:
+            break
+        before = (events[-1].date, events[-1].id)
+
+
+async def streamInventoryEvents(itemId: int) -> AsyncIterator[str]:
+    """
+    Streams the full event history of an inventory item as newline-delimited JSON, most recent first. Events are read in keyset batches of STREAM_BATCH_SIZE, so memory stays flat however long the history is.
+
+    Args:
+        itemId (int): The unique identifier for the inventory item.
+
+    Returns:
+        AsyncIterator[str]: One JSON encoded InventoryEventDetail per line.
+
+    Raises:
+        ValueError: If the item does not exist.
+    """
+    if await prisma.models.Item.prisma().find_unique(where={"id": itemId}) is None:
+        raise ValueError(f"Inventory item with ID {itemId} not found.")
+    return _stream(itemId)
@@ -1,9 +1,10 @@
 from enum import Enum
-from typing import List
+from typing import List, Optional
 
 import prisma
 import prisma.enums
 import prisma.models
+from project.demandForecast import days_to_stockout, reorder_level
 from pydantic import BaseModel
 
 
@@ -34,6 +35,9 @@ class InventoryReportDetail(BaseModel):
     minStockLevel: int
     stockStatus: str
     pendingTransactions: int
+    reorderLevel: int
+    dailyDemand: float = 0.0
+    daysToStockout: Optional[float] = None
 
 
 class InventoryReportResponse(BaseModel):
@@ -48,7 +52,7 @@ async def getInventoryReport(
     request: InventoryReportRequest,
 ) -> InventoryReportResponse:
     """
-    Generates a detailed report on inventory status which helps in decision-making. It interacts with the Reporting Module for real-time data and displays items grouped by type, status, and impending stock-outs.
+    Generates a detailed report on inventory status which helps in decision-making. It interacts with the Reporting Module for real-time data and displays items grouped by type, status, and impending stock-outs. Stock status is judged against each item's forecast reorder level, read from the precomputed forecasts together with the days until stockout.
 
     Args:
         request (InventoryReportRequest): This model is used to fetch data required to generate a detailed inventory report. The request itself doesn't require any specific inputs as it retrieves data based on current inventory states and events.
@@ -56,21 +60,21 @@ async def getInventoryReport(
     Returns:
         InventoryReportResponse: This response model provides detailed inventory status categorized by item type, stock status, and alerts for any impending stock-outs.
     """
-    items = await prisma.models.Item.prisma().find_many(
-        include={"inventoryEvents": True}
-    )
+    items = await prisma.models.Item.prisma().find_many(include={"forecast": True})
+    pending = {
+        group["itemId"]: group["_sum"]["quantityChange"] or 0
+        for group in await prisma.models.InventoryEvent.prisma().group_by(
+            by=["itemId"],
+            where={"eventType": prisma.enums.InventoryEventType.RECEIVED},
+            sum={"quantityChange": True},
+        )
+    }
     report_details = []
     for item in items:
-        pending_transactions = sum(
-            (
-                event.quantityChange
-                for event in item.inventoryEvents or []
-                if event.eventType == prisma.enums.InventoryEventType.RECEIVED
-            )
-        )
-        if item.stockLevel >= item.minStockLevel:
+        level = reorder_level(item, item.forecast)
+        if item.stockLevel >= level:
             stock_status = "Sufficient"
-        elif item.stockLevel > 0 and item.stockLevel < item.minStockLevel:
+        elif item.stockLevel > 0 and item.stockLevel < level:
             stock_status = "Low"
         else:
             stock_status = "Critical"
@@ -81,7 +85,10 @@ async def getInventoryReport(
                 currentStock=item.stockLevel,
                 minStockLevel=item.minStockLevel,
                 stockStatus=stock_status,
-                pendingTransactions=pending_transactions,
+                pendingTransactions=pending.get(item.id, 0),
+                reorderLevel=level,
+                dailyDemand=item.forecast.dailyDemand if item.forecast else 0.0,
+                daysToStockout=days_to_stockout(item.stockLevel, item.forecast),
             )
         )
     return InventoryReportResponse(reports=report_details)
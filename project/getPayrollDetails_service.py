@@ -1,10 +1,13 @@
-from datetime import date, datetime
-from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional
 
 import prisma
+import prisma.enums
 import prisma.models
 from pydantic import BaseModel
 
+SUMMARY_PERIODS = ("day", "week", "month", "quarter", "year")
+
 
 class PayrollDetail(BaseModel):
     """
@@ -18,41 +21,155 @@ class PayrollDetail(BaseModel):
     net_amount: float
 
 
+class PayrollSummary(BaseModel):
+    """
+    Totals of one employee's payroll entries within one period.
+    """
+
+    employee_id: str
+    period_start: date
+    gross_amount: float
+    tax_deductions: float
+    net_amount: float
+    entry_count: int
+
+
+class RolePayrollSummary(BaseModel):
+    """
+    Totals of the payroll entries of all employees holding a role within one period.
+    """
+
+    role: prisma.enums.Role
+    period_start: date
+    gross_amount: float
+    tax_deductions: float
+    net_amount: float
+    entry_count: int
+    employee_count: int
+
+
 class GetPayrollRecordsResponse(BaseModel):
     """
-    Response model for a list of payroll records. Each record includes details like employee ID, payment amount, payment date, and deductions.
+    Response model for a list of payroll records. Each record includes details like employee ID, payment amount, payment date, and deductions. In aggregation mode the records are replaced by per-employee and, optionally, per-role totals per period.
     """
 
-    payrolls: List[PayrollDetail]
+    payrolls: List[PayrollDetail] = []
+    summaries: List[PayrollSummary] = []
+    role_summaries: List[RolePayrollSummary] = []
+
+
+def _period_start(value: Any) -> date:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.date() if isinstance(value, datetime) else value
+
+
+async def _summaries(
+    filters: str, params: List[Any], period: str, by_role: bool
+) -> GetPayrollRecordsResponse:
+    client = prisma.get_client()
+    rows = await client.query_raw(
+        f'SELECT p."userId", date_trunc(\'{period}\', p."paymentDate") AS "period",'
+        ' SUM(p."paymentAmount") AS "gross", SUM(p."taxDeductions") AS "tax",'
+        ' SUM(p."netAmount") AS "net", COUNT(*) AS "count"'
+        f' FROM "Payroll" p WHERE {filters}'
+        " GROUP BY 1, 2 ORDER BY 2, 1",
+        *params,
+    )
+    response = GetPayrollRecordsResponse(
+        summaries=[
+            PayrollSummary(
+                employee_id=str(row["userId"]),
+                period_start=_period_start(row["period"]),
+                gross_amount=round(float(row["gross"]), 2),
+                tax_deductions=round(float(row["tax"]), 2),
+                net_amount=round(float(row["net"]), 2),
+                entry_count=int(row["count"]),
+            )
+            for row in rows
+        ]
+    )
+    if by_role:
+        rows = await client.query_raw(
+            f'SELECT u."role", date_trunc(\'{period}\', p."paymentDate") AS "period",'
+            ' SUM(p."paymentAmount") AS "gross", SUM(p."taxDeductions") AS "tax",'
+            ' SUM(p."netAmount") AS "net", COUNT(*) AS "count",'
+            ' COUNT(DISTINCT p."userId") AS "employees"'
+            ' FROM "Payroll" p JOIN "User" u ON u."id" = p."userId"'
+            f" WHERE {filters} GROUP BY 1, 2 ORDER BY 2, 1",
+            *params,
+        )
+        response.role_summaries = [
+            RolePayrollSummary(
+                role=row["role"],
+                period_start=_period_start(row["period"]),
+                gross_amount=round(float(row["gross"]), 2),
+                tax_deductions=round(float(row["tax"]), 2),
+                net_amount=round(float(row["net"]), 2),
+                entry_count=int(row["count"]),
+                employee_count=int(row["employees"]),
+            )
+            for row in rows
+        ]
+    return response
 
 
 async def getPayrollDetails(
-    employee_id: Optional[str], start_date: Optional[date], end_date: Optional[date]
+    employee_id: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    aggregate: bool = False,
+    period: str = "month",
+    by_role: bool = False,
 ) -> GetPayrollRecordsResponse:
     """
-    Retrieves a list of payroll records. This endpoint uses data from the Staff Scheduling Module to ensure calculations consider current staff schedules. Each record includes details like employee id, payment amount, date, and deductions. The expected response is an array of payroll data, which integrates dynamically with QuickBooks for financial consistency.
+    Retrieves a list of payroll records. This endpoint uses data from the Staff Scheduling Module to ensure calculations consider current staff schedules. Each record includes details like employee id, payment amount, date, and deductions. The expected response is an array of payroll data, which integrates dynamically with QuickBooks for financial consistency. With aggregate set, the database instead groups the entries per employee and period on the (userId, paymentDate) index and returns only the totals.
 
     Args:
         employee_id (Optional[str]): Optional employee ID to filter the payroll records specifically for a given employee.
         start_date (Optional[date]): Optional start date to fetch payroll records from this date onwards.
         end_date (Optional[date]): Optional end date to fetch payroll records up to this date.
+        aggregate (bool): Return per-employee totals per period instead of the individual records.
+        period (str): Length of the aggregation periods: day, week, month, quarter or year.
+        by_role (bool): In aggregation mode, also return the totals rolled up by role.
 
     Returns:
-        GetPayrollRecordsResponse: Response model for a list of payroll records. Each record includes details like employee ID, payment amount, payment date, and deductions.
+        GetPayrollRecordsResponse: Response model for a list of payroll records. Each record includes details like employee ID, payment amount, payment date, and deductions. In aggregation mode the records are replaced by per-employee and, optionally, per-role totals per period.
+
+    Raises:
+        ValueError: If the aggregation period is not supported.
 
     Example:
         getPayrollDetails(employee_id="1234", start_date=date(2022, 1, 1), end_date=date(2022, 12, 31))
         > returns payroll details for employee "1234" between dates 2022-01-01 and 2022-12-31
+        getPayrollDetails(None, date(2022, 1, 1), date(2022, 12, 31), aggregate=True, by_role=True)
+        > returns monthly totals per employee and per role for 2022
     """
-    where_query = {
-        "AND": [
-            {"userId": employee_id} if employee_id else None,
-            {"paymentDate": {"gte": start_date}} if start_date else None,
-            {"paymentDate": {"lte": end_date}} if end_date else None,
-        ]
-    }
+    where: Dict[str, Any] = {}
+    if employee_id:
+        where["userId"] = int(employee_id)
+    if start_date or end_date:
+        where["paymentDate"] = {}
+        if start_date:
+            where["paymentDate"]["gte"] = datetime.combine(start_date, time.min)
+        if end_date:
+            where["paymentDate"]["lt"] = datetime.combine(
+                end_date + timedelta(days=1), time.min
+            )
+    if aggregate:
+        if period not in SUMMARY_PERIODS:
+            raise ValueError(f"period must be one of {', '.join(SUMMARY_PERIODS)}.")
+        conditions, params = ["TRUE"], []
+        if "userId" in where:
+            params.append(where["userId"])
+            conditions.append(f'p."userId" = ${len(params)}')
+        for operator, sql in (("gte", ">="), ("lt", "<")):
+            if operator in where.get("paymentDate", {}):
+                params.append(where["paymentDate"][operator])
+                conditions.append(f'p."paymentDate" {sql} ${len(params)}::timestamp')
+        return await _summaries(" AND ".join(conditions), params, period, by_role)
     payroll_records = await prisma.models.Payroll.prisma().find_many(
-        where=where_query, include={"user": True}
+        where=where, order=[{"paymentDate": "asc"}, {"id": "asc"}]
     )
     payroll_details = [
         PayrollDetail(
@@ -63,6 +180,5 @@ async def getPayrollDetails(
             net_amount=record.netAmount,
         )
         for record in payroll_records
-        if record.user
     ]
     return GetPayrollRecordsResponse(payrolls=payroll_details)
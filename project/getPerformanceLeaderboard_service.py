@@ -0,0 +1,62 @@
+from typing import List, Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.fetchPerformanceReports_service import UserPerformance
+from pydantic import BaseModel
+
+
+class PerformanceLeaderboardResponse(BaseModel):
+    """
+    The highest or lowest ranked staff by rolling review average, best or worst first.
+    """
+
+    bottom: bool
+    entries: List[UserPerformance]
+
+
+async def getPerformanceLeaderboard(
+    k: int, bottom: bool = False, role: Optional[prisma.enums.Role] = None
+) -> PerformanceLeaderboardResponse:
+    """
+    Returns the top or bottom k staff by rolling review average, optionally within one role. The query walks the (rollingAverage) or (role, rollingAverage) index of the precomputed summaries from the requested end and stops after k rows.
+
+    Args:
+        k (int): How many staff members to return.
+        bottom (bool): Return the lowest ranked staff instead of the highest.
+        role (Optional[prisma.enums.Role]): Rank only staff holding this role.
+
+    Returns:
+        PerformanceLeaderboardResponse: The highest or lowest ranked staff by rolling review average, best or worst first.
+
+    Raises:
+        ValueError: If k is less than 1.
+
+    Example:
+        leaders = await getPerformanceLeaderboard(10, role=prisma.enums.Role.FIELD_MANAGER)
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1.")
+    direction = "asc" if bottom else "desc"
+    summaries = await prisma.models.PerformanceSummary.prisma().find_many(
+        where={"role": role} if role else {},
+        order=[{"rollingAverage": direction}, {"userId": direction}],
+        take=k,
+    )
+    return PerformanceLeaderboardResponse(
+        bottom=bottom,
+        entries=[
+            UserPerformance(
+                userId=summary.userId,
+                role=summary.role,
+                reviewCount=summary.reviewCount,
+                averageScore=summary.averageScore,
+                latestScore=summary.latestScore,
+                latestReviewDate=summary.latestReviewDate,
+                rollingAverage=summary.rollingAverage,
+                trend=summary.trend,
+            )
+            for summary in summaries
+        ],
+    )
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 import prisma
 import prisma.models
@@ -8,10 +8,12 @@ from pydantic import BaseModel
 
 class GetPerformanceReviewsRequest(BaseModel):
     """
-    Request model for getting all performance reviews. No parameters needed for this unfiltered retrieval.
+    Request model for getting performance reviews, optionally for one user and a review date window.
     """
 
-    pass
+    userId: Optional[int] = None
+    startDate: Optional[datetime] = None
+    endDate: Optional[datetime] = None
 
 
 class PerformanceReview(BaseModel):
@@ -38,16 +40,25 @@ async def getPerformanceReviews(
     request: GetPerformanceReviewsRequest,
 ) -> GetPerformanceReviewsResponse:
     """
-    Retrieves all performance reviews from the database. Each review contains details such as employee ID, review date, performance scores, and attached notes. Useful for HR managers to oversee staff evaluations.
+    Retrieves performance reviews from the database, newest first, optionally for one user and a review date window. Filters are applied by the database on the (userId, reviewDate) index. Each review contains details such as employee ID, review date, performance scores, and attached notes. Useful for HR managers to oversee staff evaluations.
 
     Args:
-        request (GetPerformanceReviewsRequest): Request model for getting all performance reviews. No parameters needed for this unfiltered retrieval.
+        request (GetPerformanceReviewsRequest): Request model for getting performance reviews, optionally for one user and a review date window.
 
     Returns:
         GetPerformanceReviewsResponse: Contains the list of all performance reviews including detailed information for HR oversight purposes. Maps directly onto the PerformanceReview database model.
     """
+    where: Dict[str, Any] = {}
+    if request.userId is not None:
+        where["userId"] = request.userId
+    if request.startDate or request.endDate:
+        where["reviewDate"] = {}
+        if request.startDate:
+            where["reviewDate"]["gte"] = request.startDate
+        if request.endDate:
+            where["reviewDate"]["lt"] = request.endDate
     reviews = await prisma.models.PerformanceReview.prisma().find_many(
-        include={"user": True}
+        where=where, order=[{"reviewDate": "desc"}, {"id": "desc"}]
     )
     mapped_reviews = [
         PerformanceReview(
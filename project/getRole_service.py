@@ -40,6 +40,7 @@ async def getRole(roleId: str) -> RoleDetailsResponse:
         "HEALTH_SPECIALIST": "Monitors and manages the health of the trees and plants.",
         "HR_MANAGER": "Manages all HR related activities including staff roles and performance.",
         "FINANCIAL_MANAGER": "Handles all financial aspects related to the farm management.",
+        "DRIVER": "Drives deliveries; each driver adds to the daily delivery capacity.",
     }
     role_description = descriptions.get(roleId, "No description available.")
     role_details = RoleDetailsResponse(
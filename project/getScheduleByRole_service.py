@@ -1,9 +1,11 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 import prisma
 import prisma.enums
 import prisma.models
+from project.recurringSchedules import DEFAULT_WINDOW, expand_rules
+from project.timestamps import to_utc
 from pydantic import BaseModel
 
 
@@ -12,9 +14,10 @@ class ScheduleDetails(BaseModel):
     Details of a schedule that has been affected by the field assignment update.
     """
 
-    scheduleId: int
+    scheduleId: Optional[int] = None
     newScheduledDate: datetime
     status: prisma.enums.ScheduleStatus
+    ruleId: Optional[int] = None
 
 
 class SchedulesByRoleResponse(BaseModel):
@@ -25,12 +28,18 @@ class SchedulesByRoleResponse(BaseModel):
     schedules: List[ScheduleDetails]
 
 
-async def getScheduleByRole(roleId: str) -> SchedulesByRoleResponse:
+async def getScheduleByRole(
+    roleId: str,
+    startDate: Optional[datetime] = None,
+    endDate: Optional[datetime] = None,
+) -> SchedulesByRoleResponse:
     """
     Retrieves schedules based on staff role. This function utilizes a lookup to the Staff Roles Management Module to fetch schedules specific to a particular role, crucial for role-based planning and coverage efficiency.
 
     Args:
         roleId (str): The unique identifier of the staff role for which schedules are to be fetched.
+        startDate (Optional[datetime]): Start of the window, defaulting to now. Stored and recurring schedules are both limited to the window.
+        endDate (Optional[datetime]): End of the window, defaulting to two weeks after the start.
 
     Returns:
         SchedulesByRoleResponse: Provides a detailed list of schedules associated with a specific staff role, including relevant user and status details.
@@ -42,8 +51,13 @@ async def getScheduleByRole(roleId: str) -> SchedulesByRoleResponse:
             ScheduleDetails(scheduleId=2, newScheduledDate=datetime(2023, 12, 26), status="PENDING")
           ])
     """
+    window_start = to_utc(startDate) if startDate else datetime.utcnow()
+    window_end = to_utc(endDate) if endDate else window_start + DEFAULT_WINDOW
     schedules = await prisma.models.Schedule.prisma().find_many(
-        where={"user": {"role": roleId}}, include={"user": True}
+        where={
+            "user": {"is": {"role": roleId}},
+            "scheduledOn": {"gte": window_start, "lt": window_end},
+        }
     )
     result_schedules = [
         ScheduleDetails(
@@ -53,4 +67,15 @@ async def getScheduleByRole(roleId: str) -> SchedulesByRoleResponse:
         )
         for schedule in schedules
     ]
+    occurrences = await expand_rules(
+        {"user": {"is": {"role": roleId}}}, window_start, window_end
+    )
+    result_schedules.extend(
+        ScheduleDetails(
+            newScheduledDate=occurrence.scheduledOn,
+            status=occurrence.status,
+            ruleId=occurrence.ruleId,
+        )
+        for occurrence in occurrences
+    )
     return SchedulesByRoleResponse(schedules=result_schedules)
@@ -1,18 +1,26 @@
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import prisma
 import prisma.enums
 import prisma.models
+from project.recurringSchedules import DEFAULT_WINDOW, expand_rules
+from project.timestamps import parse_timestamp, to_utc
 from pydantic import BaseModel
 
+MAX_WINDOW = timedelta(days=366)
+STREAM_BATCH_SIZE = 500
+
 
 class FetchStaffSchedulesRequest(BaseModel):
     """
-    This model does not require any fields, as the request fetches all staff schedules irrespective of specific input parameters. Authorization headers or tokens should be used to ensure only privileged sessions can access this data.
+    Date window and optional filters. The window defaults to today plus the next two weeks and may span at most a year.
     """
 
-    pass
+    startDate: Optional[datetime] = None
+    endDate: Optional[datetime] = None
+    userId: Optional[int] = None
+    type: Optional[prisma.enums.ScheduleType] = None
 
 
 class UserProfileMinimal(BaseModel):
@@ -31,56 +39,179 @@ class ScheduleDetailed(BaseModel):
     Expanded details for a schedule, including user and status details.
     """
 
+    schedule_id: Optional[int] = None
     scheduled_on: datetime
     type: prisma.enums.ScheduleType
     status: prisma.enums.ScheduleStatus
     user_details: UserProfileMinimal
+    rule_id: Optional[int] = None
 
 
 class FetchStaffSchedulesResponse(BaseModel):
     """
-    Contains a list of all staff schedules, detailed with user association, status, and type. This model will deliver a comprehensive overview, suitable for managerial oversight and planning.
+    Contains the staff schedules in the requested window, detailed with user association, status, and type, in start order.
     """
 
     schedules: List[ScheduleDetailed]
 
 
+def _window(request: FetchStaffSchedulesRequest) -> Tuple[datetime, datetime]:
+    start = to_utc(request.startDate or datetime.combine(date.today(), time.min))
+    end = to_utc(request.endDate) if request.endDate else start + DEFAULT_WINDOW
+    if end <= start:
+        raise ValueError("endDate must be after startDate.")
+    if end - start > MAX_WINDOW:
+        raise ValueError("The schedule window may span at most one year.")
+    return start, end
+
+
+async def _fetch_page(
+    request: FetchStaffSchedulesRequest,
+    after: Tuple[datetime, int],
+    end: datetime,
+    limit: Optional[int],
+) -> List[Dict[str, Any]]:
+    """
+    Reads the next rows of the window after the (scheduledOn, id) key, selecting only the
+    schedule and profile columns the response needs.
+    """
+    params: List[Any] = [after[0], after[1], end]
+    filters = ""
+    if request.userId is not None:
+        params.append(request.userId)
+        filters += f' AND s."userId" = ${len(params)}'
+    if request.type is not None:
+        params.append(request.type.value)
+        filters += f' AND s."type" = ${len(params)}::"ScheduleType"'
+    page = ""
+    if limit is not None:
+        params.append(limit)
+        page = f" LIMIT ${len(params)}"
+    return await prisma.get_client().query_raw(
+        'SELECT s."id", s."scheduledOn", s."type", s."status", s."userId",'
+        ' p."firstName", p."lastName", p."contactNumber"'
+        ' FROM "Schedule" s LEFT JOIN "UserProfile" p ON p."userId" = s."userId"'
+        ' WHERE (s."scheduledOn", s."id") > ($1::timestamp, $2)'
+        ' AND s."scheduledOn" < $3::timestamp'
+        f"{filters}"
+        ' ORDER BY s."scheduledOn", s."id"'
+        f"{page}",
+        *params,
+    )
+
+
+def _row_detail(row: Dict[str, Any]) -> ScheduleDetailed:
+    has_profile = row["firstName"] is not None
+    return ScheduleDetailed(
+        schedule_id=row["id"],
+        scheduled_on=parse_timestamp(row["scheduledOn"]),
+        type=row["type"],
+        status=row["status"],
+        user_details=UserProfileMinimal(
+            user_id=row["userId"] if has_profile else 0,
+            first_name=row["firstName"] if has_profile else "Unknown",
+            last_name=row["lastName"] if has_profile else "Unknown",
+            contact_number=row["contactNumber"] if has_profile else None,
+        ),
+    )
+
+
+async def _occurrence_details(
+    request: FetchStaffSchedulesRequest, start: datetime, end: datetime
+) -> List[ScheduleDetailed]:
+    where: Dict[str, Any] = {}
+    if request.userId is not None:
+        where["userId"] = request.userId
+    if request.type is not None:
+        where["type"] = request.type
+    occurrences = await expand_rules(where, start, end)
+    if request.userId is not None:
+        occurrences = [o for o in occurrences if o.userId == request.userId]
+    profiles = {
+        profile.userId: profile
+        for profile in await prisma.models.UserProfile.prisma().find_many(
+            where={"userId": {"in": list({o.userId for o in occurrences if o.userId})}}
+        )
+    }
+    details = []
+    for occurrence in occurrences:
+        profile = profiles.get(occurrence.userId)
+        details.append(
+            ScheduleDetailed(
+                scheduled_on=occurrence.scheduledOn,
+                type=occurrence.type,
+                status=occurrence.status,
+                user_details=UserProfileMinimal(
+                    user_id=occurrence.userId if profile else 0,
+                    first_name=profile.firstName if profile else "Unknown",
+                    last_name=profile.lastName if profile else "Unknown",
+                    contact_number=profile.contactNumber if profile else None,
+                ),
+                rule_id=occurrence.ruleId,
+            )
+        )
+    return details
+
+
 async def getSchedule(
     request: FetchStaffSchedulesRequest,
 ) -> FetchStaffSchedulesResponse:
     """
-    Fetches all staff schedules. This route retrieves complete schedule details from the database. It's intended for viewing the entire set of schedules by authorized managers.
+    Fetches the staff schedules in a date window, optionally for one user or schedule type. Filters are applied by the database on the (scheduledOn, id) index and only the schedule and profile columns are read, so latency follows the size of the window rather than the size of the history. Occurrences of recurring schedules in the window are merged in start order.
 
     Args:
-        request (FetchStaffSchedulesRequest): This model does not require any fields, as the request fetches all staff schedules irrespective of specific input parameters. Authorization headers or tokens should be used to ensure only privileged sessions can access this data.
+        request (FetchStaffSchedulesRequest): Date window and optional filters. The window defaults to today plus the next two weeks and may span at most a year.
 
     Returns:
-        FetchStaffSchedulesResponse: Contains a list of all staff schedules, detailed with user association, status, and type. This model will deliver a comprehensive overview, suitable for managerial oversight and planning.
+        FetchStaffSchedulesResponse: Contains the staff schedules in the requested window, detailed with user association, status, and type, in start order.
+
+    Raises:
+        ValueError: If the window is empty or longer than a year.
     """
-    all_schedules = await prisma.models.Schedule.prisma().find_many(
-        include={"user": {"include": {"profile": True}}}
-    )
-    detailed_schedules = []
-    for schedule in all_schedules:
-        if schedule.user and schedule.user.profile:
-            user_details = UserProfileMinimal(
-                user_id=schedule.user.id,
-                first_name=schedule.user.profile.firstName,
-                last_name=schedule.user.profile.lastName,
-                contact_number=schedule.user.profile.contactNumber,
-            )
-        else:
-            user_details = UserProfileMinimal(
-                user_id=0,
-                first_name="Unknown",
-                last_name="Unknown",
-                contact_number=None,
-            )
-        detailed_schedule = ScheduleDetailed(
-            scheduled_on=schedule.scheduledOn,
-            type=schedule.type,
-            status=schedule.status,
-            user_details=user_details,
-        )
-        detailed_schedules.append(detailed_schedule)
-    return FetchStaffSchedulesResponse(schedules=detailed_schedules)
+    start, end = _window(request)
+    rows = await _fetch_page(request, (start, -1), end, None)
+    schedules = [_row_detail(row) for row in rows]
+    schedules.extend(await _occurrence_details(request, start, end))
+    schedules.sort(key=lambda schedule: schedule.scheduled_on)
+    return FetchStaffSchedulesResponse(schedules=schedules)
+
+
+async def _stream(
+    request: FetchStaffSchedulesRequest, start: datetime, end: datetime
+) -> AsyncIterator[str]:
+    occurrences = await _occurrence_details(request, start, end)
+    position = 0
+    after = (start, -1)
+    while True:
+        rows = await _fetch_page(request, after, end, STREAM_BATCH_SIZE)
+        for row in rows:
+            detail = _row_detail(row)
+            while (
+                position < len(occurrences)
+                and occurrences[position].scheduled_on < detail.scheduled_on
+            ):
+                yield occurrences[position].model_dump_json() + "\n"
+                position += 1
+            yield detail.model_dump_json() + "\n"
+        if len(rows) < STREAM_BATCH_SIZE:
+            break
+        after = (detail.scheduled_on, detail.schedule_id)
+    for occurrence in occurrences[position:]:
+        yield occurrence.model_dump_json() + "\n"
+
+
+def streamSchedules(request: FetchStaffSchedulesRequest) -> AsyncIterator[str]:
+    """
+    Streams the same schedules as getSchedule as newline-delimited JSON. Rows are read in keyset batches of STREAM_BATCH_SIZE, so memory stays flat however large the window is.
+
+    Args:
+        request (FetchStaffSchedulesRequest): Date window and optional filters. The window defaults to today plus the next two weeks and may span at most a year.
+
+    Returns:
+        AsyncIterator[str]: One JSON encoded ScheduleDetailed per line, in start order.
+
+    Raises:
+        ValueError: If the window is empty or longer than a year.
+    """
+    start, end = _window(request)
+    return _stream(request, start, end)
@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import prisma
+import prisma.models
+from project.stockProjection import stock_projection
+from pydantic import BaseModel
+
+
+class SeasonStock(BaseModel):
+    """
+    Projected trees standing and trees at saleable height in one season, in total and per species.
+    """
+
+    season: int
+    standing: int
+    saleable: int
+    saleableBySpecies: Dict[str, int]
+
+
+class StockProjectionResponse(BaseModel):
+    """
+    Projected stock for each of the coming seasons, starting with the current one, and the number of cohorts it covers.
+    """
+
+    cohorts: int
+    seasons: List[SeasonStock]
+
+
+async def getStockProjection(
+    fieldId: Optional[int] = None, species: Optional[str] = None
+) -> StockProjectionResponse:
+    """
+    Projects how many trees will stand, and how many of them will have reached saleable height, in each of the next ten seasons. Trees are projected per cohort (field, species and planting year) from the seedlings planted and trees registered, less the trees found dead, using each cohort's survival rate and its species' harvest ages. The projection is computed for all cohorts at once and cached until its inputs change.
+
+    Args:
+        fieldId (Optional[int]): Only cohorts in this field.
+        species (Optional[str]): Only cohorts of this species.
+
+    Returns:
+        StockProjectionResponse: Projected stock for each of the coming seasons, starting with the current one, and the number of cohorts it covers.
+
+    Raises:
+        ValueError: If the species is unknown.
+
+    Example:
+        projection = await getStockProjection(species="Fraser Fir")
+        for season in projection.seasons:
+            print(season.season, season.saleable)
+    """
+    species_id = None
+    if species is not None:
+        record = await prisma.models.TreeSpecies.prisma().find_unique(
+            where={"name": species.strip()}
+        )
+        if record is None:
+            raise ValueError(f"Unknown species {species!r}.")
+        species_id = record.id
+    projection = await stock_projection(datetime.now())
+    indexes = projection.select(fieldId, species_id)
+    standing = projection.totals(indexes, "standing")
+    saleable = projection.totals(indexes, "saleable")
+    by_species = projection.by_species(indexes, "saleable")
+    names = {
+        record.id: record.name
+        for record in await prisma.models.TreeSpecies.prisma().find_many(
+            where={"id": {"in": list(by_species)}}
+        )
+    }
+    return StockProjectionResponse(
+        cohorts=len(indexes),
+        seasons=[
+            SeasonStock(
+                season=int(season),
+                standing=round(standing[offset]),
+                saleable=round(saleable[offset]),
+                saleableBySpecies={
+                    names.get(species_id, str(species_id)): round(counts[offset])
+                    for species_id, counts in by_species.items()
+                },
+            )
+            for offset, season in enumerate(projection.seasons)
+        ],
+    )
@@ -1,18 +1,12 @@
 from datetime import datetime
-from enum import Enum
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 import prisma
 import prisma.models
+from project.treeHealth import parse_status
 from pydantic import BaseModel
 
-
-class Category(Enum):
-    """
-    Enum representing different categories of items in inventory
-    """
-
-    value: str  # TODO(autogpt): "value" incorrectly overrides property of same name in class "Enum". reportIncompatibleMethodOverride
+MAX_PAGE_SIZE = 500
 
 
 class TreeHealthResponse(BaseModel):
@@ -28,40 +22,76 @@ class TreeHealthResponse(BaseModel):
     location: str
 
 
+class TreeHealthRecordsResponse(BaseModel):
+    """
+    A page of trees with their current health, in tree id order. Pass nextCursor back as cursor to fetch the next page.
+    """
+
+    records: List[TreeHealthResponse]
+    nextCursor: Optional[int] = None
+
+
 async def getTreeHealthRecords(
-    tree_category: Category, health_status: Optional[str]
-) -> TreeHealthResponse:
+    health_status: Optional[str],
+    species: Optional[str] = None,
+    fieldId: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = 100,
+) -> TreeHealthRecordsResponse:
     """
-    This endpoint retrieves all health records of the trees. It provides details such as type of tree, date of last check, health status, and any noted issues. Expected to integrate data from the field management module to link each tree to its specific location and condition.
+    This endpoint retrieves the current health of the trees. It provides details such as type of tree, date of last check, health status, and any noted issues, with each tree linked to its field, row and position. Results come from the latest-status-per-tree index, so filtering by status together with species or field is an index range scan rather than a pass over the assessment history.
 
     Args:
-        tree_category (Category): Filter by category of trees, mostly it will be ‘TREE’ for this endpoint.
         health_status (Optional[str]): Filter by the current health status of the tree. Optional parameter.
+        species (Optional[str]): Only trees of this species.
+        fieldId (Optional[int]): Only trees in this field.
+        cursor (Optional[int]): The nextCursor of the previous page.
+        limit (int): Maximum number of trees to return.
 
     Returns:
-        TreeHealthResponse: Model of the response giving details about tree health including last checkup date and noted issues.
+        TreeHealthRecordsResponse: A page of trees with their current health, in tree id order. Pass nextCursor back as cursor to fetch the next page.
+
+    Raises:
+        ValueError: If the status is unknown or the page size is out of range.
 
     Example:
-        response = getTreeHealthRecords(Category.TREE, 'Healthy')
-        > TreeHealthResponse(tree_id=1, type_of_tree="Pine", date_of_last_check=datetime.datetime(2023, 9, 15), health_status="Healthy", noted_issues=None, location="Plot 9")
+        response = await getTreeHealthRecords("At Risk", species="Fraser Fir")
+        > TreeHealthRecordsResponse(records=[TreeHealthResponse(tree_id=1, type_of_tree="Fraser Fir", date_of_last_check=datetime.datetime(2023, 9, 15), health_status="AT_RISK", noted_issues="Needle cast", location="North Block, row 3, position 17")], nextCursor=None)
     """
-    filters = {"item": {"category": tree_category.value}}
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+    where: Dict[str, Any] = {}
     if health_status:
-        filters["health_status"] = health_status
-    health_records = await prisma.models.InventoryEvent.prisma().find_many(
-        where=filters, include={"item": True}
+        where["status"] = parse_status(health_status)
+    if species:
+        record = await prisma.models.TreeSpecies.prisma().find_unique(
+            where={"name": species}
+        )
+        if record is None:
+            return TreeHealthRecordsResponse(records=[])
+        where["speciesId"] = record.id
+    if fieldId is not None:
+        where["fieldId"] = fieldId
+    if cursor is not None:
+        where["treeId"] = {"gt": cursor}
+    latest = await prisma.models.TreeHealthLatest.prisma().find_many(
+        where=where,
+        include={"tree": {"include": {"species": True, "field": True}}},
+        order={"treeId": "asc"},
+        take=limit + 1,
     )
-    if health_records:
-        tree_details = health_records[0].item
-        last_check_date = health_records[0].date
-        return TreeHealthResponse(
-            tree_id=tree_details.id,
-            type_of_tree=tree_details.name,
-            date_of_last_check=last_check_date,
-            health_status="Healthy" if health_status is None else health_status,
-            noted_issues="Needs more water" if health_status != "Healthy" else None,
-            location="Plot 9",
+    records = [
+        TreeHealthResponse(
+            tree_id=entry.treeId,
+            type_of_tree=entry.tree.species.name,
+            date_of_last_check=entry.assessedOn,
+            health_status=entry.status,
+            noted_issues=entry.issues,
+            location=f"{entry.tree.field.name}, row {entry.tree.row}, position {entry.tree.position}",
         )
-    raise ValueError(
-        "No health records found for the specified category with optional health status."
+        for entry in latest[:limit]
+    ]
+    return TreeHealthRecordsResponse(
+        records=records,
+        nextCursor=records[-1].tree_id if len(latest) > limit else None,
     )
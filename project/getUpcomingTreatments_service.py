@@ -1,10 +1,21 @@
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 
 import prisma
 import prisma.models
+from project.timestamps import to_utc
+from project.treatmentWindow import (
+    WINDOW_DAYS,
+    SortKey,
+    TreatmentEntry,
+    recurring_entries,
+    scheduled_entries,
+    treatment_window,
+)
 from pydantic import BaseModel
 
+MAX_PAGE_SIZE = 1000
+
 
 class GetUpcomingTreeTreatmentsRequest(BaseModel):
     """
@@ -26,49 +37,111 @@ class TreeDetail(BaseModel):
 
 class TreatmentDetail(BaseModel):
     """
-    Details of each scheduled treatment for trees.
+    Details of each scheduled treatment for trees. Scheduled treatments are listed once per tree; recurring treatments, which are not tied to trees, once per occurrence.
     """
 
     date: datetime
     treatmentType: str
-    tree: TreeDetail
+    tree: Optional[TreeDetail] = None
+    scheduleId: Optional[int] = None
+    ruleId: Optional[int] = None
 
 
 class UpcomingTreeTreatmentsResponse(BaseModel):
     """
-    Outputs a list of upcoming tree treatments including dates, treatment types, and details about the target trees where applicable.
+    Outputs a list of upcoming tree treatments including dates, treatment types, and details about the target trees where applicable. Pass nextCursor back as cursor to fetch the next page.
     """
 
     treatments: List[TreatmentDetail]
+    nextCursor: Optional[str] = None
+
+
+def _encode_cursor(key: SortKey) -> str:
+    date, source, entry_id, tree_id = key
+    return f"{date.isoformat()}_{source}_{entry_id}_{tree_id}"
+
+
+def _decode_cursor(cursor: str) -> SortKey:
+    date, source, entry_id, tree_id = cursor.rsplit("_", 3)
+    return (
+        to_utc(datetime.fromisoformat(date)),
+        int(source),
+        int(entry_id),
+        int(tree_id),
+    )
 
 
 async def getUpcomingTreatments(
     request: GetUpcomingTreeTreatmentsRequest,
+    cursor: Optional[str] = None,
+    limit: int = 500,
 ) -> UpcomingTreeTreatmentsResponse:
     """
-    Fetches a list of upcoming treatments scheduled. It integrates with the Scheduling Module to pull in data about planned dates, types of treatment, and target trees. This helps in preparing for necessary resources and staff allocation.
+    Fetches a list of upcoming treatments scheduled. It integrates with the Scheduling Module to pull in data about planned dates, types of treatment, and target trees. This helps in preparing for necessary resources and staff allocation. Scheduled treatments are listed per tree with its current health and place in the field, merged with the occurrences of recurring treatments, and paged with a keyset cursor. The 30-day window is cached in-process and invalidated whenever treatments change, so a page is a binary search into it plus one lookup of the trees' current health.
 
     Args:
     request (GetUpcomingTreeTreatmentsRequest): This model contains no parameters as it fetches upcoming treatments based on the current date and schedules configured in the system.
+    cursor (Optional[str]): The nextCursor value of the previous page, if any.
+    limit (int): Maximum number of entries in the page.
 
     Returns:
-    UpcomingTreeTreatmentsResponse: Outputs a list of upcoming tree treatments including dates, treatment types, and details about the target trees where applicable.
+    UpcomingTreeTreatmentsResponse: Outputs a list of upcoming tree treatments including dates, treatment types, and details about the target trees where applicable. Pass nextCursor back as cursor to fetch the next page.
+
+    Raises:
+    ValueError: If the page size is out of range.
     """
-    current_date = datetime.now()
-    end_date = current_date + timedelta(days=30)
-    schedules = await prisma.models.Schedule.prisma().find_many(
-        where={
-            "scheduledOn": {"gte": current_date, "lte": end_date},
-            "type": "HEALTH_SPECIALIST",
-        }
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+    current_date = datetime.utcnow()
+    end_date = current_date + timedelta(days=WINDOW_DAYS)
+    after: SortKey = (
+        _decode_cursor(cursor) if cursor else (current_date - timedelta(1), 0, 0, 0)
     )
-    treatment_details = []
-    for schedule in schedules:
-        tree_detail = TreeDetail(
-            treeId=schedule.id, healthStatus="Good", location="North field"
-        )
-        treatment_detail = TreatmentDetail(
-            date=schedule.scheduledOn, treatmentType="Fertilization", tree=tree_detail
+    window = await treatment_window(current_date)
+    entries: List[TreatmentEntry]
+    if window is not None:
+        entries = window.page(current_date, end_date, after, limit + 1)
+    else:
+        entries = await scheduled_entries(current_date, end_date, after, limit + 1)
+        entries.extend(
+            entry
+            for entry in await recurring_entries(current_date, end_date)
+            if entry.key > after
         )
-        treatment_details.append(treatment_detail)
-    return UpcomingTreeTreatmentsResponse(treatments=treatment_details)
+        entries.sort(key=lambda entry: entry.key)
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = _encode_cursor(entries[-1].key)
+    tree_ids = sorted({entry.treeId for entry in entries if entry.treeId is not None})
+    health = (
+        {
+            latest.treeId: latest.status
+            for latest in await prisma.models.TreeHealthLatest.prisma().find_many(
+                where={"treeId": {"in": tree_ids}}
+            )
+        }
+        if tree_ids
+        else {}
+    )
+    return UpcomingTreeTreatmentsResponse(
+        treatments=[
+            TreatmentDetail(
+                date=entry.key[0],
+                treatmentType=entry.treatmentType,
+                tree=(
+                    TreeDetail(
+                        treeId=entry.treeId,
+                        healthStatus=health.get(entry.treeId, "UNKNOWN"),
+                        location=entry.location,
+                    )
+                    if entry.treeId is not None
+                    else None
+                ),
+                scheduleId=entry.scheduleId,
+                ruleId=entry.ruleId,
+            )
+            for entry in entries
+        ],
+        nextCursor=next_cursor,
+    )
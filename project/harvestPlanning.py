@@ -0,0 +1,259 @@
+"""
+Greedy harvest planner matching forecast demand to mature trees.
+
+Supply is the number of harvestable trees per field, row and species; demand is a number of
+trees per day, optionally of one species. Each day every crew cuts up to its daily capacity
+in a single field, working rows in order so a day's cut is a contiguous stretch of the field.
+Crew moves are kept down by leaving a crew in yesterday's field while it still has trees the
+day needs; a crew that must move goes to the field with the most matching trees, preferring
+one another crew already works that day, so the trees cut there share trucks. Truck trips
+are counted per day and field as the trees cut there divided by the truck capacity, rounded
+up. Demand that cannot be met on its day, for lack of crews or of trees, is reported.
+
+Supply is passed as flat NumPy columns and the planner keeps running per-field, per-species
+totals and row cursors, so a season of daily demand over hundreds of thousands of trees plans
+in well under a second. Everything here is pure and picklable so the planner can run in the
+shared process pool.
+"""
+
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+
+class HarvestDemand(BaseModel):
+    """
+    Trees needed on a day, of one species or, without a species, of any.
+    """
+
+    day: date
+    species: Optional[str] = None
+    quantity: int
+
+
+class DraftHarvestRow(BaseModel):
+    """
+    Trees of one species to cut in one row.
+    """
+
+    row: int
+    species: str
+    trees: int
+
+
+class DraftHarvest(BaseModel):
+    """
+    One day of cutting in one field, shaped like a HARVESTING schedule and its harvest rows. Crews are numbered from 1.
+    """
+
+    day: date
+    fieldId: int
+    crews: List[int]
+    trees: int
+    truckTrips: int
+    rows: List[DraftHarvestRow]
+
+
+class UnmetDemand(BaseModel):
+    """
+    Part of a day's demand the plan does not cover.
+    """
+
+    day: date
+    species: Optional[str] = None
+    missing: int
+
+
+class HarvestPlan(BaseModel):
+    """
+    The drafted harvests in day and field order, the demand left uncovered and the plan's costs.
+    """
+
+    harvests: List[DraftHarvest]
+    unmet: List[UnmetDemand]
+    truckTrips: int
+    crewMoves: int
+
+
+class _FieldStock:
+    """
+    Remaining trees of one field, per species, as row-ordered counts with a cursor each.
+    """
+
+    def __init__(self, rows: np.ndarray, species: np.ndarray, counts: np.ndarray):
+        self.rows: Dict[int, np.ndarray] = {}
+        self.counts: Dict[int, np.ndarray] = {}
+        self.cursor: Dict[int, int] = {}
+        self.total: Dict[int, int] = {}
+        for species_id in np.unique(species).tolist():
+            mask = species == species_id
+            self.rows[species_id] = rows[mask]
+            self.counts[species_id] = counts[mask].copy()
+            self.cursor[species_id] = 0
+            self.total[species_id] = int(counts[mask].sum())
+
+    def available(self, species_id: Optional[int]) -> int:
+        if species_id is None:
+            return sum(self.total.values())
+        return self.total.get(species_id, 0)
+
+    def take(
+        self, species_id: int, wanted: int, cut: Dict[Tuple[int, int], int]
+    ) -> int:
+        """
+        Cuts up to wanted trees of a species, lowest rows first, adding them to cut.
+        """
+        if species_id not in self.rows:
+            return 0
+        rows, counts = self.rows[species_id], self.counts[species_id]
+        position, taken = self.cursor[species_id], 0
+        while taken < wanted and position < len(counts):
+            amount = min(int(counts[position]), wanted - taken)
+            counts[position] -= amount
+            taken += amount
+            key = (int(rows[position]), species_id)
+            cut[key] = cut.get(key, 0) + amount
+            if counts[position] == 0:
+                position += 1
+        self.cursor[species_id] = position
+        self.total[species_id] -= taken
+        return taken
+
+
+def plan_harvest(
+    demand: List[HarvestDemand],
+    supply: Dict[str, np.ndarray],
+    species_ids: Dict[str, int],
+    crews: int,
+    crew_capacity: int,
+    truck_capacity: int,
+) -> HarvestPlan:
+    """
+    Assigns crews to fields and rows for every day with demand and returns the plan.
+
+    supply holds equal-length "fieldId", "row", "speciesId" and "count" columns sorted by
+    field, species and row; species_ids maps the species names used in demand to ids.
+    """
+    names = {species_id: name for name, species_id in species_ids.items()}
+    stock: Dict[int, _FieldStock] = {}
+    field_ids = supply["fieldId"]
+    starts = np.flatnonzero(np.r_[True, field_ids[1:] != field_ids[:-1]])
+    ends = np.r_[starts[1:], len(field_ids)]
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        stock[int(field_ids[start])] = _FieldStock(
+            supply["row"][start:end],
+            supply["speciesId"][start:end],
+            supply["count"][start:end],
+        )
+
+    by_day: Dict[date, Dict[Optional[int], int]] = defaultdict(lambda: defaultdict(int))
+    unmet: List[UnmetDemand] = []
+    for entry in demand:
+        if entry.species is not None and entry.species not in species_ids:
+            unmet.append(
+                UnmetDemand(
+                    day=entry.day, species=entry.species, missing=entry.quantity
+                )
+            )
+            continue
+        species_id = None if entry.species is None else species_ids[entry.species]
+        by_day[entry.day][species_id] += entry.quantity
+
+    position: List[Optional[int]] = [None] * crews
+    harvests: List[DraftHarvest] = []
+    crew_moves = 0
+    for day in sorted(by_day):
+        # Specific species first, so trees of any species are not cut from under them.
+        need = dict(sorted(by_day[day].items(), key=lambda item: item[0] is None))
+
+        def matching(field_id: int) -> int:
+            fields_stock = stock[field_id]
+            specific = sum(
+                min(fields_stock.available(species_id), quantity)
+                for species_id, quantity in need.items()
+                if species_id is not None
+            )
+            return specific + min(fields_stock.available(None), need.get(None, 0))
+
+        cut: Dict[int, Dict[Tuple[int, int], int]] = defaultdict(dict)
+        working: Dict[int, List[int]] = defaultdict(list)
+        order = sorted(range(crews), key=lambda crew: position[crew] is None)
+        for crew in order:
+            if not any(need.values()):
+                break
+            field_id = position[crew]
+            if field_id is None or matching(field_id) == 0:
+                candidates = [
+                    (matching(candidate), candidate in working, -candidate)
+                    for candidate in stock
+                ]
+                best = max(candidates, default=(0, False, 0))
+                if best[0] == 0:
+                    break
+                field_id = -best[2]
+                if position[crew] is not None:
+                    crew_moves += 1
+                position[crew] = field_id
+            capacity = crew_capacity
+            for species_id in list(need):
+                if capacity == 0:
+                    break
+                if species_id is not None:
+                    taken = stock[field_id].take(
+                        species_id, min(need[species_id], capacity), cut[field_id]
+                    )
+                else:
+                    taken = 0
+                    for any_species in list(stock[field_id].total):
+                        taken += stock[field_id].take(
+                            any_species,
+                            min(need[None], capacity) - taken,
+                            cut[field_id],
+                        )
+                        if taken == min(need[None], capacity):
+                            break
+                need[species_id] -= taken
+                capacity -= taken
+            if capacity < crew_capacity:
+                working[field_id].append(crew + 1)
+
+        for field_id in sorted(working):
+            rows = sorted(cut[field_id].items())
+            trees = sum(count for _, count in rows)
+            harvests.append(
+                DraftHarvest(
+                    day=day,
+                    fieldId=field_id,
+                    crews=working[field_id],
+                    trees=trees,
+                    truckTrips=-(-trees // truck_capacity),
+                    rows=[
+                        DraftHarvestRow(
+                            row=row,
+                            species=names.get(species_id, str(species_id)),
+                            trees=count,
+                        )
+                        for (row, species_id), count in rows
+                    ],
+                )
+            )
+        for species_id, missing in need.items():
+            if missing > 0:
+                unmet.append(
+                    UnmetDemand(
+                        day=day,
+                        species=None if species_id is None else names[species_id],
+                        missing=missing,
+                    )
+                )
+
+    unmet.sort(key=lambda gap: (gap.day, gap.species or ""))
+    return HarvestPlan(
+        harvests=harvests,
+        unmet=unmet,
+        truckTrips=sum(harvest.truckTrips for harvest in harvests),
+        crewMoves=crew_moves,
+    )
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from typing import List
+
+import prisma
+import prisma.models
+from project.treeRegistry import sync_tree_registry
+from pydantic import BaseModel
+
+MAX_IMPORT_SIZE = 100_000
+INSERT_CHUNK_SIZE = 10_000
+MAX_SMALLINT = 32767
+# Serialises imports so tree ids become visible in increasing order.
+TREE_IMPORT_LOCK_KEY = 40_001
+
+
+class TreeInput(BaseModel):
+    """
+    One tree to register, addressed by field, row and position within the row.
+    """
+
+    fieldId: int
+    row: int
+    position: int
+    species: str
+    plantingYear: int
+
+
+class TreeImportResponse(BaseModel):
+    """
+    Outcome of a bulk tree import.
+    """
+
+    imported: int
+    skipped: int
+    speciesCreated: int
+
+
+async def importTrees(trees: List[TreeInput]) -> TreeImportResponse:
+    """
+    Registers a batch of individual trees. Species names are normalised into the species table, the trees are inserted in chunks within one transaction, and trees whose field, row and position are already taken are skipped. The in-memory registry is then extended with the new rows only.
+
+    Args:
+        trees (List[TreeInput]): The trees to register.
+
+    Returns:
+        TreeImportResponse: Outcome of a bulk tree import.
+
+    Raises:
+        ValueError: If the batch is too large, refers to an unknown field, lacks a species, or has an out-of-range row, position or planting year.
+
+    Example:
+        result = await importTrees([TreeInput(fieldId=3, row=1, position=1, species="Fraser Fir", plantingYear=2019)])
+        print(result.imported, result.skipped)
+    """
+    if len(trees) > MAX_IMPORT_SIZE:
+        raise ValueError(f"An import can hold at most {MAX_IMPORT_SIZE} trees.")
+    for tree in trees:
+        if not (1 <= tree.row <= MAX_SMALLINT and 1 <= tree.position <= MAX_SMALLINT):
+            raise ValueError(
+                f"Row and position must be between 1 and {MAX_SMALLINT} (field {tree.fieldId}, row {tree.row}, position {tree.position})."
+            )
+        if not tree.species.strip():
+            raise ValueError("Every tree needs a species.")
+        if not 1800 <= tree.plantingYear <= 2200:
+            raise ValueError(f"Implausible planting year {tree.plantingYear}.")
+    field_ids = sorted({tree.fieldId for tree in trees})
+    fields = await prisma.models.Field.prisma().find_many(
+        where={"id": {"in": field_ids}}
+    )
+    unknown = set(field_ids) - {field.id for field in fields}
+    if unknown:
+        raise ValueError(f"Unknown field ids: {', '.join(map(str, sorted(unknown)))}.")
+    names = sorted({tree.species.strip() for tree in trees})
+    species_created = await prisma.models.TreeSpecies.prisma().create_many(
+        data=[{"name": name} for name in names], skip_duplicates=True
+    )
+    species_ids = {
+        species.name: species.id
+        for species in await prisma.models.TreeSpecies.prisma().find_many(
+            where={"name": {"in": names}}
+        )
+    }
+    rows = [
+        {
+            "fieldId": tree.fieldId,
+            "row": tree.row,
+            "position": tree.position,
+            "speciesId": species_ids[tree.species.strip()],
+            "plantingYear": tree.plantingYear,
+        }
+        for tree in trees
+    ]
+    imported = 0
+    async with prisma.get_client().tx(timeout=timedelta(minutes=2)) as transaction:
+        await transaction.execute_raw(
+            "SELECT pg_advisory_xact_lock($1)", TREE_IMPORT_LOCK_KEY
+        )
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            imported += await prisma.models.Tree.prisma(transaction).create_many(
+                data=rows[start : start + INSERT_CHUNK_SIZE], skip_duplicates=True
+            )
+    await sync_tree_registry()
+    return TreeImportResponse(
+        imported=imported,
+        skipped=len(rows) - imported,
+        speciesCreated=species_created,
+    )
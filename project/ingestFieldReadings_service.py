@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import List
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.sensorSeries import record_readings
+from pydantic import BaseModel
+
+MAX_BATCH_SIZE = 5000
+
+
+class SensorReadingInput(BaseModel):
+    """
+    One soil moisture or soil temperature reading reported by a field probe.
+    """
+
+    fieldId: int
+    sensorId: str
+    metric: prisma.enums.SensorMetric
+    recordedAt: datetime
+    value: float
+
+
+class IngestReadingsResponse(BaseModel):
+    """
+    How many readings of a batch were newly stored and which fields they belong to.
+    """
+
+    accepted: int
+    fieldIds: List[int]
+
+
+async def ingestFieldReadings(
+    readings: List[SensorReadingInput],
+) -> IngestReadingsResponse:
+    """
+    Stores a batch of field probe readings. The raw readings are kept for a retention window while the hourly and daily rollups and the latest value per field and metric are updated in the same transaction, so field conditions never read raw data. Readings a probe already reported for the same metric and instant, for example when a gateway retries a batch, are skipped and not counted again.
+
+    Args:
+        readings (List[SensorReadingInput]): The readings to store, in any order and for any number of fields.
+
+    Returns:
+        IngestReadingsResponse: How many readings of a batch were newly stored and which fields they belong to.
+
+    Raises:
+        ValueError: If the batch is too large or refers to a field that does not exist.
+
+    Example:
+        await ingestFieldReadings([SensorReadingInput(fieldId=3, sensorId="probe-17", metric=prisma.enums.SensorMetric.SOIL_MOISTURE, recordedAt=datetime(2024, 5, 1, 6, 0), value=27.4)])
+    """
+    if len(readings) > MAX_BATCH_SIZE:
+        raise ValueError(f"A batch can hold at most {MAX_BATCH_SIZE} readings.")
+    field_ids = sorted({reading.fieldId for reading in readings})
+    fields = await prisma.models.Field.prisma().find_many(
+        where={"id": {"in": field_ids}}
+    )
+    unknown = set(field_ids) - {field.id for field in fields}
+    if unknown:
+        raise ValueError(f"Unknown field ids: {', '.join(map(str, sorted(unknown)))}.")
+    accepted = await record_readings(
+        [
+            (
+                reading.fieldId,
+                reading.sensorId,
+                reading.metric,
+                reading.recordedAt,
+                reading.value,
+            )
+            for reading in readings
+        ]
+    )
+    return IngestReadingsResponse(accepted=accepted, fieldIds=field_ids)
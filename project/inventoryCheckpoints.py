@@ -0,0 +1,141 @@
+"""
+Per-item stock checkpoints for point-in-time inventory queries.
+
+The inventory events are the history of every item's stock, so the stock at an instant is
+the sum of the item's events up to it. Rather than summing years of events, a checkpoint
+holds an item's running total at the end of each day on which it had events (takenAt is the
+following midnight; stockLevel sums the events dated before it). An as-of query takes the
+latest checkpoint at or before the instant and adds only the events since, which are at
+most the rest of that day's plus those not yet checkpointed; both lookups are index range
+scans, so any date resolves in bounded time.
+
+Checkpoints are built up to the current day at startup and every night after midnight,
+continuing each item from its latest checkpoint, under an advisory lock so that worker
+processes take turns. An event recorded with an earlier date, such as a purchase entered
+after the fact, removes the item's checkpoints after that date in the same transaction, and
+the next build recomputes them; as-of queries stay exact in between, only replaying more.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+import prisma
+from project.timestamps import to_utc
+
+BUILD_TIME = time(0, 30)
+_BUILD_LOCK_KEY = 49001
+
+logger = logging.getLogger(__name__)
+
+
+def day_start(moment: datetime) -> datetime:
+    return datetime.combine(moment.date(), time.min)
+
+
+async def build_checkpoints(now: Optional[datetime] = None) -> int:
+    """
+    Checkpoints every item's events from its latest checkpoint up to the start of the
+    current day. Returns the number of checkpoints written.
+    """
+    until = day_start(now or datetime.utcnow())
+    async with prisma.get_client().tx(timeout=timedelta(minutes=10)) as transaction:
+        await transaction.execute_raw(
+            "SELECT pg_advisory_xact_lock($1)", _BUILD_LOCK_KEY
+        )
+        return await transaction.execute_raw(
+            'INSERT INTO "InventoryCheckpoint" ("itemId", "takenAt", "stockLevel")'
+            ' SELECT i."id", d."day" + interval \'1 day\','
+            ' COALESCE(c."stockLevel", 0)'
+            ' + SUM(d."change") OVER (PARTITION BY i."id" ORDER BY d."day")'
+            ' FROM "Item" i LEFT JOIN LATERAL ('
+            ' SELECT "takenAt", "stockLevel" FROM "InventoryCheckpoint"'
+            ' WHERE "itemId" = i."id" ORDER BY "takenAt" DESC LIMIT 1'
+            " ) c ON TRUE JOIN LATERAL ("
+            ' SELECT date_trunc(\'day\', e."date") AS "day",'
+            ' SUM(e."quantityChange") AS "change" FROM "InventoryEvent" e'
+            ' WHERE e."itemId" = i."id"'
+            ' AND e."date" >= COALESCE(c."takenAt", \'-infinity\'::timestamp)'
+            ' AND e."date" < $1::timestamp GROUP BY 1'
+            " ) d ON TRUE"
+            ' ON CONFLICT ("itemId", "takenAt")'
+            ' DO UPDATE SET "stockLevel" = EXCLUDED."stockLevel"',
+            until,
+        )
+
+
+async def drop_checkpoints_after(
+    transaction: Any, item_dates: Dict[int, datetime]
+) -> None:
+    """
+    Removes the checkpoints that events backdated to the given dates make stale. Runs in
+    the transaction recording the events and waits for a build in progress.
+    """
+    today = day_start(datetime.utcnow())
+    earliest = {
+        item_id: to_utc(date)
+        for item_id, date in item_dates.items()
+        if to_utc(date) < today
+    }
+    if not earliest:
+        return
+    await transaction.execute_raw(
+        "SELECT pg_advisory_xact_lock_shared($1)", _BUILD_LOCK_KEY
+    )
+    for item_id, date in sorted(earliest.items()):
+        await transaction.execute_raw(
+            'DELETE FROM "InventoryCheckpoint"'
+            ' WHERE "itemId" = $1 AND "takenAt" > $2::timestamp',
+            item_id,
+            date,
+        )
+
+
+async def stock_as_of(
+    as_of: datetime, item_ids: Optional[List[int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Every item's (or the given items') stock at as_of, counting events dated up to and
+    including it, with the checkpoint the sum started from.
+    """
+    params: List[Any] = [to_utc(as_of)]
+    where = ""
+    if item_ids is not None:
+        if not item_ids:
+            return []
+        params.extend(item_ids)
+        placeholders = ", ".join(f"${slot}" for slot in range(2, len(params) + 1))
+        where = f' WHERE i."id" IN ({placeholders})'
+    return await prisma.get_client().query_raw(
+        'SELECT i."id", i."name", c."takenAt" AS "checkpointAt",'
+        ' (COALESCE(c."stockLevel", 0) + COALESCE(('
+        ' SELECT SUM(e."quantityChange") FROM "InventoryEvent" e'
+        ' WHERE e."itemId" = i."id"'
+        ' AND e."date" >= COALESCE(c."takenAt", \'-infinity\'::timestamp)'
+        ' AND e."date" <= $1::timestamp), 0))::int AS "stockLevel"'
+        ' FROM "Item" i LEFT JOIN LATERAL ('
+        ' SELECT "takenAt", "stockLevel" FROM "InventoryCheckpoint"'
+        ' WHERE "itemId" = i."id" AND "takenAt" <= $1::timestamp'
+        ' ORDER BY "takenAt" DESC LIMIT 1'
+        f" ) c ON TRUE{where}"
+        ' ORDER BY i."id"',
+        *params,
+    )
+
+
+async def build_nightly() -> None:
+    """
+    Checkpoints the previous day every night at BUILD_TIME until cancelled.
+    """
+    while True:
+        now = datetime.now()
+        next_run = datetime.combine(now.date(), BUILD_TIME)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        await asyncio.sleep((next_run - now).total_seconds())
+        try:
+            written = await build_checkpoints()
+            logger.info("Wrote %d inventory checkpoints", written)
+        except Exception:
+            logger.exception("Nightly inventory checkpoint build failed")
@@ -1,19 +1,12 @@
 from datetime import datetime
-from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import prisma
 import prisma.enums
 import prisma.models
 from pydantic import BaseModel
 
-
-class Category(Enum):
-    """
-    Enum representing different categories of items in inventory
-    """
-
-    value: str  # TODO(autogpt): "value" incorrectly overrides property of same name in class "Enum". reportIncompatibleMethodOverride
+MAX_PAGE_SIZE = 500
 
 
 class ItemOverview(BaseModel):
@@ -22,7 +15,7 @@ class ItemOverview(BaseModel):
     """
 
     name: str
-    category: Category
+    category: prisma.enums.Category
     quantity: int
 
 
@@ -36,14 +29,23 @@ class OrderOverview(BaseModel):
     deliveryStatus: prisma.enums.OrderStatus
 
 
+class DeliveryOrder(BaseModel):
+    """
+    An order carried by a delivery together with its line items.
+    """
+
+    orderDetails: OrderOverview
+    itemDetails: List[ItemOverview]
+
+
 class DeliveryDetail(BaseModel):
     """
     Detailed record for each delivery, including dates, items, and order information.
     """
 
+    deliveryId: int
     scheduledDate: datetime
-    itemDetails: List[ItemOverview]
-    orderDetails: OrderOverview
+    orders: List[DeliveryOrder]
 
 
 class DeliveriesResponse(BaseModel):
@@ -52,55 +54,114 @@ class DeliveriesResponse(BaseModel):
     """
 
     deliveries: List[DeliveryDetail]
+    nextCursor: Optional[str] = None
+
+
+def _encode_cursor(scheduled_on: datetime, schedule_id: int) -> str:
+    return f"{scheduled_on.isoformat()}_{schedule_id}"
 
 
-class ScheduleStatus(Enum):
-    PENDING: str = "PENDING"
-    COMPLETED: str = "COMPLETED"
-    CANCELLED: str = "CANCELLED"
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    scheduled_on, _, schedule_id = cursor.rpartition("_")
+    try:
+        return datetime.fromisoformat(scheduled_on), int(schedule_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor {cursor!r}.")
 
 
 async def listDeliveries(
     startDate: datetime,
     endDate: datetime,
-    status: ScheduleStatus,
-    itemCategory: Optional[Category],
+    status: prisma.enums.ScheduleStatus,
+    itemCategory: Optional[prisma.enums.Category],
+    cursor: Optional[str] = None,
+    limit: int = 100,
 ) -> DeliveriesResponse:
+    """
+    Lists scheduled deliveries of trees and other products within a date window. Line items are grouped per delivery
+    and order, the category filter is applied by the database, and results are paged with a keyset cursor over
+    (scheduledOn, id) so each page costs the same regardless of how far into the window it is.
+
+    Args:
+        startDate (datetime): Start of the delivery window (inclusive).
+        endDate (datetime): End of the delivery window (inclusive).
+        status (prisma.enums.ScheduleStatus): Only deliveries with this schedule status are returned.
+        itemCategory (Optional[prisma.enums.Category]): Only deliveries carrying items of this category are returned,
+            and only those line items are listed.
+        cursor (Optional[str]): The nextCursor value of the previous page, if any.
+        limit (int): Maximum number of deliveries in the page, at most MAX_PAGE_SIZE.
+
+    Returns:
+        DeliveriesResponse: Response model for the delivery list output, representing comprehensive delivery schedules including items, orders, and scheduled details.
+
+    Raises:
+        ValueError: If the page size is out of range or the cursor is malformed.
+
+    Example:
+        page = await listDeliveries(datetime(2023, 12, 1), datetime(2023, 12, 24), prisma.enums.ScheduleStatus.PENDING, None)
+        next_page = await listDeliveries(datetime(2023, 12, 1), datetime(2023, 12, 24), prisma.enums.ScheduleStatus.PENDING, None, page.nextCursor)
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+    where: Dict[str, Any] = {
+        "type": prisma.enums.ScheduleType.DELIVERY,
+        "status": status,
+        "scheduledOn": {"gte": startDate, "lte": endDate},
+    }
+    if cursor:
+        after_date, after_id = _decode_cursor(cursor)
+        where["OR"] = [
+            {"scheduledOn": {"gt": after_date}},
+            {"scheduledOn": after_date, "id": {"gt": after_id}},
+        ]
+    line_item_where: Dict[str, Any] = {}
+    if itemCategory is not None:
+        line_item_where = {"item": {"is": {"category": itemCategory}}}
+        where["orders"] = {"some": {"lineItems": {"some": line_item_where}}}
     schedules = await prisma.models.Schedule.prisma().find_many(
-        where={
-            "scheduledOn": {"gte": startDate, "lte": endDate},
-            "status": status,
-            "type": prisma.enums.ScheduleType.DELIVERY,
-        },
+        where=where,
         include={
-            "user": True,
-            "orders": {"include": {"lineItems": {"include": {"item": True}}}},
+            "orders": {
+                "include": {
+                    "customer": True,
+                    "lineItems": {"where": line_item_where, "include": {"item": True}},
+                }
+            }
         },
+        order=[{"scheduledOn": "asc"}, {"id": "asc"}],
+        take=limit + 1,
     )
-    delivery_details_list = []
+    next_cursor = None
+    if len(schedules) > limit:
+        schedules = schedules[:limit]
+        next_cursor = _encode_cursor(schedules[-1].scheduledOn, schedules[-1].id)
+    deliveries = []
     for schedule in schedules:
-        for (
-            order
-        ) in (
-            schedule.orders
-        ):  # TODO(autogpt): Cannot access member "orders" for type "Schedule"
-            #     Member "orders" is unknown. reportAttributeAccessIssue
-            for line_item in order.lineItems:
-                if itemCategory is None or line_item.item.category == itemCategory:
-                    item_overview = ItemOverview(
+        delivery_orders = [
+            DeliveryOrder(
+                orderDetails=OrderOverview(
+                    orderId=order.id,
+                    customerName=order.customer.name if order.customer else "Unknown",
+                    deliveryStatus=order.status,
+                ),
+                itemDetails=[
+                    ItemOverview(
                         name=line_item.item.name,
                         category=line_item.item.category,
                         quantity=line_item.quantity,
                     )
-                    order_overview = OrderOverview(
-                        orderId=order.id,
-                        customerName=order.customer.name,
-                        deliveryStatus=order.status,
-                    )
-                    delivery_detail = DeliveryDetail(
-                        scheduledDate=schedule.scheduledOn,
-                        itemDetails=[item_overview],
-                        orderDetails=order_overview,
-                    )
-                    delivery_details_list.append(delivery_detail)
-    return DeliveriesResponse(deliveries=delivery_details_list)
+                    for line_item in order.lineItems or []
+                    if line_item.item
+                ],
+            )
+            for order in schedule.orders or []
+            if itemCategory is None or order.lineItems
+        ]
+        deliveries.append(
+            DeliveryDetail(
+                deliveryId=schedule.id,
+                scheduledDate=schedule.scheduledOn,
+                orders=delivery_orders,
+            )
+        )
+    return DeliveriesResponse(deliveries=deliveries, nextCursor=next_cursor)
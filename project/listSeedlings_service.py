@@ -1,8 +1,9 @@
 from enum import Enum
-from typing import List
+from typing import List, Optional
 
 import prisma
 import prisma.models
+from project.demandForecast import days_to_stockout, reorder_level
 from pydantic import BaseModel
 
 
@@ -23,6 +24,9 @@ class SaplingDetails(BaseModel):
     name: str
     stockLevel: int
     reOrderNeed: bool
+    reorderLevel: int
+    dailyDemand: float = 0.0
+    daysToStockout: Optional[float] = None
 
 
 class FetchSeedlingsResponse(BaseModel):
@@ -35,7 +39,7 @@ class FetchSeedlingsResponse(BaseModel):
 
 async def listSeedlings(category: Category) -> FetchSeedlingsResponse:
     """
-    Retrieves a list of all seedlings available for purchase. This function filters seedlings based on the category and combined with the reOrderNeed flag.
+    Retrieves a list of all seedlings available for purchase. This function filters seedlings based on the category and combined with the reOrderNeed flag. Each seedling carries its forecast daily demand, the reorder level derived from it and the days until its stock runs out, all read from the precomputed forecasts. Flagged items are found through the partial index over items needing reorder, so the lookup does not scan the items that are stocked.
 
     Args:
         category (Category): Specifies the category of items to fetch seedlings.
@@ -44,7 +48,8 @@ async def listSeedlings(category: Category) -> FetchSeedlingsResponse:
         FetchSeedlingsResponse: Provides a listing of seedlings available for purchase based on the reOrderNeed flag and categorization. Each seedling has key details included to assist in purchasing decisions.
     """
     items = await prisma.models.Item.prisma().find_many(
-        where={"category": category.name, "reOrderNeed": True}
+        where={"category": category.name, "reOrderNeed": True},
+        include={"forecast": True},
     )
     seedlings = [
         SaplingDetails(
@@ -52,6 +57,9 @@ async def listSeedlings(category: Category) -> FetchSeedlingsResponse:
             name=item.name,
             stockLevel=item.stockLevel,
             reOrderNeed=item.reOrderNeed,
+            reorderLevel=reorder_level(item, item.forecast),
+            dailyDemand=item.forecast.dailyDemand if item.forecast else 0.0,
+            daysToStockout=days_to_stockout(item.stockLevel, item.forecast),
         )
         for item in items
     ]
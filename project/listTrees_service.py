@@ -0,0 +1,104 @@
+from typing import List, Optional
+
+from project.treeRegistry import tree_registry
+from pydantic import BaseModel
+
+MAX_PAGE_SIZE = 1000
+
+
+class TreeRecord(BaseModel):
+    """
+    One registered tree with its place in the field, species and planting year.
+    """
+
+    id: int
+    fieldId: int
+    row: int
+    position: int
+    species: str
+    plantingYear: int
+
+
+class TreeCohort(BaseModel):
+    """
+    Number of matching trees of one species planted in one year.
+    """
+
+    species: str
+    plantingYear: int
+    count: int
+
+
+class TreeListResponse(BaseModel):
+    """
+    A page of the matching trees in id order, their total count and their cohorts.
+    """
+
+    total: int
+    trees: List[TreeRecord]
+    cohorts: List[TreeCohort]
+
+
+async def listTrees(
+    fieldId: Optional[int] = None,
+    species: Optional[str] = None,
+    plantingYear: Optional[int] = None,
+    offset: int = 0,
+    limit: int = 100,
+) -> TreeListResponse:
+    """
+    Lists registered trees filtered by field, species and planting year, together with the per-cohort counts of all matching trees. Answered from the in-memory registry arrays, so even field-wide or farm-wide counts never load tree rows from the database.
+
+    Args:
+        fieldId (Optional[int]): Only trees in this field.
+        species (Optional[str]): Only trees of this species.
+        plantingYear (Optional[int]): Only trees planted in this year.
+        offset (int): Number of matching trees to skip.
+        limit (int): Maximum number of trees to return.
+
+    Returns:
+        TreeListResponse: A page of the matching trees in id order, their total count and their cohorts.
+
+    Raises:
+        ValueError: If the page size is out of range.
+
+    Example:
+        page = await listTrees(fieldId=3, species="Fraser Fir")
+        print(page.total, [(c.plantingYear, c.count) for c in page.cohorts])
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE or offset < 0:
+        raise ValueError(
+            f"limit must be between 1 and {MAX_PAGE_SIZE} and offset not negative."
+        )
+    species_id = None
+    if species is not None:
+        species_id = next(
+            (key for key, name in tree_registry.species.items() if name == species),
+            -1,
+        )
+    indexes = tree_registry.select(fieldId, species_id, plantingYear)
+    trees = []
+    for index in indexes[offset : offset + limit]:
+        record = tree_registry.record(index)
+        trees.append(
+            TreeRecord(
+                id=record["id"],
+                fieldId=record["fieldId"],
+                row=record["row"],
+                position=record["position"],
+                species=tree_registry.species.get(record["speciesId"], ""),
+                plantingYear=record["plantingYear"],
+            )
+        )
+    return TreeListResponse(
+        total=len(indexes),
+        trees=trees,
+        cohorts=[
+            TreeCohort(
+                species=tree_registry.species.get(cohort["speciesId"], ""),
+                plantingYear=cohort["plantingYear"],
+                count=cohort["count"],
+            )
+            for cohort in tree_registry.cohorts(indexes)
+        ],
+    )
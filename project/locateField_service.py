@@ -0,0 +1,59 @@
+from typing import List, Optional
+
+from project.fieldIndex import field_index
+from pydantic import BaseModel
+
+
+class FieldMatch(BaseModel):
+    """
+    A field found by a spatial lookup, with its distance from the queried point in metres when one was given.
+    """
+
+    fieldId: int
+    layoutId: int
+    name: str
+    distanceMeters: Optional[float] = None
+
+
+class FieldLocationResponse(BaseModel):
+    """
+    The fields containing the point and the field nearest to it.
+    """
+
+    containing: List[FieldMatch]
+    nearest: Optional[FieldMatch] = None
+
+
+def _match(field_id: int, distance: Optional[float] = None) -> FieldMatch:
+    shape = field_index.shapes[field_id]
+    return FieldMatch(
+        fieldId=field_id,
+        layoutId=shape.layout_id,
+        name=shape.name,
+        distanceMeters=None if distance is None else round(distance, 2),
+    )
+
+
+async def locateField(latitude: float, longitude: float) -> FieldLocationResponse:
+    """
+    Finds the fields containing a point and the field nearest to it, for crews locating themselves on the farm. Both answers come from the in-process spatial index, without a database round trip.
+
+    Args:
+        latitude (float): Latitude of the point.
+        longitude (float): Longitude of the point.
+
+    Returns:
+        FieldLocationResponse: The fields containing the point and the field nearest to it.
+
+    Example:
+        location = await locateField(45.0123, -122.0456)
+        print(location.nearest.name, location.nearest.distanceMeters)
+    """
+    nearest = field_index.nearest(latitude, longitude)
+    return FieldLocationResponse(
+        containing=[
+            _match(field_id, 0.0)
+            for field_id in field_index.containing(latitude, longitude)
+        ],
+        nearest=_match(*nearest) if nearest else None,
+    )
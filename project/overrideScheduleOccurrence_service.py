@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.recurringSchedules import occurrences_between, parse_rrule
+from project.timestamps import to_utc
+from project.treatmentWindow import invalidate_treatment_window
+from pydantic import BaseModel
+
+
+class ScheduleOccurrenceResponse(BaseModel):
+    """
+    Confirms the exception recorded for a single occurrence of a recurring schedule.
+    """
+
+    success: bool
+    message: str
+    exceptionId: Optional[int] = None
+
+
+async def overrideScheduleOccurrence(
+    ruleId: int,
+    occurrenceOn: datetime,
+    cancelled: bool,
+    scheduledOn: Optional[datetime],
+    endsOn: Optional[datetime],
+    userId: Optional[int],
+    status: Optional[prisma.enums.ScheduleStatus],
+) -> ScheduleOccurrenceResponse:
+    """
+    Cancels, moves, reassigns or changes the status of one occurrence of a recurring schedule. Only the exception is stored; the other occurrences remain implied by the rule.
+
+    Args:
+        ruleId (int): The recurring schedule.
+        occurrenceOn (datetime): The original start of the occurrence being overridden.
+        cancelled (bool): Whether the occurrence is skipped entirely.
+        scheduledOn (Optional[datetime]): New start, when the occurrence is moved.
+        endsOn (Optional[datetime]): New end, when the occurrence is moved or shortened.
+        userId (Optional[int]): Staff member taking over this occurrence.
+        status (Optional[prisma.enums.ScheduleStatus]): Status of this occurrence, e.g. COMPLETED.
+
+    Returns:
+        ScheduleOccurrenceResponse: Confirms the exception recorded for a single occurrence of a recurring schedule.
+    """
+    rule = await prisma.models.ScheduleRule.prisma().find_unique(where={"id": ruleId})
+    if rule is None:
+        return ScheduleOccurrenceResponse(
+            success=False, message=f"No recurring schedule found with ID {ruleId}."
+        )
+    occurrence = to_utc(occurrenceOn)
+    if occurrence not in occurrences_between(
+        rule.startsOn,
+        parse_rrule(rule.rrule),
+        occurrence,
+        occurrence + timedelta(seconds=1),
+    ):
+        return ScheduleOccurrenceResponse(
+            success=False,
+            message="The rule has no occurrence starting at the given time.",
+        )
+    fields = {
+        "cancelled": cancelled,
+        "scheduledOn": scheduledOn,
+        "endsOn": endsOn,
+        "userId": userId,
+        "status": status,
+    }
+    exception = await prisma.models.ScheduleException.prisma().upsert(
+        where={"ruleId_occurrenceOn": {"ruleId": ruleId, "occurrenceOn": occurrence}},
+        data={
+            "create": {"ruleId": ruleId, "occurrenceOn": occurrence, **fields},
+            "update": fields,
+        },
+    )
+    if rule.type == prisma.enums.ScheduleType.TREATMENT:
+        invalidate_treatment_window()
+    return ScheduleOccurrenceResponse(
+        success=True, message="Occurrence updated.", exceptionId=exception.id
+    )
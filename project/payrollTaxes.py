@@ -0,0 +1,108 @@
+"""
+Versioned payroll deduction rules compiled into NumPy arrays.
+
+Every TaxRule withholds rate times the part of a pay amount falling in [lowerBound,
+upperBound). PERIOD rules measure that against the payment alone; YEAR_TO_DATE rules measure
+it against the employee's cumulative gross for the year, so the portion of this payment lying
+between ytd and ytd + gross is what counts. Both are the same formula with the starting point
+set to 0 or to ytd, which lets a whole rule set become four arrays and a payroll run of any size
+one broadcast over (employees x rules).
+
+Rule sets are immutable once stored, so compiled versions are cached for the life of the
+process and a run can always be recomputed from the version it recorded.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import prisma
+import prisma.enums
+import prisma.models
+
+
+class CompiledTaxRules:
+    """
+    One rule set version as parallel arrays, one entry per rule.
+    """
+
+    def __init__(self, ruleset: prisma.models.TaxRuleSet) -> None:
+        rules = ruleset.rules or []
+        self.version = ruleset.version
+        self.effective_from = ruleset.effectiveFrom
+        self.rate = np.array([rule.rate for rule in rules], dtype=np.float64)
+        self.lower = np.array([rule.lowerBound for rule in rules], dtype=np.float64)
+        self.upper = np.array(
+            [np.inf if rule.upperBound is None else rule.upperBound for rule in rules],
+            dtype=np.float64,
+        )
+        self.year_to_date = np.array(
+            [rule.basis == prisma.enums.TaxRuleBasis.YEAR_TO_DATE for rule in rules],
+            dtype=bool,
+        )
+
+    def deductions(self, gross: np.ndarray, ytd_gross: np.ndarray) -> np.ndarray:
+        """
+        Deductions in cents-rounded currency for each (gross, year-to-date gross) pair.
+        """
+        gross = np.asarray(gross, dtype=np.float64)[:, None]
+        before = np.where(
+            self.year_to_date, np.asarray(ytd_gross, dtype=np.float64)[:, None], 0.0
+        )
+        after = before + gross
+        taxable = np.minimum(after, self.upper) - np.maximum(before, self.lower)
+        withheld = (np.clip(taxable, 0.0, None) * self.rate).sum(axis=1)
+        return np.round(withheld, 2)
+
+
+_compiled: Dict[str, CompiledTaxRules] = {}
+_lock = asyncio.Lock()
+
+
+async def load_tax_rules(
+    version: Optional[str] = None, payment_date: Optional[datetime] = None
+) -> CompiledTaxRules:
+    """
+    Returns the compiled rule set with the given version or, without one, the version in
+    effect on payment_date (default now).
+
+    Raises:
+        ValueError: If no matching rule set exists.
+    """
+    if version is not None and version in _compiled:
+        return _compiled[version]
+    if version is not None:
+        where = {"version": version}
+    else:
+        where = {"effectiveFrom": {"lte": payment_date or datetime.now()}}
+    ruleset = await prisma.models.TaxRuleSet.prisma().find_first(
+        where=where, order={"effectiveFrom": "desc"}
+    )
+    if ruleset is None:
+        raise ValueError("No payroll tax rules are in effect for this payment.")
+    if ruleset.version not in _compiled:
+        async with _lock:
+            if ruleset.version not in _compiled:
+                ruleset = await prisma.models.TaxRuleSet.prisma().find_unique(
+                    where={"id": ruleset.id}, include={"rules": True}
+                )
+                _compiled[ruleset.version] = CompiledTaxRules(ruleset)
+    return _compiled[ruleset.version]
+
+
+async def year_to_date_gross(user_ids: List[int], before: datetime) -> Dict[int, float]:
+    """
+    Gross pay per employee from the start of before's year up to before.
+    """
+    if not user_ids:
+        return {}
+    groups = await prisma.models.Payroll.prisma().group_by(
+        by=["userId"],
+        where={
+            "userId": {"in": user_ids},
+            "paymentDate": {"gte": datetime(before.year, 1, 1), "lt": before},
+        },
+        sum={"paymentAmount": True},
+    )
+    return {group["userId"]: group["_sum"]["paymentAmount"] or 0.0 for group in groups}
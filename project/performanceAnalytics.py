@@ -0,0 +1,69 @@
+"""
+Per-user review statistics maintained on write.
+
+Every create, update or delete of a PerformanceReview refreshes the PerformanceSummary row of
+that one user from two small indexed reads: the totals of their reviews and their latest
+2 * ROLLING_WINDOW reviews. The rolling average covers the latest ROLLING_WINDOW reviews and
+the trend is how far it moved from the window before. Reports read the summaries instead of
+the reviews, role figures are a group-by over one row per user, and leaderboards walk the
+(role, rollingAverage) index from either end.
+"""
+
+import prisma
+import prisma.models
+
+ROLLING_WINDOW = 5
+
+
+async def refresh_user_summary(user_id: int) -> None:
+    """
+    Recomputes the summary of one user, removing it when they have no reviews left.
+    """
+    totals = await prisma.models.PerformanceReview.prisma().group_by(
+        by=["userId"],
+        where={"userId": user_id},
+        sum={"score": True},
+        count=True,
+    )
+    if not totals:
+        await prisma.models.PerformanceSummary.prisma().delete_many(
+            where={"userId": user_id}
+        )
+        return
+    recent = await prisma.models.PerformanceReview.prisma().find_many(
+        where={"userId": user_id},
+        order=[{"reviewDate": "desc"}, {"id": "desc"}],
+        take=2 * ROLLING_WINDOW,
+    )
+    user = await prisma.models.User.prisma().find_unique(where={"id": user_id})
+    count = totals[0]["_count"]["_all"]
+    window = [review.score for review in recent[:ROLLING_WINDOW]]
+    previous = [review.score for review in recent[ROLLING_WINDOW:]]
+    rolling = sum(window) / len(window)
+    summary = {
+        "role": user.role,
+        "reviewCount": count,
+        "averageScore": totals[0]["_sum"]["score"] / count,
+        "latestScore": recent[0].score,
+        "latestReviewDate": recent[0].reviewDate,
+        "rollingAverage": rolling,
+        "trend": rolling - sum(previous) / len(previous) if previous else 0.0,
+    }
+    await prisma.models.PerformanceSummary.prisma().upsert(
+        where={"userId": user_id},
+        data={
+            "create": {"user": {"connect": {"id": user_id}}, **summary},
+            "update": summary,
+        },
+    )
+
+
+async def backfill_summaries() -> None:
+    """
+    Creates the summaries of reviewed users that do not have one yet, such as after an upgrade.
+    """
+    users = await prisma.models.User.prisma().find_many(
+        where={"performanceReviews": {"some": {}}, "performanceSummary": {"is": None}}
+    )
+    for user in users:
+        await refresh_user_summary(user.id)
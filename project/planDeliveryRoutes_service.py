@@ -0,0 +1,169 @@
+from datetime import date, datetime, time, timedelta
+from typing import List
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.deliveryRouting import RouteStop, TruckType, plan_routes
+from pydantic import BaseModel
+
+
+class PlannedStop(BaseModel):
+    """
+    A delivery stop on a truck run, in visiting order.
+    """
+
+    deliveryId: int
+    destination: str
+    latitude: float
+    longitude: float
+    load: int
+
+
+class PlannedRun(BaseModel):
+    """
+    One trip of one truck from the depot through its stops and back.
+    """
+
+    truckItemId: int
+    truckName: str
+    truckNumber: int
+    tripNumber: int
+    capacity: int
+    load: int
+    distanceKm: float
+    stops: List[PlannedStop]
+
+
+class DeliveryRoutePlanResponse(BaseModel):
+    """
+    The truck runs planned for a day, plus the deliveries that could not be routed because their destination is not geocoded or no truck can carry them.
+    """
+
+    day: date
+    runs: List[PlannedRun]
+    unroutedDeliveryIds: List[int]
+    message: str
+
+
+def normalize_address(address: str) -> str:
+    """
+    Normalizes a free-text destination the same way addresses are stored in the GeocodedAddress table.
+    """
+    return " ".join(address.lower().split())
+
+
+async def planDeliveryRoutes(
+    day: date, depotLatitude: float, depotLongitude: float
+) -> DeliveryRoutePlanResponse:
+    """
+    Plans the truck runs for a day's pending deliveries. Destinations are resolved through the local GeocodedAddress lookup table, truck capacity comes from TRUCK category items, and stops are clustered and sequenced with the savings heuristic plus 2-opt.
+
+    Args:
+        day (date): The delivery day to plan.
+        depotLatitude (float): Latitude of the depot the trucks leave from.
+        depotLongitude (float): Longitude of the depot the trucks leave from.
+
+    Returns:
+        DeliveryRoutePlanResponse: The truck runs planned for a day, plus the deliveries that could not be routed because their destination is not geocoded or no truck can carry them.
+
+    Example:
+        plan = await planDeliveryRoutes(date(2023, 12, 16), 44.9778, -93.2650)
+        for run in plan.runs:
+            print(run.truckName, run.tripNumber, [stop.deliveryId for stop in run.stops])
+    """
+    day_start = datetime.combine(day, time.min)
+    schedules = await prisma.models.Schedule.prisma().find_many(
+        where={
+            "type": prisma.enums.ScheduleType.DELIVERY,
+            "status": prisma.enums.ScheduleStatus.PENDING,
+            "scheduledOn": {"gte": day_start, "lt": day_start + timedelta(days=1)},
+        },
+        include={"orders": {"include": {"lineItems": True}}},
+    )
+    addresses = {
+        normalize_address(schedule.destination)
+        for schedule in schedules
+        if schedule.destination
+    }
+    geocoded = await prisma.models.GeocodedAddress.prisma().find_many(
+        where={"address": {"in": list(addresses)}}
+    )
+    positions = {row.address: (row.latitude, row.longitude) for row in geocoded}
+    stops = []
+    destinations = {}
+    unrouted = []
+    for schedule in schedules:
+        position = (
+            positions.get(normalize_address(schedule.destination))
+            if schedule.destination
+            else None
+        )
+        if position is None:
+            unrouted.append(schedule.id)
+            continue
+        destinations[schedule.id] = schedule.destination
+        stops.append(
+            RouteStop(
+                deliveryId=schedule.id,
+                latitude=position[0],
+                longitude=position[1],
+                demand=sum(
+                    line_item.quantity
+                    for order in schedule.orders or []
+                    for line_item in order.lineItems or []
+                ),
+            )
+        )
+    truck_items = await prisma.models.Item.prisma().find_many(
+        where={
+            "category": prisma.enums.Category.TRUCK,
+            "stockLevel": {"gt": 0},
+            "loadCapacity": {"gt": 0},
+        }
+    )
+    trucks = [
+        TruckType(
+            itemId=item.id,
+            name=item.name,
+            capacity=item.loadCapacity,
+            count=item.stockLevel,
+        )
+        for item in truck_items
+    ]
+    plan = plan_routes((depotLatitude, depotLongitude), stops, trucks)
+    stops_by_id = {stop.deliveryId: stop for stop in stops}
+    runs = [
+        PlannedRun(
+            truckItemId=run.truckItemId,
+            truckName=run.truckName,
+            truckNumber=run.truckNumber,
+            tripNumber=run.tripNumber,
+            capacity=run.capacity,
+            load=run.load,
+            distanceKm=run.distanceKm,
+            stops=[
+                PlannedStop(
+                    deliveryId=delivery_id,
+                    destination=destinations[delivery_id],
+                    latitude=stops_by_id[delivery_id].latitude,
+                    longitude=stops_by_id[delivery_id].longitude,
+                    load=stops_by_id[delivery_id].demand,
+                )
+                for delivery_id in run.deliveryIds
+            ],
+        )
+        for run in plan.runs
+    ]
+    unrouted.extend(plan.unplannedDeliveryIds)
+    if not trucks:
+        message = "No trucks with a load capacity are available."
+    elif unrouted:
+        message = (
+            f"Planned {len(runs)} runs; {len(unrouted)} deliveries could not be routed."
+        )
+    else:
+        message = f"Planned {len(runs)} runs for {len(stops)} deliveries."
+    return DeliveryRoutePlanResponse(
+        day=day, runs=runs, unroutedDeliveryIds=unrouted, message=message
+    )
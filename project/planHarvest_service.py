@@ -0,0 +1,225 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import prisma
+import prisma.enums
+import prisma.models
+from project.harvestPlanning import HarvestDemand, HarvestPlan, plan_harvest
+from project.stockProjection import DEFAULT_HARVEST_AGES
+from project.treeRegistry import tree_registry
+from project.workerPool import run_in_process
+
+MAX_PLAN_DAYS = 366
+INSERT_CHUNK_SIZE = 10_000
+# Supply keys pack field, species and row into one int64, sorting by field, species and row.
+_FIELD_SHIFT = 32
+_SPECIES_SHIFT = 16
+# Serialises plan commits so two plans cannot book the same trees.
+HARVEST_PLAN_LOCK_KEY = 46_001
+
+
+class HarvestPlanResponse(HarvestPlan):
+    """
+    The drafted harvests in day and field order, the demand left uncovered, the plan's truck trips and crew moves, and the ids of the HARVESTING schedules written if the plan was committed.
+    """
+
+    scheduleIds: List[int] = []
+
+
+def _supply_key(field_id: Any, species_id: Any, row: Any) -> Any:
+    return (field_id << _FIELD_SHIFT) | (species_id << _SPECIES_SHIFT) | row
+
+
+async def _planned(client: Any) -> Dict[int, int]:
+    """
+    Trees already planned for harvest by schedules that are not cancelled, per supply key.
+    """
+    rows = await client.query_raw(
+        'SELECT h."fieldId", r."row", r."speciesId", SUM(r."trees")::int AS "trees"'
+        ' FROM "HarvestRow" r JOIN "Harvest" h ON h."scheduleId" = r."scheduleId"'
+        ' JOIN "Schedule" s ON s."id" = h."scheduleId"'
+        " WHERE s.\"status\" <> 'CANCELLED'"
+        ' GROUP BY h."fieldId", r."row", r."speciesId"'
+    )
+    return {
+        _supply_key(row["fieldId"], row["speciesId"], row["row"]): row["trees"]
+        for row in rows
+    }
+
+
+async def _harvestable(
+    season: int, field_ids: Optional[List[int]], planned: Dict[int, int]
+) -> Dict[str, np.ndarray]:
+    """
+    Trees old enough to harvest in the season per field, species and row, less dead trees and
+    the planned trees.
+    """
+    columns = tree_registry.columns
+    species = columns["speciesId"].astype(np.int64)
+    min_age = np.full(
+        int(species.max(initial=0)) + 1, DEFAULT_HARVEST_AGES[0], dtype=np.int64
+    )
+    for record in await prisma.models.TreeSpecies.prisma().find_many():
+        if record.id < len(min_age):
+            min_age[record.id] = record.minHarvestAge
+    mature = season - columns["plantingYear"] >= min_age[species]
+    if field_ids is not None:
+        mature &= np.isin(columns["fieldId"], field_ids)
+    dead_rows = await prisma.get_client().query_raw(
+        'SELECT "treeId" FROM "TreeHealthLatest" WHERE "status" = \'DEAD\''
+    )
+    dead = tree_registry.positions([row["treeId"] for row in dead_rows])
+    mature[dead[dead >= 0]] = False
+    keys, counts = np.unique(
+        _supply_key(
+            columns["fieldId"][mature].astype(np.int64),
+            species[mature],
+            columns["row"][mature].astype(np.int64),
+        ),
+        return_counts=True,
+    )
+    if planned and len(keys):
+        planned_keys = np.fromiter(planned, dtype=np.int64, count=len(planned))
+        slots = np.minimum(np.searchsorted(keys, planned_keys), len(keys) - 1)
+        hit = keys[slots] == planned_keys
+        np.subtract.at(
+            counts,
+            slots[hit],
+            np.fromiter(planned.values(), dtype=np.int64, count=len(planned))[hit],
+        )
+    available = counts > 0
+    keys, counts = keys[available], counts[available]
+    return {
+        "fieldId": keys >> _FIELD_SHIFT,
+        "speciesId": (keys >> _SPECIES_SHIFT) & 0xFFFF,
+        "row": keys & 0xFFFF,
+        "count": counts,
+    }
+
+
+async def planHarvest(
+    demand: List[HarvestDemand],
+    crews: int,
+    crewDailyCapacity: int = 400,
+    truckCapacity: int = 500,
+    fieldIds: Optional[List[int]] = None,
+    shiftStart: time = time(7),
+    shiftHours: float = 8.0,
+    commit: bool = False,
+) -> HarvestPlanResponse:
+    """
+    Plans which fields and rows to harvest on which days to meet the forecast demand, keeping truck trips and crew moves down. Harvestable trees are the registered trees old enough for their species, less dead trees and trees already planned for harvest. The planning runs in the shared process pool; when committed, every day of cutting in a field becomes one HARVESTING schedule with its harvest rows, all written in one transaction. Commits take turns under an advisory lock and re-read the planned trees first, so a plan whose trees another plan booked in the meantime is rejected instead of double-booking them.
+
+    Args:
+        demand (List[HarvestDemand]): Trees needed per day, of one species or of any.
+        crews (int): Number of harvest crews available every day.
+        crewDailyCapacity (int): Trees one crew cuts in a day.
+        truckCapacity (int): Trees one truck trip carries.
+        fieldIds (Optional[List[int]]): Only harvest these fields.
+        shiftStart (time): When the crews start cutting.
+        shiftHours (float): Length of a day of cutting.
+        commit (bool): Write the plan as HARVESTING schedules instead of only returning it.
+
+    Returns:
+        HarvestPlanResponse: The drafted harvests in day and field order, the demand left uncovered, the plan's truck trips and crew moves, and the ids of the HARVESTING schedules written if the plan was committed.
+
+    Raises:
+        ValueError: If a parameter is out of range, the demand spans more than a year or a committed plan's trees were booked by another plan meanwhile.
+
+    Example:
+        plan = await planHarvest(
+            [HarvestDemand(day=date(2023, 12, 2), species="Fraser Fir", quantity=1200)],
+            crews=4,
+        )
+        print(plan.truckTrips, plan.unmet)
+    """
+    if crews < 1 or crewDailyCapacity < 1 or truckCapacity < 1:
+        raise ValueError("crews, crewDailyCapacity and truckCapacity must be positive.")
+    if not 0 < shiftHours <= 24:
+        raise ValueError("shiftHours must be greater than 0 and at most 24.")
+    if any(entry.quantity < 0 for entry in demand):
+        raise ValueError("Demand quantities cannot be negative.")
+    if not demand:
+        return HarvestPlanResponse(harvests=[], unmet=[], truckTrips=0, crewMoves=0)
+    first_day = min(entry.day for entry in demand)
+    if (max(entry.day for entry in demand) - first_day).days >= MAX_PLAN_DAYS:
+        raise ValueError(f"A plan can span at most {MAX_PLAN_DAYS} days.")
+    planned = await _planned(prisma.get_client())
+    supply = await _harvestable(first_day.year, fieldIds, planned)
+    species_ids = {
+        species.name: species.id
+        for species in await prisma.models.TreeSpecies.prisma().find_many()
+    }
+    plan = await run_in_process(
+        plan_harvest,
+        demand,
+        supply,
+        species_ids,
+        crews,
+        crewDailyCapacity,
+        truckCapacity,
+    )
+    response = HarvestPlanResponse(**plan.model_dump())
+    if not commit or not plan.harvests:
+        return response
+    left = dict(
+        zip(
+            _supply_key(supply["fieldId"], supply["speciesId"], supply["row"]).tolist(),
+            supply["count"].tolist(),
+        )
+    )
+    booked: Dict[int, int] = defaultdict(int)
+    for harvest in plan.harvests:
+        for row in harvest.rows:
+            booked[
+                _supply_key(harvest.fieldId, species_ids[row.species], row.row)
+            ] += row.trees
+    rows = []
+    async with prisma.get_client().tx(timeout=timedelta(minutes=1)) as transaction:
+        await transaction.execute_raw(
+            "SELECT pg_advisory_xact_lock($1)", HARVEST_PLAN_LOCK_KEY
+        )
+        current = await _planned(transaction)
+        if any(
+            trees + current.get(key, 0) - planned.get(key, 0) > left.get(key, 0)
+            for key, trees in booked.items()
+        ):
+            raise ValueError(
+                "Some of the trees were planned for harvest by another plan meanwhile;"
+                " plan again."
+            )
+        for harvest in plan.harvests:
+            start = datetime.combine(harvest.day, shiftStart)
+            schedule = await prisma.models.Schedule.prisma(transaction).create(
+                data={
+                    "scheduledOn": start,
+                    "endsOn": start + timedelta(hours=shiftHours),
+                    "type": prisma.enums.ScheduleType.HARVESTING,
+                    "status": prisma.enums.ScheduleStatus.PENDING,
+                    "harvest": {
+                        "create": {
+                            "fieldId": harvest.fieldId,
+                            "crews": len(harvest.crews),
+                            "trees": harvest.trees,
+                            "truckTrips": harvest.truckTrips,
+                        }
+                    },
+                }
+            )
+            response.scheduleIds.append(schedule.id)
+            rows.extend(
+                {
+                    "scheduleId": schedule.id,
+                    "row": row.row,
+                    "speciesId": species_ids[row.species],
+                    "trees": row.trees,
+                }
+                for row in harvest.rows
+            )
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            await prisma.models.HarvestRow.prisma(transaction).create_many(
+                data=rows[start : start + INSERT_CHUNK_SIZE]
+            )
+    return response
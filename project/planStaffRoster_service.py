@@ -0,0 +1,101 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Tuple
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.recurringSchedules import expand_rules
+from project.rosterPlanning import (
+    DEFAULT_MAX_SHIFTS_PER_WEEK,
+    CoverageRequirement,
+    DraftShift,
+    StaffAvailability,
+    StaffMember,
+    UnfilledRequirement,
+    plan_roster,
+)
+from project.timestamps import to_utc
+from project.workerPool import run_in_process
+from pydantic import BaseModel
+
+
+class RosterResponse(BaseModel):
+    """
+    The drafted roster, ready to be inserted into Schedule in bulk, and the requirements it could not fully cover.
+    """
+
+    shifts: List[DraftShift]
+    unfilled: List[UnfilledRequirement]
+
+
+async def planStaffRoster(
+    requirements: List[CoverageRequirement], availability: List[StaffAvailability]
+) -> RosterResponse:
+    """
+    Drafts a roster covering the given requirements per day and role. Staff of the requested roles are matched against their availability, weekly shift caps and the shifts they already hold, stored or recurring, and the planning itself runs in the shared process pool so the API stays responsive. Nothing is written; the drafted shifts map one to one onto Schedule rows.
+
+    Args:
+        requirements (List[CoverageRequirement]): How many people of each role every shift needs.
+        availability (List[StaffAvailability]): Days people cannot work and their weekly shift caps. Staff without an entry are available every day for up to five shifts a week.
+
+    Returns:
+        RosterResponse: The drafted roster, ready to be inserted into Schedule in bulk, and the requirements it could not fully cover.
+
+    Example:
+        roster = await planStaffRoster(
+            [CoverageRequirement(day=date(2023, 12, 16), role="FIELD_MANAGER", type="HARVESTING", shiftStart=time(7), durationMinutes=480, headcount=6)],
+            [StaffAvailability(userId=4, unavailableDays=[date(2023, 12, 16)])],
+        )
+        print(len(roster.shifts), roster.unfilled)
+    """
+    if not requirements:
+        return RosterResponse(shifts=[], unfilled=[])
+    users = await prisma.models.User.prisma().find_many(
+        where={"role": {"in": list({requirement.role for requirement in requirements})}}
+    )
+    user_ids = [user.id for user in users]
+    start = datetime.combine(min(r.day for r in requirements), time.min) - timedelta(
+        days=1
+    )
+    end = datetime.combine(max(r.day for r in requirements), time.min) + timedelta(
+        days=2
+    )
+    busy: Dict[int, List[Tuple[datetime, datetime]]] = defaultdict(list)
+    schedules = await prisma.models.Schedule.prisma().find_many(
+        where={
+            "userId": {"in": user_ids},
+            "status": {"not": prisma.enums.ScheduleStatus.CANCELLED},
+            "endsOn": {"gt": start},
+            "scheduledOn": {"lt": end},
+        }
+    )
+    for schedule in schedules:
+        busy[schedule.userId].append(
+            (
+                to_utc(schedule.scheduledOn),
+                to_utc(schedule.endsOn),
+            )
+        )
+    for occurrence in await expand_rules({"userId": {"in": user_ids}}, start, end):
+        if occurrence.status != prisma.enums.ScheduleStatus.CANCELLED:
+            busy[occurrence.userId].append((occurrence.scheduledOn, occurrence.endsOn))
+    overrides = {entry.userId: entry for entry in availability}
+    staff = []
+    for user in users:
+        entry = overrides.get(user.id)
+        staff.append(
+            StaffMember(
+                userId=user.id,
+                role=user.role,
+                unavailableDays=entry.unavailableDays if entry else [],
+                maxShiftsPerWeek=(
+                    entry.maxShiftsPerWeek
+                    if entry and entry.maxShiftsPerWeek is not None
+                    else DEFAULT_MAX_SHIFTS_PER_WEEK
+                ),
+                busy=busy.get(user.id, []),
+            )
+        )
+    shifts, unfilled = await run_in_process(plan_roster, requirements, staff)
+    return RosterResponse(shifts=shifts, unfilled=unfilled)
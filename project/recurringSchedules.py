@@ -0,0 +1,245 @@
+"""
+Recurring schedules stored as one ScheduleRule row plus sparse ScheduleException rows.
+
+Rules use the RFC 5545 RRULE subset our crews need: FREQ=DAILY or FREQ=WEEKLY with optional
+INTERVAL, BYDAY (weekly only), COUNT and UNTIL. Occurrences are never written to Schedule;
+they are computed arithmetically for the requested window only, so a read costs as much as
+the occurrences in the window, not as much as the rule's whole history.
+"""
+
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.timestamps import to_utc
+from pydantic import BaseModel
+
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+DEFAULT_WINDOW = timedelta(days=14)
+
+
+class Recurrence(BaseModel):
+    """
+    A parsed RRULE.
+    """
+
+    frequency: str
+    interval: int = 1
+    weekdays: List[int] = []
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+
+
+class Occurrence(BaseModel):
+    """
+    One occurrence of a recurring schedule after its exception, if any, has been applied.
+    """
+
+    ruleId: int
+    occurrenceOn: datetime
+    scheduledOn: datetime
+    endsOn: datetime
+    type: prisma.enums.ScheduleType
+    label: Optional[str] = None
+    userId: Optional[int] = None
+    status: prisma.enums.ScheduleStatus
+
+
+def parse_rrule(rrule: str) -> Recurrence:
+    """
+    Parses an RRULE such as "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;COUNT=20".
+
+    Raises:
+        ValueError: If the rule uses a frequency or part that is not supported.
+    """
+    body = rrule.strip().upper().removeprefix("RRULE:")
+    parts = dict(part.split("=", 1) for part in body.split(";") if part)
+    frequency = parts.pop("FREQ", None)
+    if frequency not in ("DAILY", "WEEKLY"):
+        raise ValueError("Only FREQ=DAILY and FREQ=WEEKLY rules are supported.")
+    recurrence = Recurrence(frequency=frequency)
+    if "INTERVAL" in parts:
+        recurrence.interval = int(parts.pop("INTERVAL"))
+        if recurrence.interval < 1:
+            raise ValueError("INTERVAL must be at least 1.")
+    if "BYDAY" in parts:
+        if frequency != "WEEKLY":
+            raise ValueError("BYDAY is only supported on weekly rules.")
+        recurrence.weekdays = sorted(
+            {WEEKDAYS.index(day) for day in parts.pop("BYDAY").split(",")}
+        )
+    if "COUNT" in parts:
+        recurrence.count = int(parts.pop("COUNT"))
+    if "UNTIL" in parts:
+        until = parts.pop("UNTIL").rstrip("Z")
+        if "T" in until:
+            recurrence.until = datetime.strptime(until, "%Y%m%dT%H%M%S")
+        else:
+            recurrence.until = datetime.combine(
+                datetime.strptime(until, "%Y%m%d").date(), time.max
+            )
+    if parts:
+        raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(parts))}.")
+    return recurrence
+
+
+def occurrences_between(
+    starts_on: datetime,
+    recurrence: Recurrence,
+    window_start: datetime,
+    window_end: datetime,
+) -> List[datetime]:
+    """
+    Start times of the occurrences falling in [window_start, window_end). The first period
+    inside the window is computed directly, so earlier occurrences are never enumerated.
+    """
+    starts_on, window_start, window_end = (
+        to_utc(starts_on),
+        to_utc(window_start),
+        to_utc(window_end),
+    )
+    found: List[datetime] = []
+    if recurrence.frequency == "DAILY":
+        step = timedelta(days=recurrence.interval)
+        index = max(0, -((starts_on - window_start) // step))
+        while True:
+            moment = starts_on + index * step
+            if (
+                moment >= window_end
+                or (recurrence.count is not None and index >= recurrence.count)
+                or (recurrence.until is not None and moment > recurrence.until)
+            ):
+                return found
+            found.append(moment)
+            index += 1
+    weekdays = recurrence.weekdays or [starts_on.weekday()]
+    skipped = sum(1 for day in weekdays if day < starts_on.weekday())
+    first_period = len(weekdays) - skipped
+    week_zero = starts_on - timedelta(days=starts_on.weekday())
+    period_length = timedelta(weeks=recurrence.interval)
+    period = max(0, (window_start - week_zero) // period_length)
+    while True:
+        period_start = week_zero + period * period_length
+        for position, day in enumerate(weekdays):
+            if period == 0 and day < starts_on.weekday():
+                continue
+            index = (
+                position - skipped
+                if period == 0
+                else first_period + (period - 1) * len(weekdays) + position
+            )
+            moment = period_start + timedelta(days=day)
+            if (
+                moment >= window_end
+                or (recurrence.count is not None and index >= recurrence.count)
+                or (recurrence.until is not None and moment > recurrence.until)
+            ):
+                return found
+            if moment >= window_start:
+                found.append(moment)
+        period += 1
+
+
+def last_occurrence(starts_on: datetime, recurrence: Recurrence) -> Optional[datetime]:
+    """
+    Start of the final occurrence, or an upper bound for it, or None if the rule never ends.
+    """
+    starts_on = to_utc(starts_on)
+    if recurrence.count is None:
+        return recurrence.until
+    index = recurrence.count - 1
+    if recurrence.frequency == "DAILY":
+        last = starts_on + index * timedelta(days=recurrence.interval)
+    else:
+        weekdays = recurrence.weekdays or [starts_on.weekday()]
+        skipped = sum(1 for day in weekdays if day < starts_on.weekday())
+        first_period = len(weekdays) - skipped
+        if index < first_period:
+            period, position = 0, index + skipped
+        else:
+            period = 1 + (index - first_period) // len(weekdays)
+            position = (index - first_period) % len(weekdays)
+        last = (
+            starts_on
+            - timedelta(days=starts_on.weekday())
+            + period * timedelta(weeks=recurrence.interval)
+            + timedelta(days=weekdays[position])
+        )
+    return min(last, recurrence.until) if recurrence.until else last
+
+
+async def expand_rules(
+    where: Dict[str, Any], window_start: datetime, window_end: datetime
+) -> List[Occurrence]:
+    """
+    Loads the rules matching where that are active in [window_start, window_end) together with
+    their exceptions in that window, and returns the resulting occurrences ordered by start.
+    """
+    window_start, window_end = to_utc(window_start), to_utc(window_end)
+    in_window = {"gte": window_start, "lt": window_end}
+    rules = await prisma.models.ScheduleRule.prisma().find_many(
+        where={
+            "AND": [
+                where,
+                {"startsOn": {"lt": window_end}},
+                {"OR": [{"until": None}, {"until": {"gte": window_start}}]},
+            ]
+        },
+        include={
+            "exceptions": {
+                "where": {
+                    "OR": [{"occurrenceOn": in_window}, {"scheduledOn": in_window}]
+                }
+            }
+        },
+    )
+    occurrences = []
+    for rule in rules:
+        exceptions = {
+            to_utc(exception.occurrenceOn): exception
+            for exception in rule.exceptions or []
+        }
+        duration = timedelta(minutes=rule.durationMinutes)
+        moments = set(
+            occurrences_between(
+                rule.startsOn, parse_rrule(rule.rrule), window_start, window_end
+            )
+        )
+        moments.update(exceptions)
+        for moment in sorted(moments):
+            exception = exceptions.get(moment)
+            if exception is not None and exception.cancelled:
+                continue
+            scheduled_on = to_utc(
+                exception.scheduledOn if exception and exception.scheduledOn else moment
+            )
+            if not window_start <= scheduled_on < window_end:
+                continue
+            occurrences.append(
+                Occurrence(
+                    ruleId=rule.id,
+                    occurrenceOn=moment,
+                    scheduledOn=scheduled_on,
+                    endsOn=(
+                        to_utc(exception.endsOn)
+                        if exception and exception.endsOn
+                        else scheduled_on + duration
+                    ),
+                    type=rule.type,
+                    label=rule.label,
+                    userId=(
+                        exception.userId
+                        if exception and exception.userId
+                        else rule.userId
+                    ),
+                    status=(
+                        exception.status
+                        if exception and exception.status
+                        else prisma.enums.ScheduleStatus.PENDING
+                    ),
+                )
+            )
+    occurrences.sort(key=lambda occurrence: occurrence.scheduledOn)
+    return occurrences
@@ -0,0 +1,160 @@
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+
+import numpy as np
+import prisma
+import prisma.errors
+import prisma.models
+from project.payrollTaxes import load_tax_rules, year_to_date_gross
+from pydantic import BaseModel
+
+PAYROLL_RUN_LOCK_KEY = 33_001
+
+
+class PayrollRunSummary(BaseModel):
+    """
+    Totals of a payroll run together with the employees that were left out because no wage is known for them.
+    """
+
+    runId: int
+    periodStart: date
+    periodEnd: date
+    employeeCount: int
+    totalHours: float
+    totalGross: float
+    totalDeductions: float
+    totalNet: float
+    taxRuleVersion: str
+    skippedUserIds: List[int]
+
+
+async def runPayroll(
+    periodStart: date,
+    periodEnd: date,
+    defaultHourlyWage: Optional[float] = None,
+    paymentDate: Optional[datetime] = None,
+    taxRuleVersion: Optional[str] = None,
+) -> PayrollRunSummary:
+    """
+    Runs payroll for every employee who completed a shift in the period. Hours come from the completed shifts themselves (endsOn minus scheduledOn), including occurrences of recurring schedules marked completed, summed per employee by a single grouped query. Deductions for the whole run are one vectorized pass over the compiled tax rules, taking each employee's year-to-date gross into account, and all Payroll rows are written with one create_many in the same transaction as the run header, so a run is either stored completely or not at all. Runs are serialized by an advisory lock, and a period overlapping any earlier run is rejected, so no shift is paid twice.
+
+    Args:
+        periodStart (date): First day of the pay period.
+        periodEnd (date): Last day of the pay period, inclusive.
+        defaultHourlyWage (Optional[float]): Wage used for employees without their own hourly wage. Employees with neither are skipped.
+        paymentDate (Optional[datetime]): Payment date recorded on the entries, defaulting to now.
+        taxRuleVersion (Optional[str]): Tax rule version to apply, defaulting to the one in effect on the payment date. It is recorded on the run.
+
+    Returns:
+        PayrollRunSummary: Totals of a payroll run together with the employees that were left out because no wage is known for them.
+
+    Raises:
+        ValueError: If the period is empty, no tax rules apply or the period overlaps one that has already been run.
+
+    Example:
+        summary = await runPayroll(date(2023, 12, 1), date(2023, 12, 15), 18.5)
+        print(summary.employeeCount, summary.totalNet)
+    """
+    if periodEnd < periodStart:
+        raise ValueError("periodEnd must not be before periodStart.")
+    start = datetime.combine(periodStart, time.min)
+    end = datetime.combine(periodEnd, time.min) + timedelta(days=1)
+    paid_on = paymentDate or datetime.now()
+    rules = await load_tax_rules(taxRuleVersion, paid_on)
+    client = prisma.get_client()
+    rows = await client.query_raw(
+        'SELECT w."userId" AS "userId", u."hourlyWage" AS "hourlyWage",'
+        ' SUM(EXTRACT(EPOCH FROM (w."endsOn" - w."scheduledOn"))) / 3600.0 AS "hours"'
+        " FROM ("
+        ' SELECT s."userId", s."scheduledOn", s."endsOn" FROM "Schedule" s'
+        ' WHERE s."status" = \'COMPLETED\' AND s."endsOn" IS NOT NULL'
+        ' AND s."scheduledOn" >= $1::timestamp AND s."scheduledOn" < $2::timestamp'
+        " UNION ALL"
+        ' SELECT COALESCE(x."userId", r."userId"),'
+        ' COALESCE(x."scheduledOn", x."occurrenceOn"),'
+        ' COALESCE(x."endsOn", COALESCE(x."scheduledOn", x."occurrenceOn")'
+        " + r.\"durationMinutes\" * interval '1 minute')"
+        ' FROM "ScheduleException" x JOIN "ScheduleRule" r ON r."id" = x."ruleId"'
+        ' WHERE x."status" = \'COMPLETED\' AND NOT x."cancelled"'
+        ' AND COALESCE(x."scheduledOn", x."occurrenceOn") >= $1::timestamp'
+        ' AND COALESCE(x."scheduledOn", x."occurrenceOn") < $2::timestamp'
+        ' ) w JOIN "User" u ON u."id" = w."userId"'
+        ' GROUP BY w."userId", u."hourlyWage"'
+        ' ORDER BY w."userId"',
+        start,
+        end,
+    )
+    user_ids, hour_list, wage_list, skipped = [], [], [], []
+    for row in rows:
+        wage = row["hourlyWage"] if row["hourlyWage"] is not None else defaultHourlyWage
+        if wage is None:
+            skipped.append(row["userId"])
+            continue
+        user_ids.append(row["userId"])
+        hour_list.append(float(row["hours"] or 0))
+        wage_list.append(wage)
+    hours = np.array(hour_list, dtype=np.float64)
+    wages = np.array(wage_list, dtype=np.float64)
+    ytd = await year_to_date_gross(user_ids, paid_on)
+    gross = np.round(hours * wages, 2)
+    deductions = rules.deductions(
+        gross, np.array([ytd.get(user_id, 0.0) for user_id in user_ids])
+    )
+    net = np.round(gross - deductions, 2)
+    entries = [
+        {
+            "userId": user_id,
+            "paymentAmount": float(gross[position]),
+            "taxDeductions": float(deductions[position]),
+            "netAmount": float(net[position]),
+            "paymentDate": paid_on,
+        }
+        for position, user_id in enumerate(user_ids)
+    ]
+    totals = {
+        "employeeCount": len(entries),
+        "totalHours": round(float(hours.sum()), 2),
+        "totalGross": round(float(gross.sum()), 2),
+        "totalDeductions": round(float(deductions.sum()), 2),
+        "totalNet": round(float(net.sum()), 2),
+        "taxRuleVersion": rules.version,
+    }
+    try:
+        async with client.tx() as transaction:
+            await transaction.execute_raw(
+                "SELECT pg_advisory_xact_lock($1)", PAYROLL_RUN_LOCK_KEY
+            )
+            overlapping = await prisma.models.PayrollRun.prisma(transaction).find_first(
+                where={
+                    "periodStart": {"lte": end - timedelta(days=1)},
+                    "periodEnd": {"gte": start},
+                }
+            )
+            if overlapping is not None:
+                raise ValueError(
+                    f"Payroll run {overlapping.id} already covers"
+                    f" {overlapping.periodStart.date()} to {overlapping.periodEnd.date()}."
+                )
+            run = await prisma.models.PayrollRun.prisma(transaction).create(
+                data={
+                    "periodStart": start,
+                    "periodEnd": end - timedelta(days=1),
+                    "paymentDate": paid_on,
+                    **totals,
+                }
+            )
+            for entry in entries:
+                entry["runId"] = run.id
+            if entries:
+                await prisma.models.Payroll.prisma(transaction).create_many(
+                    data=entries
+                )
+    except prisma.errors.UniqueViolationError:
+        raise ValueError("Payroll has already been run for this period.")
+    return PayrollRunSummary(
+        runId=run.id,
+        periodStart=periodStart,
+        periodEnd=periodEnd,
+        skippedUserIds=skipped,
+        **totals,
+    )
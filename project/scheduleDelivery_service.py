@@ -1,8 +1,11 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import prisma
 import prisma.enums
 import prisma.models
+from project.deliveryCapacity import release_delivery_slot, reserve_delivery_slot
+from project.demandForecast import note_order
+from project.stockLedger import InsufficientStockError, StockChange, apply_stock_changes
 from pydantic import BaseModel
 
 
@@ -24,7 +27,7 @@ async def scheduleDelivery(
     customer_id: int,
 ) -> ScheduleDeliveryResponse:
     """
-    Schedules a new delivery. This endpoint takes details such as delivery date, quantity, and destination, and coordinates with the Scheduling Module to ensure transport availability.
+    Schedules a new delivery. This endpoint takes details such as delivery date, quantity, and destination, and coordinates with the Scheduling Module to ensure transport availability. The truck and driver slot taken for the day is given back if the delivery cannot be recorded.
 
     Args:
         delivery_date (datetime): The scheduled date for the delivery.
@@ -63,34 +66,61 @@ async def scheduleDelivery(
             message="Customer does not exist.",
             scheduled_datetime=delivery_date,
         )
-    schedule = await prisma.models.Schedule.prisma().create(
-        data={
-            "scheduledOn": delivery_date,
-            "type": prisma.enums.ScheduleType.DELIVERY.value,
-            "status": prisma.enums.ScheduleStatus.PENDING.value,
-        }
-    )
-    new_stock_level = item.stockLevel - quantity
-    await prisma.models.Item.prisma().update(
-        where={"id": item_id}, data={"stockLevel": new_stock_level}
-    )
-    order = await prisma.models.Order.prisma().create(
-        data={
-            "customer": {"connect": {"id": customer_id}},
-            "createdDate": datetime.now(),
-            "deliveryDate": delivery_date,
-            "status": prisma.enums.OrderStatus.PLACED.value,
-            "lineItems": {
-                "create": [
-                    {
-                        "item": {"connect": {"id": item_id}},
-                        "quantity": quantity,
-                        "pricePerItem": 0.0,
-                    }
-                ]
-            },
-        }
-    )
+    if not await reserve_delivery_slot(delivery_date):
+        return ScheduleDeliveryResponse(
+            success=False,
+            message="No truck or driver capacity left on the requested day.",
+            scheduled_datetime=delivery_date,
+        )
+    try:
+        async with prisma.get_client().tx(timeout=timedelta(seconds=30)) as transaction:
+            schedule = await prisma.models.Schedule.prisma(transaction).create(
+                data={
+                    "scheduledOn": delivery_date,
+                    "type": prisma.enums.ScheduleType.DELIVERY.value,
+                    "status": prisma.enums.ScheduleStatus.PENDING.value,
+                    "destination": destination,
+                }
+            )
+            order = await prisma.models.Order.prisma(transaction).create(
+                data={
+                    "customer": {"connect": {"id": customer_id}},
+                    "schedule": {"connect": {"id": schedule.id}},
+                    "createdDate": datetime.now(),
+                    "deliveryDate": delivery_date,
+                    "status": prisma.enums.OrderStatus.PLACED.value,
+                    "lineItems": {
+                        "create": [
+                            {
+                                "item": {"connect": {"id": item_id}},
+                                "quantity": quantity,
+                                "pricePerItem": 0.0,
+                            }
+                        ]
+                    },
+                }
+            )
+            await apply_stock_changes(
+                [
+                    StockChange(
+                        item_id, -quantity, prisma.enums.InventoryEventType.SHIPPED
+                    )
+                ],
+                transaction,
+                check_available=True,
+                order_id=order.id,
+            )
+    except InsufficientStockError:
+        await release_delivery_slot(delivery_date)
+        return ScheduleDeliveryResponse(
+            success=False,
+            message="Insufficient stock for the item or item does not exist.",
+            scheduled_datetime=delivery_date,
+        )
+    except Exception:
+        await release_delivery_slot(delivery_date)
+        raise
+    await note_order({item_id: quantity})
     return ScheduleDeliveryResponse(
         success=True,
         message="Delivery scheduled successfully.",
@@ -0,0 +1,169 @@
+"""
+In-process interval index over staff shifts, used to reject double-bookings.
+
+Each user's shifts are kept sorted by start together with a running maximum of their ends.
+Whether a new shift [start, end) overlaps anything takes one bisect for the last shift
+starting before end and then walks back only while the running maximum still reaches past
+start, so the check costs O(log n) plus the shifts it has to look at. Adding or removing a
+shift moves the later list entries and recomputes the running maximum from there on, which
+is O(n) in the number of shifts the user has; with a few hundred shifts per user a year,
+these memmove-backed list operations stay cheaper than maintaining a balanced tree. Times
+are kept as naive UTC, as the database stores them. The index is loaded from the database
+on first use and kept current by the services that create, move, cancel or delete schedules.
+"""
+
+import asyncio
+import heapq
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.timestamps import to_utc
+
+Shift = Tuple[int, int, datetime, datetime]
+
+
+class UserShiftIndex:
+    """
+    Sorted shifts of a single user with a prefix maximum of shift ends.
+    """
+
+    def __init__(self) -> None:
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        self.ids: List[int] = []
+        self.max_end: List[datetime] = []
+
+    def _refresh_max_end(self, position: int) -> None:
+        del self.max_end[position:]
+        running = self.max_end[-1] if self.max_end else None
+        for end in self.ends[position:]:
+            running = end if running is None or end > running else running
+            self.max_end.append(running)
+
+    def add(self, schedule_id: int, start: datetime, end: datetime) -> None:
+        position = bisect_left(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.ids.insert(position, schedule_id)
+        self._refresh_max_end(position)
+
+    def remove(self, schedule_id: int) -> None:
+        if schedule_id not in self.ids:
+            return
+        position = self.ids.index(schedule_id)
+        del self.starts[position]
+        del self.ends[position]
+        del self.ids[position]
+        self._refresh_max_end(position)
+
+    def overlapping(
+        self, start: datetime, end: datetime, ignore_id: Optional[int] = None
+    ) -> List[int]:
+        """
+        Ids of the shifts overlapping [start, end), skipping ignore_id.
+        """
+        found = []
+        position = bisect_left(self.starts, end) - 1
+        while position >= 0 and self.max_end[position] > start:
+            if self.ends[position] > start and self.ids[position] != ignore_id:
+                found.append(self.ids[position])
+            position -= 1
+        return found
+
+
+class ScheduleIntervalIndex:
+    """
+    Shift indexes for all users, keyed by user id.
+    """
+
+    def __init__(self) -> None:
+        self.users: Dict[int, UserShiftIndex] = {}
+        self.locations: Dict[int, int] = {}
+        self.loaded = False
+        self.lock = asyncio.Lock()
+        self.write_lock = asyncio.Lock()
+
+    def add(
+        self, schedule_id: int, user_id: int, start: datetime, end: datetime
+    ) -> None:
+        self.remove(schedule_id)
+        self.users.setdefault(user_id, UserShiftIndex()).add(schedule_id, start, end)
+        self.locations[schedule_id] = user_id
+
+    def remove(self, schedule_id: int) -> None:
+        user_id = self.locations.pop(schedule_id, None)
+        if user_id is not None:
+            self.users[user_id].remove(schedule_id)
+
+    def overlapping(
+        self,
+        user_id: int,
+        start: datetime,
+        end: datetime,
+        ignore_id: Optional[int] = None,
+    ) -> List[int]:
+        shifts = self.users.get(user_id)
+        return shifts.overlapping(start, end, ignore_id) if shifts else []
+
+
+schedule_index = ScheduleIntervalIndex()
+
+
+def track(schedule: prisma.models.Schedule) -> None:
+    """
+    Adds, moves or drops a schedule in the index to match its stored state.
+    """
+    if (
+        schedule.userId is None
+        or schedule.endsOn is None
+        or schedule.status == prisma.enums.ScheduleStatus.CANCELLED
+    ):
+        schedule_index.remove(schedule.id)
+    else:
+        schedule_index.add(
+            schedule.id,
+            schedule.userId,
+            to_utc(schedule.scheduledOn),
+            to_utc(schedule.endsOn),
+        )
+
+
+async def load_schedule_index() -> ScheduleIntervalIndex:
+    """
+    Builds the index from the database the first time it is needed.
+    """
+    if schedule_index.loaded:
+        return schedule_index
+    async with schedule_index.lock:
+        if not schedule_index.loaded:
+            schedules = await prisma.models.Schedule.prisma().find_many(
+                where={
+                    "userId": {"not": None},
+                    "endsOn": {"not": None},
+                    "status": {"not": prisma.enums.ScheduleStatus.CANCELLED},
+                }
+            )
+            for schedule in schedules:
+                track(schedule)
+            schedule_index.loaded = True
+    return schedule_index
+
+
+def find_overlaps(shifts: Iterable[Shift]) -> List[Tuple[int, int, int]]:
+    """
+    Sweeps (schedule id, user id, start, end) shifts and returns every overlapping pair as
+    (user id, earlier schedule id, later schedule id).
+    """
+    pairs = []
+    active: Dict[int, List[Tuple[datetime, int]]] = {}
+    for schedule_id, user_id, start, end in sorted(shifts, key=lambda s: s[2]):
+        running = active.setdefault(user_id, [])
+        while running and running[0][0] <= start:
+            heapq.heappop(running)
+        pairs.extend((user_id, other_id, schedule_id) for _, other_id in running)
+        heapq.heappush(running, (end, schedule_id))
+    return pairs
@@ -1,10 +1,16 @@
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 from typing import List
 
 import prisma
+import prisma.enums
 import prisma.models
+from project.treatmentWindow import invalidate_treatment_window
+from project.treeRegistry import sync_tree_registry, tree_registry
 from pydantic import BaseModel
 
+MAX_TREES_PER_TREATMENT = 50_000
+INSERT_CHUNK_SIZE = 10_000
+
 
 class ScheduleTreeTreatmentResponse(BaseModel):
     """
@@ -23,7 +29,7 @@ async def scheduleTreatment(
     scheduled_time: time,
 ) -> ScheduleTreeTreatmentResponse:
     """
-    Schedules a new treatment for one or more trees. Inputs would include tree IDs, treatment type, scheduled date and time. It ensures all treatments are timely and recorded for future reference.
+    Schedules a new treatment for one or more trees. Inputs would include tree IDs, treatment type, scheduled date and time. It ensures all treatments are timely and recorded for future reference. The treatment is one TREATMENT schedule with one row per tree, written in a single transaction with bulk inserts; tree IDs are checked against the in-memory tree registry.
 
     Args:
         tree_ids (List[int]): A list of tree IDs for which the treatment is to be scheduled.
@@ -44,11 +50,46 @@ async def scheduleTreatment(
         print(response)
     """
     try:
+        tree_ids = sorted(set(tree_ids))
+        if not tree_ids:
+            raise ValueError("A treatment needs at least one tree.")
+        if len(tree_ids) > MAX_TREES_PER_TREATMENT:
+            raise ValueError(
+                f"A treatment can cover at most {MAX_TREES_PER_TREATMENT} trees."
+            )
+        if (tree_registry.positions(tree_ids) < 0).any():
+            # Trees imported by another process are not in this registry yet.
+            await sync_tree_registry()
+            positions = tree_registry.positions(tree_ids)
+            if (positions < 0).any():
+                unknown = [
+                    tree_id
+                    for tree_id, position in zip(tree_ids, positions)
+                    if position < 0
+                ]
+                raise ValueError(
+                    f"Unknown tree ids: {', '.join(map(str, unknown[:20]))}"
+                    + (f" and {len(unknown) - 20} more." if len(unknown) > 20 else ".")
+                )
         combined_datetime = datetime.combine(scheduled_date, scheduled_time)
-        schedule = await prisma.models.Schedule.prisma().create(
-            {"scheduledOn": combined_datetime, "type": "TREATMENT", "status": "PENDING"}
-        )
-        treatment_details = f"Scheduled {treatment_type} for trees with IDs {tree_ids} at {combined_datetime}"
+        async with prisma.get_client().tx(timeout=timedelta(minutes=1)) as transaction:
+            schedule = await prisma.models.Schedule.prisma(transaction).create(
+                data={
+                    "scheduledOn": combined_datetime,
+                    "type": prisma.enums.ScheduleType.TREATMENT,
+                    "status": prisma.enums.ScheduleStatus.PENDING,
+                    "treatment": {"create": {"treatmentType": treatment_type}},
+                }
+            )
+            for start in range(0, len(tree_ids), INSERT_CHUNK_SIZE):
+                await prisma.models.TreatmentTree.prisma(transaction).create_many(
+                    data=[
+                        {"scheduleId": schedule.id, "treeId": tree_id}
+                        for tree_id in tree_ids[start : start + INSERT_CHUNK_SIZE]
+                    ]
+                )
+        invalidate_treatment_window()
+        treatment_details = f"Scheduled {treatment_type} for {len(tree_ids)} trees at {combined_datetime}"
         return ScheduleTreeTreatmentResponse(
             success=True, scheduled_id=schedule.id, message=treatment_details
         )
@@ -0,0 +1,249 @@
+"""
+Tiered storage of field probe readings.
+
+A batch of readings is written in one transaction: the raw rows go to SensorReading, where a
+reading a sensor already reported for the same metric and instant is skipped, each newly
+stored reading is folded into its hourly and daily SensorRollup bucket with an
+INSERT ... ON CONFLICT DO UPDATE that adds to the bucket's count and sum and widens its
+min/max, and the newest reading per field and metric replaces FieldSensorLatest unless a
+newer one is already stored. Downsampling therefore happens as data arrives and costs one
+statement per tier per batch, whatever the batch size.
+
+Raw readings are only kept for RAW_RETENTION_DAYS and hourly buckets for
+HOURLY_RETENTION_DAYS; both are pruned by time at most once an hour, so the raw tier behaves
+like a rolling set of time partitions; a repeated reading is recognised as long as the raw
+one is kept. Daily buckets are kept. Field condition reads touch one latest row and at most
+a day of hourly and a week of daily buckets per metric.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.timestamps import parse_timestamp, to_utc
+
+RAW_RETENTION_DAYS = 30
+HOURLY_RETENTION_DAYS = 90
+HOURLY_TREND_HOURS = 24
+DAILY_TREND_DAYS = 7
+PRUNE_INTERVAL = timedelta(hours=1)
+# Postgres allows at most 32767 bind parameters per statement.
+ROWS_PER_STATEMENT = 2000
+
+Reading = Tuple[int, str, prisma.enums.SensorMetric, datetime, float]
+
+_last_pruned: Optional[datetime] = None
+
+
+def bucket_start(
+    value: datetime, resolution: prisma.enums.RollupResolution
+) -> datetime:
+    """
+    Start of the hourly or daily bucket a timestamp falls into.
+    """
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if resolution == prisma.enums.RollupResolution.DAY:
+        value = value.replace(hour=0)
+    return value
+
+
+def _rollup_rows(readings: Sequence[Reading]) -> List[List[Any]]:
+    buckets: Dict[Tuple[Any, Any, Any, datetime], List[float]] = {}
+    for field_id, _, metric, recorded_at, value in readings:
+        for resolution in prisma.enums.RollupResolution:
+            key = (field_id, metric, resolution, bucket_start(recorded_at, resolution))
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [1, value, value, value]
+            else:
+                bucket[0] += 1
+                bucket[1] += value
+                bucket[2] = min(bucket[2], value)
+                bucket[3] = max(bucket[3], value)
+    return [
+        [field_id, metric.value, resolution.value, start, *bucket]
+        for (field_id, metric, resolution, start), bucket in buckets.items()
+    ]
+
+
+def _latest_rows(readings: Sequence[Reading]) -> List[List[Any]]:
+    latest: Dict[Tuple[int, Any], Tuple[datetime, float]] = {}
+    for field_id, _, metric, recorded_at, value in readings:
+        current = latest.get((field_id, metric))
+        if current is None or recorded_at >= current[0]:
+            latest[(field_id, metric)] = (recorded_at, value)
+    return [
+        [field_id, metric.value, value, recorded_at]
+        for (field_id, metric), (recorded_at, value) in latest.items()
+    ]
+
+
+def values_sql(rows: List[List[Any]], casts: Sequence[str]) -> Tuple[str, List[Any]]:
+    """
+    The VALUES list of a multi-row INSERT and its bind parameters, each column cast as given.
+    """
+    tuples, params = [], []
+    for row in rows:
+        placeholders = []
+        for value, cast in zip(row, casts):
+            params.append(value)
+            placeholders.append(f"${len(params)}{cast}")
+        tuples.append(f"({', '.join(placeholders)})")
+    return ", ".join(tuples), params
+
+
+async def _upsert_rollups(client: Any, rows: List[List[Any]]) -> None:
+    casts = (
+        "",
+        '::"SensorMetric"',
+        '::"RollupResolution"',
+        "::timestamp",
+        "",
+        "",
+        "",
+        "",
+    )
+    for start in range(0, len(rows), ROWS_PER_STATEMENT):
+        values, params = values_sql(rows[start : start + ROWS_PER_STATEMENT], casts)
+        await client.execute_raw(
+            'INSERT INTO "SensorRollup" ("fieldId", "metric", "resolution",'
+            ' "bucketStart", "count", "sum", "min", "max")'
+            f" VALUES {values}"
+            ' ON CONFLICT ("fieldId", "metric", "resolution", "bucketStart") DO UPDATE SET'
+            ' "count" = "SensorRollup"."count" + EXCLUDED."count",'
+            ' "sum" = "SensorRollup"."sum" + EXCLUDED."sum",'
+            ' "min" = LEAST("SensorRollup"."min", EXCLUDED."min"),'
+            ' "max" = GREATEST("SensorRollup"."max", EXCLUDED."max")',
+            *params,
+        )
+
+
+async def _upsert_latest(client: Any, rows: List[List[Any]]) -> None:
+    casts = ("", '::"SensorMetric"', "", "::timestamp")
+    for start in range(0, len(rows), ROWS_PER_STATEMENT):
+        values, params = values_sql(rows[start : start + ROWS_PER_STATEMENT], casts)
+        await client.execute_raw(
+            'INSERT INTO "FieldSensorLatest" ("fieldId", "metric", "value", "recordedAt")'
+            f" VALUES {values}"
+            ' ON CONFLICT ("fieldId", "metric") DO UPDATE SET'
+            ' "value" = EXCLUDED."value", "recordedAt" = EXCLUDED."recordedAt"'
+            ' WHERE EXCLUDED."recordedAt" >= "FieldSensorLatest"."recordedAt"',
+            *params,
+        )
+
+
+async def prune_expired(now: Optional[datetime] = None) -> None:
+    """
+    Drops raw readings and hourly buckets that have aged out of their tier.
+    """
+    global _last_pruned
+    now = now or datetime.utcnow()
+    _last_pruned = now
+    await prisma.models.SensorReading.prisma().delete_many(
+        where={"recordedAt": {"lt": now - timedelta(days=RAW_RETENTION_DAYS)}}
+    )
+    await prisma.models.SensorRollup.prisma().delete_many(
+        where={
+            "resolution": prisma.enums.RollupResolution.HOUR,
+            "bucketStart": {"lt": now - timedelta(days=HOURLY_RETENTION_DAYS)},
+        }
+    )
+
+
+async def _insert_raw(client: Any, readings: List[Reading]) -> List[Reading]:
+    casts = ("", "", '::"SensorMetric"', "::timestamp", "")
+    inserted: List[Reading] = []
+    for start in range(0, len(readings), ROWS_PER_STATEMENT):
+        values, params = values_sql(
+            [
+                [field_id, sensor_id, metric.value, recorded_at, value]
+                for field_id, sensor_id, metric, recorded_at, value in readings[
+                    start : start + ROWS_PER_STATEMENT
+                ]
+            ],
+            casts,
+        )
+        rows = await client.query_raw(
+            'INSERT INTO "SensorReading" ("fieldId", "sensorId", "metric",'
+            ' "recordedAt", "value")'
+            f" VALUES {values}"
+            ' ON CONFLICT ("fieldId", "sensorId", "metric", "recordedAt") DO NOTHING'
+            ' RETURNING "fieldId", "sensorId", "metric", "recordedAt", "value"',
+            *params,
+        )
+        for row in rows:
+            inserted.append(
+                (
+                    row["fieldId"],
+                    row["sensorId"],
+                    prisma.enums.SensorMetric(row["metric"]),
+                    parse_timestamp(row["recordedAt"]),
+                    float(row["value"]),
+                )
+            )
+    return inserted
+
+
+async def record_readings(readings: Sequence[Reading]) -> int:
+    """
+    Stores a batch of (field id, sensor id, metric, recorded at, value) readings in every tier
+    and returns how many were new. Readings a sensor already reported for the same metric and
+    instant, in this batch or earlier, are skipped and not counted into the rollups again.
+    """
+    unique: Dict[Tuple[int, str, Any, datetime], Reading] = {}
+    for field_id, sensor_id, metric, recorded_at, value in readings:
+        reading = (
+            field_id,
+            sensor_id,
+            prisma.enums.SensorMetric(metric),
+            to_utc(recorded_at),
+            float(value),
+        )
+        unique.setdefault(reading[:4], reading)
+    if not unique:
+        return 0
+    async with prisma.get_client().tx() as transaction:
+        readings = await _insert_raw(transaction, list(unique.values()))
+        if readings:
+            await _upsert_rollups(transaction, _rollup_rows(readings))
+            await _upsert_latest(transaction, _latest_rows(readings))
+    if _last_pruned is None or datetime.utcnow() - _last_pruned >= PRUNE_INTERVAL:
+        await prune_expired()
+    return len(readings)
+
+
+async def field_series(
+    field_id: int, now: Optional[datetime] = None
+) -> Tuple[List[prisma.models.FieldSensorLatest], List[prisma.models.SensorRollup]]:
+    """
+    The latest readings of a field and its recent hourly and daily buckets, oldest first.
+    """
+    now = now or datetime.utcnow()
+    latest = await prisma.models.FieldSensorLatest.prisma().find_many(
+        where={"fieldId": field_id}
+    )
+    rollups = await prisma.models.SensorRollup.prisma().find_many(
+        where={
+            "fieldId": field_id,
+            "OR": [
+                {
+                    "resolution": prisma.enums.RollupResolution.HOUR,
+                    "bucketStart": {
+                        "gt": bucket_start(now, prisma.enums.RollupResolution.HOUR)
+                        - timedelta(hours=HOURLY_TREND_HOURS)
+                    },
+                },
+                {
+                    "resolution": prisma.enums.RollupResolution.DAY,
+                    "bucketStart": {
+                        "gt": bucket_start(now, prisma.enums.RollupResolution.DAY)
+                        - timedelta(days=DAILY_TREND_DAYS)
+                    },
+                },
+            ],
+        },
+        order={"bucketStart": "asc"},
+    )
+    return latest, rollups
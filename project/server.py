@@ -1,12 +1,7 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from datetime import datetime
-from typing import (
-    date,
-)  # TODO(autogpt): "date" is unknown import symbol. reportAttributeAccessIssue
-from typing import (
-    time,
-)  # TODO(autogpt): "time" is unknown import symbol. reportAttributeAccessIssue
+from datetime import date, datetime, time
 from typing import Dict, List, Optional
 
 import prisma
@@ -14,6 +9,7 @@ import prisma.enums
 import project.addInventoryItem_service
 import project.addSeedlingPurchase_service
 import project.addTreeHealthRecord_service
+import project.analyzeDiseaseSpread_service
 import project.authenticateUser_service
 import project.cancelDelivery_service
 import project.createCustomer_service
@@ -24,6 +20,8 @@ import project.createPerformanceReview_service
 import project.createRole_service
 import project.createSaleRecord_service
 import project.createSchedule_service
+import project.createScheduleRule_service
+import project.createTaxRuleSet_service
 import project.createUser_service
 import project.deleteCustomer_service
 import project.deleteFarmLayout_service
@@ -38,21 +36,29 @@ import project.deleteSchedule_service
 import project.deleteSeedlingPurchase_service
 import project.deleteTreeHealthRecord_service
 import project.deleteUser_service
+import project.demandForecast
 import project.fetchFinancialReports_service
 import project.fetchInventoryReports_service
 import project.fetchPerformanceReports_service
 import project.fetchSalesReports_service
 import project.fetchSupplyChainReports_service
+import project.fieldIndex
+import project.findFieldsInBox_service
+import project.findScheduleConflicts_service
 import project.getCustomer_service
+import project.getDeliveryWindows_service
 import project.getFarmLayout_service
 import project.getFieldCondition_service
+import project.getFieldConditionTile_service
 import project.getFinancialData_service
+import project.getInventoryAsOf_service
 import project.getInventoryItem_service
 import project.getInventoryItems_service
 import project.getInventoryReport_service
 import project.getOrder_service
 import project.getPayrollById_service
 import project.getPayrollDetails_service
+import project.getPerformanceLeaderboard_service
 import project.getPerformanceReview_service
 import project.getPerformanceReviews_service
 import project.getQuickBooksConnectionStatus_service
@@ -63,16 +69,31 @@ import project.getSalesRecords_service
 import project.getSchedule_service
 import project.getScheduleById_service
 import project.getScheduleByRole_service
+import project.getStockProjection_service
 import project.getTreeHealthRecords_service
 import project.getUpcomingTreatments_service
 import project.getUser_service
+import project.importTrees_service
+import project.ingestFieldReadings_service
+import project.inventoryCheckpoints
 import project.listCustomers_service
 import project.listDeliveries_service
 import project.listOrders_service
 import project.listSeedlings_service
+import project.listTrees_service
+import project.locateField_service
+import project.overrideScheduleOccurrence_service
+import project.performanceAnalytics
+import project.planDeliveryRoutes_service
+import project.planHarvest_service
+import project.planStaffRoster_service
+import project.runPayroll_service
 import project.scheduleDelivery_service
 import project.scheduleTreatment_service
 import project.sendFinancialData_service
+import project.stockLedger
+import project.treeProximity
+import project.treeRegistry
 import project.updateCustomer_service
 import project.updateDelivery_service
 import project.updateFarmLayout_service
@@ -86,11 +107,13 @@ import project.updateRole_service
 import project.updateSaleRecord_service
 import project.updateSchedule_service
 import project.updateSeedlingPurchase_service
+import project.updateTreeCohort_service
 import project.updateTreeHealthRecord_service
 import project.updateUser_service
-from fastapi import FastAPI
+import project.workerPool
+from fastapi import FastAPI, Header, Query
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from prisma import Prisma
 
 logger = logging.getLogger(__name__)
@@ -101,7 +124,19 @@ db_client = Prisma(auto_register=True)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await db_client.connect()
+    await project.performanceAnalytics.backfill_summaries()
+    await project.fieldIndex.load_field_index()
+    await project.treeRegistry.load_tree_registry()
+    await project.treeProximity.tree_grid()
+    await project.stockLedger.ensure_stock_indexes()
+    await project.demandForecast.refresh_if_stale()
+    await project.inventoryCheckpoints.build_checkpoints()
+    forecast_refresh = asyncio.create_task(project.demandForecast.refresh_nightly())
+    checkpoint_build = asyncio.create_task(project.inventoryCheckpoints.build_nightly())
     yield
+    forecast_refresh.cancel()
+    checkpoint_build.cancel()
+    project.workerPool.shutdown_pool()
     await db_client.disconnect()
 
 
@@ -121,13 +156,14 @@ async def api_put_updateSchedule(
     type: prisma.enums.ScheduleType,
     status: prisma.enums.ScheduleStatus,
     userId: Optional[int],
+    endsOn: Optional[datetime] = None,
 ) -> project.updateSchedule_service.ScheduleResponse | Response:
     """
     Updates an existing schedule entry. This endpoint will allow modifications to the schedule details, including date, tasks, or resources involved. It plays a significant role in dynamic conditions where schedules need adjustments to adapt to unforeseeable changes or requirements.
     """
     try:
-        res = project.updateSchedule_service.updateSchedule(
-            id, scheduledOn, type, status, userId
+        res = await project.updateSchedule_service.updateSchedule(
+            id, scheduledOn, type, status, userId, endsOn
         )
         return res
     except Exception as e:
@@ -253,14 +289,16 @@ async def api_get_listDeliveries(
     startDate: datetime,
     endDate: datetime,
     status: prisma.enums.ScheduleStatus,
-    itemCategory: Optional[project.listDeliveries_service.Category],
+    itemCategory: Optional[prisma.enums.Category],
+    cursor: Optional[str] = None,
+    limit: int = 100,
 ) -> project.listDeliveries_service.DeliveriesResponse | Response:
     """
-    Lists all scheduled deliveries of trees and other products. It uses data from both the Inventory and Scheduling Modules to compile a comprehensive delivery schedule.
+    Lists scheduled deliveries of trees and other products within a date window, with line items grouped per delivery. Pages are returned in delivery date order; pass nextCursor back as cursor to fetch the next page.
     """
     try:
         res = await project.listDeliveries_service.listDeliveries(
-            startDate, endDate, status, itemCategory
+            startDate, endDate, status, itemCategory, cursor, limit
         )
         return res
     except Exception as e:
@@ -279,6 +317,7 @@ async def api_get_listDeliveries(
 )
 async def api_post_createSchedule(
     scheduledOn: datetime,
+    endsOn: datetime,
     type: prisma.enums.ScheduleType,
     userId: int,
     status: prisma.enums.ScheduleStatus,
@@ -288,8 +327,8 @@ async def api_post_createSchedule(
     Creates a new staff schedule. This route allows HR managers to input new schedule entries into the system, ensuring that entries are validated and conflict checks against existing schedules are performed to prevent overlap.
     """
     try:
-        res = project.createSchedule_service.createSchedule(
-            scheduledOn, type, userId, status, resources
+        res = await project.createSchedule_service.createSchedule(
+            scheduledOn, endsOn, type, userId, status, resources
         )
         return res
     except Exception as e:
@@ -410,10 +449,10 @@ async def api_get_fetchPerformanceReports(
     userId: Optional[int], startDate: Optional[datetime], endDate: Optional[datetime]
 ) -> project.fetchPerformanceReports_service.PerformanceReportsResponse | Response:
     """
-    Generates staff performance reports using data from Staff Performance Management. Evaluates metrics such as task completion rates, efficiency, and review scores to help HR department in decision making.
+    Generates staff performance reports using data from Staff Performance Management. Returns per-user and per-role review statistics (latest score, rolling average, trend, review count) that are kept current as reviews are written.
     """
     try:
-        res = project.fetchPerformanceReports_service.fetchPerformanceReports(
+        res = await project.fetchPerformanceReports_service.fetchPerformanceReports(
             userId, startDate, endDate
         )
         return res
@@ -490,12 +529,16 @@ async def api_get_listOrders(
 )
 async def api_get_getUpcomingTreatments(
     request: project.getUpcomingTreatments_service.GetUpcomingTreeTreatmentsRequest,
+    cursor: Optional[str] = None,
+    limit: int = 500,
 ) -> project.getUpcomingTreatments_service.UpcomingTreeTreatmentsResponse | Response:
     """
-    Fetches a list of upcoming treatments scheduled. It integrates with the Scheduling Module to pull in data about planned dates, types of treatment, and target trees. This helps in preparing for necessary resources and staff allocation.
+    Fetches a list of upcoming treatments scheduled. It integrates with the Scheduling Module to pull in data about planned dates, types of treatment, and target trees. This helps in preparing for necessary resources and staff allocation. Scheduled treatments are listed per tree; pass nextCursor back as cursor to fetch the next page.
     """
     try:
-        res = await project.getUpcomingTreatments_service.getUpcomingTreatments(request)
+        res = await project.getUpcomingTreatments_service.getUpcomingTreatments(
+            request, cursor, limit
+        )
         return res
     except Exception as e:
         logger.exception("Error processing request")
@@ -731,12 +774,24 @@ async def api_get_listCustomers(
     response_model=project.getSchedule_service.FetchStaffSchedulesResponse,
 )
 async def api_get_getSchedule(
-    request: project.getSchedule_service.FetchStaffSchedulesRequest,
+    startDate: Optional[datetime] = None,
+    endDate: Optional[datetime] = None,
+    userId: Optional[int] = None,
+    type: Optional[prisma.enums.ScheduleType] = None,
+    stream: bool = False,
 ) -> project.getSchedule_service.FetchStaffSchedulesResponse | Response:
     """
-    Fetches all staff schedules. This route retrieves complete schedule details from the database. It's intended for viewing the entire set of schedules by authorized managers.
+    Fetches staff schedules in a date window, optionally for one user or schedule type. The window defaults to the next two weeks. With stream set, schedules are sent as newline-delimited JSON while they are read.
     """
     try:
+        request = project.getSchedule_service.FetchStaffSchedulesRequest(
+            startDate=startDate, endDate=endDate, userId=userId, type=type
+        )
+        if stream:
+            return StreamingResponse(
+                project.getSchedule_service.streamSchedules(request),
+                media_type="application/x-ndjson",
+            )
         res = await project.getSchedule_service.getSchedule(request)
         return res
     except Exception as e:
@@ -1080,7 +1135,7 @@ async def api_delete_deleteFarmLayout(
     layoutId: str,
 ) -> project.deleteFarmLayout_service.DeleteFarmLayoutResponse | Response:
     """
-    Deletes a specified farm layout via ID. The system should ensure that the layout does not contain any active assignments or important linkages with other ongoing activities before deletion. Provides a means to clean up unused or outdated maps.
+    Deletes a specified farm layout via ID together with its fields. Provides a means to clean up unused or outdated maps.
     """
     try:
         res = await project.deleteFarmLayout_service.deleteFarmLayout(layoutId)
@@ -1127,7 +1182,7 @@ async def api_put_updateTreeHealthRecord(
     id: int, health_status: str, treatment_details: str
 ) -> project.updateTreeHealthRecord_service.UpdateTreeHealthResponse | Response:
     """
-    Updates an existing tree health record. It's used when there is a change in the health status or after a treatment has been applied. The endpoint requires tree ID and will replace the existing record with new data provided.
+    Updates an existing tree health record. It's used when there is a change in the health status or after a treatment has been applied. The endpoint requires tree ID and records the change as a new assessment, which becomes the tree's latest status.
     """
     try:
         res = await project.updateTreeHealthRecord_service.updateTreeHealthRecord(
@@ -1156,7 +1211,7 @@ async def api_post_scheduleTreatment(
     scheduled_time: time,
 ) -> project.scheduleTreatment_service.ScheduleTreeTreatmentResponse | Response:
     """
-    Schedules a new treatment for one or more trees. Inputs would include tree IDs, treatment type, scheduled date and time. It ensures all treatments are timely and recorded for future reference.
+    Schedules a new treatment for one or more trees. Inputs would include tree IDs, treatment type, scheduled date and time. It ensures all treatments are timely and recorded for future reference. The treatment is stored as one schedule with one row per tree.
     """
     try:
         res = await project.scheduleTreatment_service.scheduleTreatment(
@@ -1179,14 +1234,20 @@ async def api_post_scheduleTreatment(
     response_model=project.addSeedlingPurchase_service.SeedlingPurchaseResponse,
 )
 async def api_post_addSeedlingPurchase(
-    supplier: str, quantity: int, cost: float, purchaseDate: str
+    supplier: str,
+    quantity: int,
+    cost: float,
+    purchaseDate: str,
+    fieldId: Optional[int] = None,
+    species: Optional[str] = None,
+    plantingYear: Optional[int] = None,
 ) -> project.addSeedlingPurchase_service.SeedlingPurchaseResponse | Response:
     """
-    Adds a new seedling purchase to the system. It records details of the purchase such as quantity, supplier, and cost. This action subsequently updates the Inventory through an internal API call that increases inventory levels.
+    Adds a new seedling purchase to the system. It records details of the purchase such as quantity, supplier, and cost. This action subsequently updates the Inventory through an internal API call that increases inventory levels. Seedlings planted into a field are added to that field's cohort of their species and planting year.
     """
     try:
         res = await project.addSeedlingPurchase_service.addSeedlingPurchase(
-            supplier, quantity, cost, purchaseDate
+            supplier, quantity, cost, purchaseDate, fieldId, species, plantingYear
         )
         return res
     except Exception as e:
@@ -1453,12 +1514,16 @@ async def api_delete_deletePerformanceReview(
 )
 async def api_get_getScheduleByRole(
     roleId: str,
+    startDate: Optional[datetime] = None,
+    endDate: Optional[datetime] = None,
 ) -> project.getScheduleByRole_service.SchedulesByRoleResponse | Response:
     """
     Retrieves schedules based on staff role. This route utilizes a lookup to the Staff Roles Management Module to fetch schedules specific to a particular role, crucial for role-based planning and coverage efficiency.
     """
     try:
-        res = await project.getScheduleByRole_service.getScheduleByRole(roleId)
+        res = await project.getScheduleByRole_service.getScheduleByRole(
+            roleId, startDate, endDate
+        )
         return res
     except Exception as e:
         logger.exception("Error processing request")
@@ -1521,7 +1586,10 @@ async def api_get_getFarmLayout(
     "/payrolls", response_model=project.createPayrollEntry_service.CreatePayrollResponse
 )
 async def api_post_createPayrollEntry(
-    userId: int, hoursWorked: float, hourlyWage: float, deductions: float
+    userId: int,
+    hoursWorked: float,
+    hourlyWage: float,
+    deductions: Optional[float] = None,
 ) -> project.createPayrollEntry_service.CreatePayrollResponse | Response:
     """
     Creates a new payroll entry. This function calculates the salary based on hours worked fetched from the Staff Scheduling Module and deductions. It integrates this data with QuickBooks to update financial records immediately. The expected response is the details of the created payroll entry, including its ID and status.
@@ -1643,14 +1711,19 @@ async def api_put_updateSaleRecord(
     response_model=project.getPayrollDetails_service.GetPayrollRecordsResponse,
 )
 async def api_get_getPayrollDetails(
-    employee_id: Optional[str], start_date: Optional[date], end_date: Optional[date]
+    employee_id: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    aggregate: bool = False,
+    period: str = "month",
+    by_role: bool = False,
 ) -> project.getPayrollDetails_service.GetPayrollRecordsResponse | Response:
     """
-    Retrieves a list of payroll records. This endpoint uses data from the Staff Scheduling Module to ensure calculations consider current staff schedules. Each record includes details like employee id, payment amount, date, and deductions. The expected response is an array of payroll data, which integrates dynamically with QuickBooks for financial consistency.
+    Retrieves a list of payroll records. This endpoint uses data from the Staff Scheduling Module to ensure calculations consider current staff schedules. Each record includes details like employee id, payment amount, date, and deductions. The expected response is an array of payroll data, which integrates dynamically with QuickBooks for financial consistency. With aggregate set, per-employee totals per period (and optionally per role) are returned instead.
     """
     try:
         res = await project.getPayrollDetails_service.getPayrollDetails(
-            employee_id, start_date, end_date
+            employee_id, start_date, end_date, aggregate, period, by_role
         )
         return res
     except Exception as e:
@@ -1671,13 +1744,14 @@ async def api_post_createFarmLayout(
     name: str,
     dimensions: project.createFarmLayout_service.Dimensions,
     coordinates: List[project.createFarmLayout_service.Coordinate],
+    fields: Optional[List[project.createFarmLayout_service.FieldInput]] = None,
 ) -> project.createFarmLayout_service.FarmLayoutResponse | Response:
     """
-    Allows creation of a new farm layout. Users can provide map details such as name, dimensions, and specific coordinates of areas. The server should validate the input, create a new map record in the database, and return the created object with an ID. Essential for expanding or re-configuring farm spaces.
+    Allows creation of a new farm layout. Users can provide map details such as name, dimensions, the boundary coordinates and the outlines of the fields inside it. The server validates the input, stores the layout and its fields, and returns the created object with an ID. Essential for expanding or re-configuring farm spaces.
     """
     try:
         res = await project.createFarmLayout_service.createFarmLayout(
-            name, dimensions, coordinates
+            name, dimensions, coordinates, fields
         )
         return res
     except Exception as e:
@@ -1724,13 +1798,14 @@ async def api_put_updateFarmLayout(
     layoutId: str,
     mapName: Optional[str],
     dimensions: Optional[project.updateFarmLayout_service.Dimensions],
+    fields: Optional[List[project.updateFarmLayout_service.FieldUpdate]] = None,
 ) -> project.updateFarmLayout_service.UpdateFarmLayoutResponse | Response:
     """
-    Updates an existing farm layout based on the provided layout ID. This endpoint should accept partial or full updates to fields like map name or dimensions. The system should validate changes, apply them to the specified layout, and reflect these changes in all linked modules.
+    Updates an existing farm layout based on the provided layout ID. This endpoint accepts partial or full updates to the map name, dimensions or the set of fields. The system validates changes, applies them to the specified layout, and reflects these changes in the field lookups.
     """
     try:
         res = await project.updateFarmLayout_service.updateFarmLayout(
-            layoutId, mapName, dimensions
+            layoutId, mapName, dimensions, fields
         )
         return res
     except Exception as e:
@@ -1904,18 +1979,21 @@ async def api_get_fetchSupplyChainReports(
 
 @app.get(
     "/tree-health",
-    response_model=project.getTreeHealthRecords_service.TreeHealthResponse,
+    response_model=project.getTreeHealthRecords_service.TreeHealthRecordsResponse,
 )
 async def api_get_getTreeHealthRecords(
-    tree_category: project.getTreeHealthRecords_service.Category,
-    health_status: Optional[str],
-) -> project.getTreeHealthRecords_service.TreeHealthResponse | Response:
+    health_status: Optional[str] = None,
+    species: Optional[str] = None,
+    fieldId: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = 100,
+) -> project.getTreeHealthRecords_service.TreeHealthRecordsResponse | Response:
     """
-    This endpoint retrieves all health records of the trees. It provides details such as type of tree, date of last check, health status, and any noted issues. Expected to integrate data from the field management module to link each tree to its specific location and condition.
+    This endpoint retrieves the current health of the trees. It provides details such as type of tree, date of last check, health status, and any noted issues, with each tree linked to its field, row and position. Pages are in tree id order; pass nextCursor back as cursor to fetch the next page.
     """
     try:
         res = await project.getTreeHealthRecords_service.getTreeHealthRecords(
-            tree_category, health_status
+            health_status, species, fieldId, cursor, limit
         )
         return res
     except Exception as e:
@@ -2049,13 +2127,67 @@ async def api_get_getOrder(
     response_model=project.getInventoryItem_service.InventoryItemDetailsResponse,
 )
 async def api_get_getInventoryItem(
-    itemId: int,
+    itemId: int, cursor: Optional[str] = None, limit: int = 100
 ) -> project.getInventoryItem_service.InventoryItemDetailsResponse | Response:
     """
-    Retrieves detailed information for a specific inventory item by ID, including stock levels, sourcing information, and item history. Useful for audits and detailed reports.
+    Retrieves detailed information for a specific inventory item by ID, including stock levels, sourcing information, and item history. Useful for audits and detailed reports. Events are paged most recent first; pass nextCursor back as cursor for older ones.
+    """
+    try:
+        res = await project.getInventoryItem_service.getInventoryItem(
+            itemId, cursor, limit
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get(
+    "/api/supply-chain/deliveries/routes",
+    response_model=project.planDeliveryRoutes_service.DeliveryRoutePlanResponse,
+)
+async def api_get_planDeliveryRoutes(
+    day: date, depotLatitude: float, depotLongitude: float
+) -> project.planDeliveryRoutes_service.DeliveryRoutePlanResponse | Response:
+    """
+    Plans the truck runs for a day's pending deliveries, batching geocoded stops onto TRUCK category items within their load capacity and sequencing each run.
+    """
+    try:
+        res = await project.planDeliveryRoutes_service.planDeliveryRoutes(
+            day, depotLatitude, depotLongitude
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get(
+    "/api/supply-chain/deliveries/windows",
+    response_model=project.getDeliveryWindows_service.DeliveryWindowsResponse,
+)
+async def api_get_getDeliveryWindows(
+    fromDate: date, count: int = 5
+) -> project.getDeliveryWindows_service.DeliveryWindowsResponse | Response:
+    """
+    Returns the next N days on which a delivery can still be booked, read from the per-day truck and driver capacity ledger.
     """
     try:
-        res = await project.getInventoryItem_service.getInventoryItem(itemId)
+        res = await project.getDeliveryWindows_service.getDeliveryWindows(
+            fromDate, count
+        )
         return res
     except Exception as e:
         logger.exception("Error processing request")
@@ -2066,3 +2198,528 @@ async def api_get_getInventoryItem(
             status_code=500,
             media_type="application/json",
         )
+
+
+@app.get(
+    "/staff-schedules/conflicts",
+    response_model=project.findScheduleConflicts_service.ScheduleConflictsResponse,
+)
+async def api_get_findScheduleConflicts(
+    weekStart: date,
+) -> project.findScheduleConflicts_service.ScheduleConflictsResponse | Response:
+    """
+    Lists every double-booked pair of shifts in the week starting at weekStart, so HR managers can resolve overlaps in bulk.
+    """
+    try:
+        res = await project.findScheduleConflicts_service.findScheduleConflicts(
+            weekStart
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/staff-schedules/recurring",
+    response_model=project.createScheduleRule_service.ScheduleRuleResponse,
+)
+async def api_post_createScheduleRule(
+    type: prisma.enums.ScheduleType,
+    userId: Optional[int],
+    startsOn: datetime,
+    durationMinutes: int,
+    rrule: str,
+    label: Optional[str] = None,
+) -> project.createScheduleRule_service.ScheduleRuleResponse | Response:
+    """
+    Creates a recurring staff schedule from an RRULE. The rule is stored once and its occurrences are expanded only within the date windows requested by the schedule listings.
+    """
+    try:
+        res = await project.createScheduleRule_service.createScheduleRule(
+            type, userId, startsOn, durationMinutes, rrule, label
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.put(
+    "/staff-schedules/recurring/{ruleId}/occurrences",
+    response_model=project.overrideScheduleOccurrence_service.ScheduleOccurrenceResponse,
+)
+async def api_put_overrideScheduleOccurrence(
+    ruleId: int,
+    occurrenceOn: datetime,
+    cancelled: bool = False,
+    scheduledOn: Optional[datetime] = None,
+    endsOn: Optional[datetime] = None,
+    userId: Optional[int] = None,
+    status: Optional[prisma.enums.ScheduleStatus] = None,
+) -> project.overrideScheduleOccurrence_service.ScheduleOccurrenceResponse | Response:
+    """
+    Cancels or overrides a single occurrence of a recurring schedule by storing a sparse exception row.
+    """
+    try:
+        res = await project.overrideScheduleOccurrence_service.overrideScheduleOccurrence(
+            ruleId, occurrenceOn, cancelled, scheduledOn, endsOn, userId, status
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/staff-schedules/roster",
+    response_model=project.planStaffRoster_service.RosterResponse,
+)
+async def api_post_planStaffRoster(
+    requirements: List[project.planStaffRoster_service.CoverageRequirement],
+    availability: List[project.planStaffRoster_service.StaffAvailability],
+) -> project.planStaffRoster_service.RosterResponse | Response:
+    """
+    Drafts a roster that covers the required headcount per day and role, respecting staff availability, weekly shift caps and existing shifts. The roster is returned for review and bulk insertion into the schedules; nothing is stored.
+    """
+    try:
+        res = await project.planStaffRoster_service.planStaffRoster(
+            requirements, availability
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/payrolls/runs", response_model=project.runPayroll_service.PayrollRunSummary
+)
+async def api_post_runPayroll(
+    periodStart: date,
+    periodEnd: date,
+    defaultHourlyWage: Optional[float] = None,
+    paymentDate: Optional[datetime] = None,
+    taxRuleVersion: Optional[str] = None,
+) -> project.runPayroll_service.PayrollRunSummary | Response:
+    """
+    Runs payroll for a whole pay period in one pass. Hours are derived from the completed shifts of every employee, deductions come from the versioned tax rules, and all payroll entries are written in a single transaction together with a run summary.
+    """
+    try:
+        res = await project.runPayroll_service.runPayroll(
+            periodStart, periodEnd, defaultHourlyWage, paymentDate, taxRuleVersion
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/payrolls/tax-rules",
+    response_model=project.createTaxRuleSet_service.TaxRuleSetResponse,
+)
+async def api_post_createTaxRuleSet(
+    version: str,
+    effectiveFrom: datetime,
+    rules: List[project.createTaxRuleSet_service.TaxRuleInput],
+) -> project.createTaxRuleSet_service.TaxRuleSetResponse | Response:
+    """
+    Stores a new, immutable version of the payroll deduction rules: brackets, flat rates, wage-base caps and year-to-date thresholds. Payroll runs record the version they applied.
+    """
+    try:
+        res = await project.createTaxRuleSet_service.createTaxRuleSet(
+            version, effectiveFrom, rules
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get(
+    "/reports/performance/leaderboard",
+    response_model=project.getPerformanceLeaderboard_service.PerformanceLeaderboardResponse,
+)
+async def api_get_getPerformanceLeaderboard(
+    k: int = 10, bottom: bool = False, role: Optional[prisma.enums.Role] = None
+) -> project.getPerformanceLeaderboard_service.PerformanceLeaderboardResponse | Response:
+    """
+    Returns the top or bottom k staff members by rolling review average, optionally within one role, read from the sorted performance summaries.
+    """
+    try:
+        res = await project.getPerformanceLeaderboard_service.getPerformanceLeaderboard(
+            k, bottom, role
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get(
+    "/fields/locate", response_model=project.locateField_service.FieldLocationResponse
+)
+async def api_get_locateField(
+    latitude: float, longitude: float
+) -> project.locateField_service.FieldLocationResponse | Response:
+    """
+    Finds the fields containing a point and the nearest field to it, answered from the in-process spatial index of field outlines.
+    """
+    try:
+        res = await project.locateField_service.locateField(latitude, longitude)
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get(
+    "/fields/in-box", response_model=project.findFieldsInBox_service.FieldsInBoxResponse
+)
+async def api_get_findFieldsInBox(
+    minLatitude: float, minLongitude: float, maxLatitude: float, maxLongitude: float
+) -> project.findFieldsInBox_service.FieldsInBoxResponse | Response:
+    """
+    Lists the fields whose extent intersects a bounding box, answered from the in-process spatial index of field outlines.
+    """
+    try:
+        res = await project.findFieldsInBox_service.findFieldsInBox(
+            minLatitude, minLongitude, maxLatitude, maxLongitude
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/fields/readings",
+    response_model=project.ingestFieldReadings_service.IngestReadingsResponse,
+)
+async def api_post_ingestFieldReadings(
+    readings: List[project.ingestFieldReadings_service.SensorReadingInput],
+) -> project.ingestFieldReadings_service.IngestReadingsResponse | Response:
+    """
+    Accepts a batch of soil moisture and soil temperature readings from the field probes. Readings are stored raw for a retention window and downsampled into hourly and daily rollups as they arrive.
+    """
+    try:
+        res = await project.ingestFieldReadings_service.ingestFieldReadings(readings)
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get("/fields/tiles/{layer}/{z}/{x}/{y}.png")
+async def api_get_getFieldConditionTile(
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
+    """
+    Serves one XYZ map tile of the field condition heatmap, colouring fields by moisture, temperature or health. Tiles carry their content version as an ETag and are only re-rendered when a field on them changed.
+    """
+    try:
+        res = await project.getFieldConditionTile_service.getFieldConditionTile(
+            layer, z, x, y
+        )
+        headers = {"ETag": f'"{res.version}"', "Cache-Control": "no-cache"}
+        if if_none_match == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
+        return Response(content=res.content, media_type="image/png", headers=headers)
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/trees/import", response_model=project.importTrees_service.TreeImportResponse
+)
+async def api_post_importTrees(
+    trees: List[project.importTrees_service.TreeInput],
+) -> project.importTrees_service.TreeImportResponse | Response:
+    """
+    Registers a batch of individual trees by field, row and position with their species and planting year. Trees whose place is already taken are skipped.
+    """
+    try:
+        res = await project.importTrees_service.importTrees(trees)
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get("/trees", response_model=project.listTrees_service.TreeListResponse)
+async def api_get_listTrees(
+    fieldId: Optional[int] = None,
+    species: Optional[str] = None,
+    plantingYear: Optional[int] = None,
+    offset: int = 0,
+    limit: int = 100,
+) -> project.listTrees_service.TreeListResponse | Response:
+    """
+    Lists registered trees by field, species and planting year with per-cohort counts, answered from the in-memory tree registry.
+    """
+    try:
+        res = await project.listTrees_service.listTrees(
+            fieldId, species, plantingYear, offset, limit
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get(
+    "/tree-health/{treeId}/spread",
+    response_model=project.analyzeDiseaseSpread_service.DiseaseSpreadResponse,
+)
+async def api_get_analyzeDiseaseSpread(
+    treeId: int,
+    radiusMeters: float = 10.0,
+    windFromDegrees: Optional[float] = None,
+    includeDownhill: bool = True,
+    sectorDegrees: float = 90.0,
+    scheduleInspections: bool = False,
+    inspectionDate: Optional[datetime] = None,
+) -> project.analyzeDiseaseSpread_service.DiseaseSpreadResponse | Response:
+    """
+    Finds the trees at risk from a diseased tree: those within a radius, and those of the same field lying downhill or downwind of it. Optionally schedules an inspection of all trees found.
+    """
+    try:
+        res = await project.analyzeDiseaseSpread_service.analyzeDiseaseSpread(
+            treeId,
+            radiusMeters,
+            windFromDegrees,
+            includeDownhill,
+            sectorDegrees,
+            scheduleInspections,
+            inspectionDate,
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get(
+    "/trees/stock-projection",
+    response_model=project.getStockProjection_service.StockProjectionResponse,
+)
+async def api_get_getStockProjection(
+    fieldId: Optional[int] = None, species: Optional[str] = None
+) -> project.getStockProjection_service.StockProjectionResponse | Response:
+    """
+    Projects the trees standing and the trees at saleable height in each of the next ten seasons, from the planting cohorts of each field, species and year.
+    """
+    try:
+        res = await project.getStockProjection_service.getStockProjection(
+            fieldId, species
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.put(
+    "/trees/cohorts",
+    response_model=project.updateTreeCohort_service.TreeCohortResponse,
+)
+async def api_put_updateTreeCohort(
+    fieldId: int, species: str, plantingYear: int, survivalRate: float
+) -> project.updateTreeCohort_service.TreeCohortResponse | Response:
+    """
+    Sets the expected yearly survival rate of the trees of one species planted in one field in one year.
+    """
+    try:
+        res = await project.updateTreeCohort_service.updateTreeCohort(
+            fieldId, species, plantingYear, survivalRate
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/harvests/plan", response_model=project.planHarvest_service.HarvestPlanResponse
+)
+async def api_post_planHarvest(
+    demand: List[project.planHarvest_service.HarvestDemand],
+    crews: int,
+    crewDailyCapacity: int = 400,
+    truckCapacity: int = 500,
+    fieldIds: Optional[List[int]] = None,
+    shiftStart: time = time(7),
+    shiftHours: float = 8.0,
+    commit: bool = False,
+) -> project.planHarvest_service.HarvestPlanResponse | Response:
+    """
+    Plans which fields and rows to harvest on which days to meet the forecast demand with few truck trips and crew moves, and optionally writes the plan as HARVESTING schedules.
+    """
+    try:
+        res = await project.planHarvest_service.planHarvest(
+            demand,
+            crews,
+            crewDailyCapacity,
+            truckCapacity,
+            fieldIds,
+            shiftStart,
+            shiftHours,
+            commit,
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get(
+    "/inventory/as-of",
+    response_model=project.getInventoryAsOf_service.InventoryAsOfResponse,
+)
+async def api_get_getInventoryAsOf(
+    asOf: datetime, itemIds: Optional[List[int]] = Query(None)
+) -> project.getInventoryAsOf_service.InventoryAsOfResponse | Response:
+    """
+    Returns the stock each item held at a past instant, replayed from the nearest daily checkpoint, for audits.
+    """
+    try:
+        res = await project.getInventoryAsOf_service.getInventoryAsOf(asOf, itemIds)
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get("/inventory/items/{itemId}/events")
+async def api_get_streamInventoryEvents(itemId: int) -> StreamingResponse | Response:
+    """
+    Streams the full event history of an inventory item as newline-delimited JSON, most recent first.
+    """
+    try:
+        return StreamingResponse(
+            await project.getInventoryItem_service.streamInventoryEvents(itemId),
+            media_type="application/x-ndjson",
+        )
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return Response(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
@@ -0,0 +1,215 @@
+"""
+The single path through which item stock levels change.
+
+Every change of an item's stockLevel goes through apply_stock_changes or set_stock_level,
+which lock the items' rows in id order, write the new levels together with the reOrderNeed
+flags recomputed against each item's reorder level (the larger of its minStockLevel and its
+forecast reorder point) and record one InventoryEvent per change, all in one transaction. A
+flag that turns on opens a ReorderRequest for the item and one that turns off resolves it, so
+the reorder queue holds exactly the items whose stock is at or below their reorder level.
+Events dated in the past invalidate the inventory checkpoints they precede.
+
+Two indexes Prisma cannot declare are created at startup by ensure_stock_indexes: a partial
+index over the items that need reordering, which listSeedlings reads instead of filtering
+every item, and a partial unique index that keeps one open request per item.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.inventoryCheckpoints import drop_checkpoints_after
+from project.sensorSeries import values_sql
+
+_STOCK_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS "Item_reorder_idx" ON "Item" ("category", "id")'
+    ' INCLUDE ("name", "stockLevel") WHERE "reOrderNeed"',
+    'CREATE UNIQUE INDEX IF NOT EXISTS "ReorderRequest_open_key"'
+    ' ON "ReorderRequest" ("itemId") WHERE "resolvedAt" IS NULL',
+)
+
+
+class StockChange(NamedTuple):
+    itemId: int
+    change: int
+    eventType: prisma.enums.InventoryEventType
+
+
+class InsufficientStockError(ValueError):
+    """
+    Raised when changes would take items below zero stock, or name items that do not exist,
+    while availability is checked; item_ids lists those items.
+    """
+
+    def __init__(self, item_ids: List[int]):
+        super().__init__(
+            "Insufficient stock for items: " + ", ".join(map(str, item_ids))
+        )
+        self.item_ids = item_ids
+
+
+async def ensure_stock_indexes() -> None:
+    """
+    Creates the partial indexes over items needing reorder and open reorder requests.
+    """
+    client = prisma.get_client()
+    for statement in _STOCK_INDEXES:
+        await client.execute_raw(statement)
+
+
+async def _lock_items(
+    transaction: Any, item_ids: List[int]
+) -> Dict[int, Dict[str, Any]]:
+    placeholders = ", ".join(f"${slot}" for slot in range(1, len(item_ids) + 1))
+    rows = await transaction.query_raw(
+        'SELECT i."id", i."stockLevel", i."reOrderNeed",'
+        ' GREATEST(i."minStockLevel", COALESCE(f."reorderPoint", 0)) AS "reorderLevel"'
+        ' FROM "Item" i LEFT JOIN "ItemForecast" f ON f."itemId" = i."id"'
+        f' WHERE i."id" IN ({placeholders}) ORDER BY i."id" FOR UPDATE OF i',
+        *item_ids,
+    )
+    return {row["id"]: row for row in rows}
+
+
+async def queue_crossings(transaction: Any, rows: List[Dict[str, Any]]) -> None:
+    """
+    Opens reorder requests for rows whose reOrderNeed turned on and resolves those of rows
+    whose flag turned off; rows carry the item's id, new flag, stockLevel and reorderLevel.
+    """
+    opened = [row for row in rows if row["reOrderNeed"]]
+    closed = [row["id"] for row in rows if not row["reOrderNeed"]]
+    if opened:
+        await prisma.models.ReorderRequest.prisma(transaction).create_many(
+            data=[
+                {
+                    "itemId": row["id"],
+                    "stockLevel": row["stockLevel"],
+                    "reorderLevel": row["reorderLevel"],
+                }
+                for row in opened
+            ],
+            skip_duplicates=True,
+        )
+    if closed:
+        await prisma.models.ReorderRequest.prisma(transaction).update_many(
+            where={"itemId": {"in": closed}, "resolvedAt": None},
+            data={"resolvedAt": datetime.utcnow()},
+        )
+
+
+async def _apply(
+    transaction: Any,
+    changes: List[StockChange],
+    check_available: bool,
+    date: Optional[datetime],
+    order_id: Optional[int],
+) -> Dict[int, int]:
+    totals: Dict[int, int] = defaultdict(int)
+    for change in changes:
+        totals[change.itemId] += change.change
+    item_ids = sorted(totals)
+    locked = await _lock_items(transaction, item_ids)
+    missing = [item_id for item_id in item_ids if item_id not in locked]
+    if missing and not check_available:
+        raise ValueError("Unknown items: " + ", ".join(map(str, missing)))
+    levels = {
+        item_id: locked[item_id]["stockLevel"] + totals[item_id]
+        for item_id in item_ids
+        if item_id in locked
+    }
+    if check_available:
+        short = [
+            item_id
+            for item_id in item_ids
+            if item_id not in locked or (totals[item_id] < 0 and levels[item_id] < 0)
+        ]
+        if short:
+            raise InsufficientStockError(short)
+    rows = [
+        [item_id, levels[item_id], levels[item_id] <= locked[item_id]["reorderLevel"]]
+        for item_id in item_ids
+    ]
+    values, params = values_sql(rows, ("::int", "::int", "::boolean"))
+    await transaction.execute_raw(
+        'UPDATE "Item" i SET "stockLevel" = c."stockLevel", "reOrderNeed" = c."reOrderNeed"'
+        f' FROM (VALUES {values}) AS c("id", "stockLevel", "reOrderNeed")'
+        ' WHERE i."id" = c."id"',
+        *params,
+    )
+    events = []
+    for change in changes:
+        event: Dict[str, Any] = {
+            "itemId": change.itemId,
+            "eventType": change.eventType,
+            "quantityChange": change.change,
+        }
+        if date is not None:
+            event["date"] = date
+        if order_id is not None:
+            event["orderId"] = order_id
+        events.append(event)
+    await prisma.models.InventoryEvent.prisma(transaction).create_many(data=events)
+    if date is not None:
+        await drop_checkpoints_after(
+            transaction, {item_id: date for item_id in item_ids}
+        )
+    await queue_crossings(
+        transaction,
+        [
+            {
+                "id": item_id,
+                "reOrderNeed": need,
+                "stockLevel": level,
+                "reorderLevel": locked[item_id]["reorderLevel"],
+            }
+            for item_id, level, need in rows
+            if need != locked[item_id]["reOrderNeed"]
+        ],
+    )
+    return levels
+
+
+async def apply_stock_changes(
+    changes: List[StockChange],
+    transaction: Any = None,
+    check_available: bool = False,
+    date: Optional[datetime] = None,
+    order_id: Optional[int] = None,
+) -> Dict[int, int]:
+    """
+    Applies the changes and returns the new stock level per item. Runs in the given
+    transaction, or in its own one. Unknown items raise ValueError; with check_available,
+    they and changes that would take an item below zero raise InsufficientStockError
+    instead. Either way nothing is written. The events are dated date, or now, and linked
+    to the order with id order_id if given.
+    """
+    if not changes:
+        return {}
+    if transaction is not None:
+        return await _apply(transaction, changes, check_available, date, order_id)
+    async with prisma.get_client().tx(timeout=timedelta(seconds=30)) as transaction:
+        return await _apply(transaction, changes, check_available, date, order_id)
+
+
+async def set_stock_level(
+    item_id: int,
+    level: int,
+    event_type: prisma.enums.InventoryEventType = prisma.enums.InventoryEventType.ADJUSTED,
+) -> int:
+    """
+    Sets an item's stock level, recording the difference as one event. Returns the level.
+    """
+    async with prisma.get_client().tx(timeout=timedelta(seconds=30)) as transaction:
+        locked = await _lock_items(transaction, [item_id])
+        if item_id not in locked:
+            raise ValueError(f"Unknown item {item_id}.")
+        change = level - locked[item_id]["stockLevel"]
+        if change == 0:
+            return level
+        levels = await _apply(
+            transaction, [StockChange(item_id, change, event_type)], False, None, None
+        )
+    return levels[item_id]
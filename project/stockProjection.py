@@ -0,0 +1,209 @@
+"""
+Projection of saleable tree stock over the coming seasons.
+
+Trees take six to ten years to reach saleable height, so stock is projected per cohort: the
+trees of one species planted in one field in one year. A cohort's size is the larger of the
+seedlings recorded as planted into it (TreeCohort.planted, fed by seedling purchases) and its
+individually registered trees; trees whose latest health assessment is DEAD are taken off.
+Each later season keeps survivalRate of the previous one's trees, and the share of survivors
+at saleable height grows evenly from the species' minHarvestAge to its maxHarvestAge.
+
+The projection is one (cohort x season) matrix computed with NumPy broadcasting and cached.
+Seedling purchases, cohort changes and health assessments invalidate it, as does a change of
+the tree registry or of the calendar year. Other worker processes do not see those
+invalidations, so a projection is also rebuilt once it is MAX_CACHE_AGE old.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+import prisma
+import prisma.models
+from project.treeRegistry import tree_registry
+
+PROJECTION_SEASONS = 10
+DEFAULT_SURVIVAL_RATE = 0.95
+DEFAULT_HARVEST_AGES = (6, 10)
+MAX_CACHE_AGE = timedelta(minutes=5)
+# Cohort keys pack field, species and planting year into one int64.
+_FIELD_SHIFT = 32
+_SPECIES_SHIFT = 16
+
+
+def cohort_keys(
+    field_ids: np.ndarray, species_ids: np.ndarray, planting_years: np.ndarray
+) -> np.ndarray:
+    return (
+        (field_ids.astype(np.int64) << _FIELD_SHIFT)
+        | (species_ids.astype(np.int64) << _SPECIES_SHIFT)
+        | planting_years.astype(np.int64)
+    )
+
+
+def project(
+    alive: np.ndarray,
+    survival_rate: np.ndarray,
+    planting_year: np.ndarray,
+    min_age: np.ndarray,
+    max_age: np.ndarray,
+    seasons: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    Standing and saleable trees of each cohort (rows) in each season (columns).
+    """
+    years_ahead = seasons - seasons[0]
+    standing = alive[:, None] * survival_rate[:, None] ** years_ahead[None, :]
+    age = seasons[None, :] - planting_year[:, None]
+    span = np.maximum(max_age - min_age, 0)[:, None] + 1
+    mature = np.clip((age - min_age[:, None] + 1) / span, 0.0, 1.0)
+    return {"standing": standing, "saleable": standing * mature}
+
+
+class StockProjection:
+    """
+    Cohort columns and their projected stock for PROJECTION_SEASONS seasons from first_season.
+    """
+
+    def __init__(
+        self,
+        first_season: int,
+        cohorts: Dict[str, np.ndarray],
+        registry_version: int,
+        built_at: datetime,
+    ) -> None:
+        self.first_season = first_season
+        self.seasons = np.arange(first_season, first_season + PROJECTION_SEASONS)
+        self.cohorts = cohorts
+        self.registry_version = registry_version
+        self.built_at = built_at
+        self.stock = project(
+            cohorts["alive"],
+            cohorts["survivalRate"],
+            cohorts["plantingYear"],
+            cohorts["minHarvestAge"],
+            cohorts["maxHarvestAge"],
+            self.seasons,
+        )
+
+    def select(
+        self, field_id: Optional[int] = None, species_id: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Indexes of the cohorts in the given field and of the given species.
+        """
+        mask = np.ones(len(self.cohorts["fieldId"]), dtype=bool)
+        if field_id is not None:
+            mask &= self.cohorts["fieldId"] == field_id
+        if species_id is not None:
+            mask &= self.cohorts["speciesId"] == species_id
+        return np.flatnonzero(mask)
+
+    def totals(self, indexes: np.ndarray, measure: str) -> np.ndarray:
+        """
+        Per-season sums of a measure ("standing" or "saleable") over the given cohorts.
+        """
+        return self.stock[measure][indexes].sum(axis=0)
+
+    def by_species(self, indexes: np.ndarray, measure: str) -> Dict[int, np.ndarray]:
+        """
+        Per-season sums of a measure over the given cohorts, per species.
+        """
+        species_ids = self.cohorts["speciesId"][indexes]
+        order, slots = np.unique(species_ids, return_inverse=True)
+        sums = np.zeros((len(order), PROJECTION_SEASONS))
+        np.add.at(sums, slots, self.stock[measure][indexes])
+        return {int(species_id): sums[slot] for slot, species_id in enumerate(order)}
+
+
+async def _load(now: datetime) -> StockProjection:
+    registry_version = tree_registry.version
+    columns = tree_registry.columns
+    registered_keys, registered = np.unique(
+        cohort_keys(columns["fieldId"], columns["speciesId"], columns["plantingYear"]),
+        return_counts=True,
+    )
+    dead_rows = await prisma.get_client().query_raw(
+        'SELECT "treeId" FROM "TreeHealthLatest" WHERE "status" = \'DEAD\''
+    )
+    positions = tree_registry.positions([row["treeId"] for row in dead_rows])
+    positions = positions[positions >= 0]
+    dead_keys, dead = np.unique(
+        cohort_keys(
+            columns["fieldId"][positions],
+            columns["speciesId"][positions],
+            columns["plantingYear"][positions],
+        ),
+        return_counts=True,
+    )
+    recorded = await prisma.models.TreeCohort.prisma().find_many()
+    recorded_keys = cohort_keys(
+        np.array([cohort.fieldId for cohort in recorded], dtype=np.int64),
+        np.array([cohort.speciesId for cohort in recorded], dtype=np.int64),
+        np.array([cohort.plantingYear for cohort in recorded], dtype=np.int64),
+    )
+    keys = np.union1d(registered_keys, recorded_keys)
+
+    size = np.zeros(len(keys), dtype=np.int64)
+    size[np.searchsorted(keys, registered_keys)] = registered
+    planted = np.zeros(len(keys), dtype=np.int64)
+    survival_rate = np.full(len(keys), DEFAULT_SURVIVAL_RATE)
+    slots = np.searchsorted(keys, recorded_keys)
+    planted[slots] = [cohort.planted for cohort in recorded]
+    survival_rate[slots] = [cohort.survivalRate for cohort in recorded]
+    size = np.maximum(size, planted)
+    lost = np.zeros(len(keys), dtype=np.int64)
+    lost[np.searchsorted(keys, dead_keys)] = dead
+
+    species_ids = (keys >> _SPECIES_SHIFT) & 0xFFFF
+    ages = {
+        species.id: (species.minHarvestAge, species.maxHarvestAge)
+        for species in await prisma.models.TreeSpecies.prisma().find_many()
+    }
+    harvest_ages = np.array(
+        [ages.get(int(species_id), DEFAULT_HARVEST_AGES) for species_id in species_ids],
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    cohorts = {
+        "fieldId": keys >> _FIELD_SHIFT,
+        "speciesId": species_ids,
+        "plantingYear": keys & 0xFFFF,
+        "alive": np.maximum(size - lost, 0).astype(np.float64),
+        "survivalRate": survival_rate,
+        "minHarvestAge": harvest_ages[:, 0],
+        "maxHarvestAge": harvest_ages[:, 1],
+    }
+    return StockProjection(now.year, cohorts, registry_version, now)
+
+
+_projection: Optional[StockProjection] = None
+# Bumped by every invalidation, so a projection read while its inputs changed is not kept.
+_generation = 0
+
+
+def invalidate_stock_projection() -> None:
+    """
+    Drops the cached projection; the next request recomputes it.
+    """
+    global _projection, _generation
+    _projection = None
+    _generation += 1
+
+
+async def stock_projection(now: datetime) -> StockProjection:
+    """
+    The projection from the current season, recomputed first if any of its inputs changed.
+    """
+    global _projection
+    projection = _projection
+    if (
+        projection is None
+        or projection.first_season != now.year
+        or projection.registry_version != tree_registry.version
+        or now - projection.built_at >= MAX_CACHE_AGE
+    ):
+        generation = _generation
+        projection = await _load(now)
+        if generation == _generation:
+            _projection = projection
+    return projection
@@ -0,0 +1,30 @@
+"""
+Conversions to the naive UTC datetimes the timestamp columns hold.
+
+Every DateTime column is a timestamp without time zone holding UTC. The API accepts both
+naive datetimes, taken to be UTC already, and offset-aware ones, which must be converted
+before they are stored or compared, not just stripped of their offset. Raw queries return
+timestamps either as datetimes or as ISO strings, with or without an offset. All code that
+compares or stores instants goes through these helpers, so naive and aware values never mix.
+"""
+
+from datetime import datetime, timezone
+from typing import Any
+
+
+def to_utc(value: datetime) -> datetime:
+    """
+    A naive UTC datetime, as the timestamp columns store them.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_timestamp(value: Any) -> datetime:
+    """
+    A timestamp read by a raw query, as a naive UTC datetime.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return to_utc(value)
@@ -0,0 +1,223 @@
+"""
+In-process cache of the upcoming-treatments window.
+
+Every health specialist's home screen lists the treatments of the next WINDOW_DAYS days, one
+entry per tree. Instead of running the joined query for every page, the whole window is read
+once, slightly longer than needed so that it stays exact while it ages, and kept as a list
+sorted by the page order; a page is a binary search for the cursor plus a slice. Health
+statuses change independently and are joined per page, so they are never cached.
+
+The cache is dropped by the services that create, change, cancel or delete treatment
+schedules and recurring treatment rules, and whenever the tree registry changes. Other worker
+processes do not see those invalidations, so a window is also rebuilt once it is
+MAX_CACHE_AGE old, which bounds how stale another process can be. Windows with more than
+MAX_CACHED_ENTRIES entries are not cached; pages are then read with the keyset query directly,
+and the verdict is remembered like a window, so the oversized read is not repeated for every
+request. Concurrent requests that miss the cache wait for a single rebuild.
+"""
+
+import asyncio
+import bisect
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+
+import prisma
+import prisma.enums
+from project.recurringSchedules import expand_rules
+from project.timestamps import parse_timestamp, to_utc
+from project.treeRegistry import tree_registry
+
+WINDOW_DAYS = 30
+MAX_CACHE_AGE = timedelta(minutes=5)
+MAX_CACHED_ENTRIES = 200_000
+# Sorts after every schedule and tree id, for resuming after a recurring occurrence.
+LAST_ID = 2**31 - 1
+
+# Entries are ordered by (date, 0 for scheduled and 1 for recurring, schedule or rule id, tree id);
+# dates are naive UTC, so scheduled and recurring entries compare.
+SortKey = Tuple[datetime, int, int, int]
+
+
+class TreatmentEntry(NamedTuple):
+    """
+    One tree of a scheduled treatment, or one occurrence of a recurring treatment.
+    """
+
+    key: SortKey
+    treatmentType: str
+    treeId: Optional[int] = None
+    location: Optional[str] = None
+    scheduleId: Optional[int] = None
+    ruleId: Optional[int] = None
+
+
+class TreatmentWindow:
+    """
+    The entries between start and end, sorted by key.
+    """
+
+    def __init__(
+        self,
+        start: datetime,
+        end: datetime,
+        entries: List[TreatmentEntry],
+        registry_version: int,
+    ) -> None:
+        self.built_at = start
+        self.start = start
+        self.end = end
+        self.entries = entries
+        self.keys = [entry.key for entry in entries]
+        self.registry_version = registry_version
+
+    def page(
+        self, window_start: datetime, window_end: datetime, after: SortKey, limit: int
+    ) -> List[TreatmentEntry]:
+        """
+        Up to limit entries after the cursor key that fall in [window_start, window_end).
+        """
+        first = max(
+            bisect.bisect_right(self.keys, after),
+            bisect.bisect_left(self.keys, (window_start,)),
+        )
+        last = bisect.bisect_left(self.keys, (window_end,))
+        return self.entries[first : min(last, first + limit)]
+
+
+async def scheduled_entries(
+    window_start: datetime,
+    window_end: datetime,
+    after: Optional[SortKey],
+    limit: int,
+) -> List[TreatmentEntry]:
+    """
+    The per-tree entries of scheduled treatments in [window_start, window_end) after the
+    cursor key, at most limit of them, read with one keyset query on (scheduledOn, id).
+    """
+    window_start, window_end = to_utc(window_start), to_utc(window_end)
+    after_date, after_source, after_id, after_tree = after or (window_start, 0, 0, 0)
+    after_date = to_utc(after_date)
+    if after_source == 1:
+        after_id = after_tree = LAST_ID
+    rows = await prisma.get_client().query_raw(
+        'SELECT s."id" AS "scheduleId", s."scheduledOn", t."treatmentType",'
+        ' tt."treeId", tr."row", tr."position", f."name" AS "fieldName"'
+        ' FROM "Schedule" s JOIN "Treatment" t ON t."scheduleId" = s."id"'
+        ' JOIN "TreatmentTree" tt ON tt."scheduleId" = s."id"'
+        ' JOIN "Tree" tr ON tr."id" = tt."treeId"'
+        ' JOIN "Field" f ON f."id" = tr."fieldId"'
+        " WHERE s.\"type\" = 'TREATMENT' AND s.\"status\" <> 'CANCELLED'"
+        ' AND s."scheduledOn" >= $1::timestamp AND s."scheduledOn" < $2::timestamp'
+        ' AND (s."scheduledOn", s."id", tt."treeId") > ($3::timestamp, $4, $5)'
+        ' ORDER BY s."scheduledOn", s."id", tt."treeId" LIMIT $6',
+        window_start,
+        window_end,
+        after_date,
+        after_id,
+        after_tree,
+        limit,
+    )
+    entries = []
+    for row in rows:
+        entries.append(
+            TreatmentEntry(
+                key=(
+                    parse_timestamp(row["scheduledOn"]),
+                    0,
+                    row["scheduleId"],
+                    row["treeId"],
+                ),
+                treatmentType=row["treatmentType"],
+                treeId=row["treeId"],
+                location=f"{row['fieldName']}, row {row['row']}, position {row['position']}",
+                scheduleId=row["scheduleId"],
+            )
+        )
+    return entries
+
+
+async def recurring_entries(
+    window_start: datetime, window_end: datetime
+) -> List[TreatmentEntry]:
+    """
+    The occurrences of recurring treatments in [window_start, window_end) that are not cancelled.
+    """
+    window_start, window_end = to_utc(window_start), to_utc(window_end)
+    occurrences = await expand_rules(
+        {"type": prisma.enums.ScheduleType.TREATMENT}, window_start, window_end
+    )
+    return [
+        TreatmentEntry(
+            key=(occurrence.scheduledOn, 1, occurrence.ruleId, 0),
+            treatmentType=occurrence.label or "Treatment",
+            ruleId=occurrence.ruleId,
+        )
+        for occurrence in occurrences
+        if occurrence.status != prisma.enums.ScheduleStatus.CANCELLED
+        and window_start <= occurrence.scheduledOn < window_end
+    ]
+
+
+_window: Optional[TreatmentWindow] = None
+# When the window was too large to cache: when that was found and the registry version then.
+_oversized: Optional[Tuple[datetime, int]] = None
+# Bumped by every invalidation, so a window read while treatments changed is not kept.
+_generation = 0
+# One rebuild at a time; requests that miss meanwhile wait for it and use its result.
+_rebuild_lock = asyncio.Lock()
+
+
+def invalidate_treatment_window() -> None:
+    """
+    Drops the cached window, or the verdict that it is too large; the next request rebuilds it.
+    """
+    global _window, _oversized, _generation
+    _window = None
+    _oversized = None
+    _generation += 1
+
+
+def _cached(now: datetime) -> Tuple[bool, Optional[TreatmentWindow]]:
+    window = _window
+    if (
+        window is not None
+        and now - window.built_at < MAX_CACHE_AGE
+        and now >= window.start
+        and window.registry_version == tree_registry.version
+    ):
+        return True, window
+    oversized = _oversized
+    if (
+        oversized is not None
+        and now - oversized[0] < MAX_CACHE_AGE
+        and oversized[1] == tree_registry.version
+    ):
+        return True, None
+    return False, None
+
+
+async def treatment_window(now: datetime) -> Optional[TreatmentWindow]:
+    """
+    A cached window covering [now, now + WINDOW_DAYS days), or None when it is too large to cache.
+    """
+    global _window, _oversized
+    hit, window = _cached(now)
+    if hit:
+        return window
+    async with _rebuild_lock:
+        hit, window = _cached(now)
+        if hit:
+            return window
+        registry_version, generation = tree_registry.version, _generation
+        start, end = now, now + timedelta(days=WINDOW_DAYS) + MAX_CACHE_AGE
+        entries = await scheduled_entries(start, end, None, MAX_CACHED_ENTRIES + 1)
+        if len(entries) > MAX_CACHED_ENTRIES:
+            if generation == _generation:
+                _window, _oversized = None, (now, registry_version)
+            return None
+        entries.extend(await recurring_entries(start, end))
+        entries.sort(key=lambda entry: entry.key)
+        window = TreatmentWindow(start, end, entries, registry_version)
+        if generation == _generation:
+            _window, _oversized = window, None
+    return window
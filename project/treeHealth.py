@@ -0,0 +1,124 @@
+"""
+Tree health history and the latest-status-per-tree index.
+
+Assessments are only ever appended. In the same transaction the assessment is folded into
+TreeHealthLatest with an INSERT ... ON CONFLICT DO UPDATE that only wins when the new
+assessment is at least as recent as the stored one, so back-dated entries extend the history
+without overwriting a newer status. The latest row carries the tree's species and field,
+whose (status, species) and (status, field) indexes answer current-status queries directly.
+Deleting an assessment entered in error recomputes the tree's latest row from what remains.
+Both drop the cached stock projection, which counts the trees whose latest status is DEAD.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.stockProjection import invalidate_stock_projection
+from project.timestamps import to_utc
+
+
+def parse_status(value: str) -> prisma.enums.TreeHealthStatus:
+    """
+    Accepts "At Risk", "at_risk", "AT_RISK" and the like.
+
+    Raises:
+        ValueError: If the value names no known status.
+    """
+    name = value.strip().upper().replace(" ", "_").replace("-", "_")
+    try:
+        return prisma.enums.TreeHealthStatus(name)
+    except ValueError:
+        raise ValueError(
+            f"Unknown health status {value!r}; expected one of "
+            f"{', '.join(status.value for status in prisma.enums.TreeHealthStatus)}."
+        ) from None
+
+
+async def _store_latest(
+    client: prisma.Prisma,
+    tree: prisma.models.Tree,
+    assessment: prisma.models.TreeHealthAssessment,
+    replace_newer: bool = False,
+) -> None:
+    await client.execute_raw(
+        'INSERT INTO "TreeHealthLatest" ("treeId", "assessmentId", "status", "issues",'
+        ' "assessedOn", "speciesId", "fieldId")'
+        ' VALUES ($1, $2, $3::"TreeHealthStatus", $4, $5::timestamp, $6, $7)'
+        ' ON CONFLICT ("treeId") DO UPDATE SET "assessmentId" = EXCLUDED."assessmentId",'
+        ' "status" = EXCLUDED."status", "issues" = EXCLUDED."issues",'
+        ' "assessedOn" = EXCLUDED."assessedOn"'
+        + (
+            ""
+            if replace_newer
+            else ' WHERE (EXCLUDED."assessedOn", EXCLUDED."assessmentId")'
+            ' >= ("TreeHealthLatest"."assessedOn", "TreeHealthLatest"."assessmentId")'
+        ),
+        tree.id,
+        assessment.id,
+        prisma.enums.TreeHealthStatus(assessment.status).value,
+        assessment.issues,
+        to_utc(assessment.assessedOn),
+        tree.speciesId,
+        tree.fieldId,
+    )
+
+
+async def record_assessment(
+    tree: prisma.models.Tree,
+    status: prisma.enums.TreeHealthStatus,
+    assessed_on: datetime,
+    issues: Optional[str] = None,
+    treatment_details: Optional[str] = None,
+) -> prisma.models.TreeHealthAssessment:
+    """
+    Appends an assessment of a tree and updates its latest status if the assessment is newest.
+    """
+    async with prisma.get_client().tx() as transaction:
+        assessment = await prisma.models.TreeHealthAssessment.prisma(
+            transaction
+        ).create(
+            data={
+                "tree": {"connect": {"id": tree.id}},
+                "status": status,
+                "issues": issues,
+                "treatmentDetails": treatment_details,
+                "assessedOn": to_utc(assessed_on),
+            }
+        )
+        await _store_latest(transaction, tree, assessment)
+    invalidate_stock_projection()
+    return assessment
+
+
+async def delete_assessment(assessment: prisma.models.TreeHealthAssessment) -> None:
+    """
+    Removes an assessment entered in error and recomputes the tree's latest status.
+    """
+    async with prisma.get_client().tx() as transaction:
+        await prisma.models.TreeHealthAssessment.prisma(transaction).delete(
+            where={"id": assessment.id}
+        )
+        latest = await prisma.models.TreeHealthLatest.prisma(transaction).find_unique(
+            where={"treeId": assessment.treeId}
+        )
+        if latest is None or latest.assessmentId != assessment.id:
+            return
+        previous = await prisma.models.TreeHealthAssessment.prisma(
+            transaction
+        ).find_first(
+            where={"treeId": assessment.treeId},
+            order=[{"assessedOn": "desc"}, {"id": "desc"}],
+        )
+        if previous is None:
+            await prisma.models.TreeHealthLatest.prisma(transaction).delete(
+                where={"treeId": assessment.treeId}
+            )
+        else:
+            tree = await prisma.models.Tree.prisma(transaction).find_unique(
+                where={"id": assessment.treeId}
+            )
+            await _store_latest(transaction, tree, previous, replace_newer=True)
+    invalidate_stock_projection()
@@ -0,0 +1,167 @@
+"""
+Spatial grid over tree positions for disease-spread analysis.
+
+Tree positions are not stored; they follow from each field's planting grid (see the Field
+model) and are computed for the whole registry at once with NumPy, in the same projected
+metres as the field index. The trees are then bucketed into CELL_METERS square cells: one
+sort by cell key gives, for every column of cells, a contiguous run of trees per cell row,
+so a radius query is a handful of binary searches plus an exact distance check on the
+candidates. Direction queries (downhill, downwind) only consider one field and are a
+vectorised bearing test over its trees.
+
+The grid is rebuilt lazily whenever the registry's version changes, i.e. after an import or
+when fields are deleted, and after invalidate_tree_grid, which layout updates call when they
+change the outline or planting parameters of fields in place.
+"""
+
+import math
+from typing import Dict, Optional
+
+import numpy as np
+import prisma
+import prisma.models
+from project.fieldIndex import field_index
+from project.treeRegistry import tree_registry
+
+CELL_METERS = 10.0
+# Cell keys pack the offset cell column and row into one int64.
+_SHIFT = 31
+_OFFSET = 1 << 30
+
+
+class TreeGrid:
+    """
+    Projected tree positions of one registry version, bucketed into square cells.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        columns: Dict[str, np.ndarray],
+        fields: Dict[int, prisma.models.Field],
+    ) -> None:
+        self.version = version
+        self.columns = columns
+        self.fields = fields
+        field_ids = columns["fieldId"]
+        known = np.array(sorted(fields), dtype=np.int64)
+        origin = np.array(
+            [field_index.shapes[field_id].points[0] for field_id in known]
+        ).reshape(-1, 2)
+        params = np.array(
+            [
+                (
+                    fields[field_id].rowSpacing,
+                    fields[field_id].treeSpacing,
+                    math.radians(fields[field_id].rowBearing),
+                )
+                for field_id in known
+            ]
+        ).reshape(-1, 3)
+        slot = np.searchsorted(known, field_ids)
+        along = (columns["position"] - 1) * params[slot, 1]
+        across = (columns["row"] - 1) * params[slot, 0]
+        bearing = params[slot, 2]
+        # Rows run along the bearing; successive rows are offset to its right.
+        self.x = origin[slot, 0] + along * np.sin(bearing) + across * np.cos(bearing)
+        self.y = origin[slot, 1] + along * np.cos(bearing) - across * np.sin(bearing)
+        cell_x = np.floor(self.x / CELL_METERS).astype(np.int64)
+        cell_y = np.floor(self.y / CELL_METERS).astype(np.int64)
+        keys = ((cell_x + _OFFSET) << _SHIFT) | (cell_y + _OFFSET)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    def locate(self, tree_id: int) -> Optional[int]:
+        """
+        Index of a tree in the grid's columns, None when it is not in the grid.
+        """
+        ids = self.columns["id"]
+        index = int(np.searchsorted(ids, tree_id))
+        return index if index < len(ids) and ids[index] == tree_id else None
+
+    def within(self, index: int, radius: float) -> np.ndarray:
+        """
+        Indexes of the trees within radius metres of the tree at index, excluding it.
+        """
+        x, y = self.x[index], self.y[index]
+        low_y = math.floor((y - radius) / CELL_METERS) + _OFFSET
+        high_y = math.floor((y + radius) / CELL_METERS) + _OFFSET
+        runs = []
+        for cell_x in range(
+            math.floor((x - radius) / CELL_METERS),
+            math.floor((x + radius) / CELL_METERS) + 1,
+        ):
+            prefix = (cell_x + _OFFSET) << _SHIFT
+            start = np.searchsorted(self.keys, prefix | low_y, side="left")
+            end = np.searchsorted(self.keys, prefix | high_y, side="right")
+            runs.append(self.order[start:end])
+        candidates = np.concatenate(runs) if runs else np.empty(0, dtype=np.int64)
+        close = np.hypot(self.x[candidates] - x, self.y[candidates] - y) <= radius
+        return candidates[close & (candidates != index)]
+
+    def towards(self, index: int, direction: float, width: float) -> np.ndarray:
+        """
+        Indexes of the trees in the same field that lie within a sector of the given width in
+        degrees centred on direction (degrees clockwise from north), seen from the tree at index.
+        """
+        same_field = np.flatnonzero(
+            self.columns["fieldId"] == self.columns["fieldId"][index]
+        )
+        same_field = same_field[same_field != index]
+        bearings = np.degrees(
+            np.arctan2(
+                self.x[same_field] - self.x[index], self.y[same_field] - self.y[index]
+            )
+        )
+        offset = np.abs((bearings - direction + 180) % 360 - 180)
+        return same_field[offset <= width / 2]
+
+    def distances(self, index: int, indexes: np.ndarray) -> np.ndarray:
+        """
+        Distances in metres from the tree at index to the trees at indexes.
+        """
+        return np.hypot(
+            self.x[indexes] - self.x[index], self.y[indexes] - self.y[index]
+        )
+
+
+_grid: Optional[TreeGrid] = None
+# Bumped by every invalidation, so a grid built from fields read before a change is not kept.
+_generation = 0
+
+
+def invalidate_tree_grid() -> None:
+    """
+    Drops the grid after fields changed in place; the next query rebuilds it.
+    """
+    global _grid, _generation
+    _grid = None
+    _generation += 1
+
+
+async def tree_grid() -> TreeGrid:
+    """
+    The grid of the current registry, rebuilt first if trees were added or dropped or the
+    fields changed.
+    """
+    global _grid
+    grid = _grid
+    if grid is None or grid.version != tree_registry.version:
+        generation = _generation
+        version, columns = tree_registry.version, dict(tree_registry.columns)
+        field_ids = np.unique(columns["fieldId"]).tolist()
+        fields = {
+            field.id: field
+            for field in await prisma.models.Field.prisma().find_many(
+                where={"id": {"in": field_ids}}
+            )
+            if field.id in field_index.shapes
+        }
+        missing = set(field_ids) - set(fields)
+        if missing:
+            keep = ~np.isin(columns["fieldId"], list(missing))
+            columns = {name: values[keep] for name, values in columns.items()}
+        grid = TreeGrid(version, columns, fields)
+        if generation == _generation:
+            _grid = grid
+    return grid
@@ -0,0 +1,155 @@
+"""
+In-memory, array-backed index of the tree registry.
+
+The registry holds hundreds of thousands of trees, far too many to materialise as ORM objects
+per query. It is instead read once at startup in keyset-paged raw queries into parallel NumPy
+columns (id, field, row, position, species, planting year) ordered by id, about 20 bytes per
+tree. Field and cohort queries are vectorised masks over those columns and lookups by id are
+binary searches. Trees are only ever appended by bulk imports, which commit one at a time
+under an advisory lock so ids become visible in order; after an import the index pulls just
+the rows with ids above the highest one it holds.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+import numpy as np
+import prisma
+import prisma.models
+
+LOAD_PAGE_SIZE = 50_000
+
+COLUMNS = ("id", "fieldId", "row", "position", "speciesId", "plantingYear")
+DTYPES = (np.int64, np.int32, np.int16, np.int16, np.int16, np.int16)
+
+
+class TreeRegistry:
+    """
+    Parallel column arrays of all registered trees, sorted by id.
+    """
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.empty(0, dtype=dtype) for name, dtype in zip(COLUMNS, DTYPES)
+        }
+        self.species: Dict[int, str] = {}
+        # Bumped whenever trees are added or dropped, for indexes derived from the columns.
+        self.version = 0
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    @property
+    def max_id(self) -> int:
+        return int(self.columns["id"][-1]) if len(self) else 0
+
+    def append(self, rows: List[Dict[str, int]]) -> None:
+        """
+        Adds trees with ids above every id already held.
+        """
+        if not rows:
+            return
+        for name, dtype in zip(COLUMNS, DTYPES):
+            self.columns[name] = np.concatenate(
+                [self.columns[name], np.fromiter((row[name] for row in rows), dtype)]
+            )
+        self.version += 1
+
+    def remove_fields(self, field_ids: List[int]) -> None:
+        """
+        Drops the trees of deleted fields, which the database removes with the field.
+        """
+        keep = ~np.isin(self.columns["fieldId"], field_ids)
+        if not keep.all():
+            for name in COLUMNS:
+                self.columns[name] = self.columns[name][keep]
+            self.version += 1
+
+    def positions(self, tree_ids: List[int]) -> np.ndarray:
+        """
+        Indexes into the columns of the given tree ids; -1 for ids not in the registry.
+        """
+        ids = self.columns["id"]
+        wanted = np.asarray(tree_ids, dtype=np.int64)
+        if not len(ids):
+            return np.full(len(wanted), -1)
+        found = np.minimum(np.searchsorted(ids, wanted), len(ids) - 1)
+        return np.where(ids[found] == wanted, found, -1)
+
+    def select(
+        self,
+        field_id: Optional[int] = None,
+        species_id: Optional[int] = None,
+        planting_year: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Indexes into the columns of the trees matching every given filter, in id order.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in (
+            ("fieldId", field_id),
+            ("speciesId", species_id),
+            ("plantingYear", planting_year),
+        ):
+            if value is not None:
+                mask &= self.columns[name] == value
+        return np.flatnonzero(mask)
+
+    def cohorts(self, indexes: np.ndarray) -> List[Dict[str, int]]:
+        """
+        Tree counts per (species, planting year) among the given indexes.
+        """
+        keys = (
+            self.columns["speciesId"][indexes].astype(np.int64) << 16
+        ) | self.columns["plantingYear"][indexes].astype(np.int64)
+        values, counts = np.unique(keys, return_counts=True)
+        return [
+            {
+                "speciesId": int(value >> 16),
+                "plantingYear": int(value & 0xFFFF),
+                "count": int(count),
+            }
+            for value, count in zip(values, counts)
+        ]
+
+    def record(self, index: int) -> Dict[str, int]:
+        """
+        The columns of one tree as plain integers.
+        """
+        return {name: int(self.columns[name][index]) for name in COLUMNS}
+
+
+tree_registry = TreeRegistry()
+_sync_lock = asyncio.Lock()
+
+
+async def sync_tree_registry() -> TreeRegistry:
+    """
+    Pulls trees added since the registry was last read, and any new species names.
+    """
+    async with _sync_lock:
+        client = prisma.get_client()
+        while True:
+            rows = await client.query_raw(
+                'SELECT "id", "fieldId", "row", "position", "speciesId", "plantingYear"'
+                ' FROM "Tree" WHERE "id" > $1 ORDER BY "id" LIMIT $2',
+                tree_registry.max_id,
+                LOAD_PAGE_SIZE,
+            )
+            tree_registry.append(rows)
+            if len(rows) < LOAD_PAGE_SIZE:
+                break
+        for species in await prisma.models.TreeSpecies.prisma().find_many():
+            tree_registry.species[species.id] = species.name
+        tree_registry.loaded = True
+    return tree_registry
+
+
+async def load_tree_registry() -> TreeRegistry:
+    """
+    Reads the whole registry into memory. Called once at startup.
+    """
+    if not tree_registry.loaded:
+        await sync_tree_registry()
+    return tree_registry
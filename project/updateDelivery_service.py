@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 import prisma
+import prisma.enums
 import prisma.models
+from project.deliveryCapacity import holds_delivery_slot, move_delivery_slot
 from pydantic import BaseModel
 
 
@@ -41,7 +43,7 @@ class UpdateDeliveryDetailsResponse(BaseModel):
 
     success: bool
     message: str
-    updatedDelivery: DeliveryDetails
+    updatedDelivery: Optional[DeliveryDetails] = None
 
 
 async def updateDelivery(
@@ -51,25 +53,41 @@ async def updateDelivery(
     Updates specifics of a scheduled delivery. General adjustments include changing delivery dates or quantities, which are synchronized with updates in the Scheduling and Inventory Management Modules.
 
     Args:
-        deliveryId (int): The unique identifier of the delivery to be updated.
+        deliveryId (int): The unique identifier of the delivery schedule to be updated.
         newDeliveryDate (datetime): The new intended delivery date.
         updatedQuantities (List[UpdatedQuantity]): A list of new quantities per item for this delivery.
 
     Returns:
         UpdateDeliveryDetailsResponse: Provides feedback on the successful or failed update of delivery details.
     """
-    delivery = await prisma.models.Order.prisma().update(
-        where={"id": deliveryId}, data={"deliveryDate": newDeliveryDate}
+    delivery = await prisma.models.Schedule.prisma().find_unique(
+        where={"id": deliveryId}
     )
-    if not delivery:
+    if delivery is None or delivery.type != prisma.enums.ScheduleType.DELIVERY:
         return UpdateDeliveryDetailsResponse(
             success=False,
             message="Failed to update delivery date. Check delivery ID.",
             updatedDelivery=None,
         )
+    if holds_delivery_slot(delivery.type, delivery.status):
+        if not await move_delivery_slot(delivery.scheduledOn, newDeliveryDate):
+            return UpdateDeliveryDetailsResponse(
+                success=False,
+                message="No truck or driver capacity left on the requested day.",
+                updatedDelivery=None,
+            )
+    await prisma.models.Schedule.prisma().update(
+        where={"id": deliveryId}, data={"scheduledOn": newDeliveryDate}
+    )
+    await prisma.models.Order.prisma().update_many(
+        where={"scheduleId": deliveryId}, data={"deliveryDate": newDeliveryDate}
+    )
     for update in updatedQuantities:
         await prisma.models.LineItem.prisma().update_many(
-            where={"orderId": deliveryId, "itemId": update.itemId},
+            where={
+                "order": {"is": {"scheduleId": deliveryId}},
+                "itemId": update.itemId,
+            },
             data={"quantity": update.quantity},
         )
     updated_items = [
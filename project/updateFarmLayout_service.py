@@ -1,7 +1,10 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 import prisma
 import prisma.models
+from project.createFarmLayout_service import FieldInput, field_row
+from project.fieldIndex import field_index, track_field
+from project.treeProximity import invalidate_tree_grid
 from pydantic import BaseModel
 
 
@@ -14,6 +17,33 @@ class Dimensions(BaseModel):
     height: float
 
 
+class FieldUpdate(FieldInput):
+    """
+    A field of the updated layout; id names an existing field of the layout to change in place, and fields without one are created.
+    """
+
+    id: Optional[int] = None
+
+
+async def _fields_with_dependents(transaction: Any, field_ids: List[int]) -> List[int]:
+    """
+    The given fields that still have trees, sensor readings, planting cohorts or harvests.
+    """
+    where = {"fieldId": {"in": field_ids}}
+    used = set()
+    for model in (
+        prisma.models.Tree,
+        prisma.models.SensorReading,
+        prisma.models.TreeCohort,
+        prisma.models.Harvest,
+    ):
+        for row in await model.prisma(transaction).group_by(
+            by=["fieldId"], where=where, count=True
+        ):
+            used.add(row["fieldId"])
+    return sorted(used)
+
+
 class UpdateFarmLayoutResponse(BaseModel):
     """
     Confirms the successful update of a farm layout, potentially returning some information about the updated layout.
@@ -28,22 +58,26 @@ async def updateFarmLayout(
     layoutId: str,
     mapName: Optional[str] = None,
     dimensions: Optional[Dimensions] = None,
+    fields: Optional[List[FieldUpdate]] = None,
 ) -> UpdateFarmLayoutResponse:
     """
-    Updates an existing farm layout based on the provided layout ID. This endpoint should accept partial or full updates to fields like map name or dimensions. The system should validate changes, apply them to the specified layout, and reflect these changes in all linked modules.
+    Updates an existing farm layout based on the provided layout ID. This endpoint should accept partial or full updates to fields like map name or dimensions. The system should validate changes, apply them to the specified layout, and reflect these changes in all linked modules. When fields are given they become the layout's fields in one transaction: fields with an id are updated in place, keeping their trees, readings and history, new ones are created and the layout's other fields are deleted, which is refused while they still have trees, readings, cohorts or harvests. The spatial index is updated to match, and the tree grid used for disease-spread analysis is rebuilt when fields changed in place.
 
     Args:
         layoutId (str): The unique identifier for the farm layout that needs updating.
         mapName (Optional[str]): The new name for the farm layout map, if provided.
         dimensions (Optional[Dimensions]): Updates to the dimensions of the farm layout map, if provided.
+        fields (Optional[List[FieldUpdate]]): The new set of fields of the layout, if provided; existing fields are referenced by id.
 
     Returns:
         UpdateFarmLayoutResponse: Confirms the successful update of a farm layout, potentially returning some information about the updated layout.
 
     Raises:
-        ValueError: If the layout ID is not found in the database.
+        ValueError: If the layout ID is not found in the database, a field outline has fewer than three points, a field's spacing is not positive, a field id is not one of the layout's fields or a field to delete still has dependent records.
     """
-    layout = await prisma.models.Item.prisma().find_unique(where={"id": int(layoutId)})
+    layout = await prisma.models.FarmLayout.prisma().find_unique(
+        where={"id": int(layoutId)}, include={"fields": True}
+    )
     if not layout:
         raise ValueError(f"No layout found with ID: {layoutId}")
     data_to_update = {}
@@ -52,14 +86,56 @@ async def updateFarmLayout(
         data_to_update["name"] = mapName
         updated_fields.append("name")
     if dimensions:
-        data_to_update[
-            "description"
-        ] = f"Width: {dimensions.width}, Height: {dimensions.height}"
-        updated_fields.extend(["description"])
-    if data_to_update:
-        await prisma.models.Item.prisma().update(
-            where={"id": int(layoutId)}, data=data_to_update
-        )
+        data_to_update["width"] = dimensions.width
+        data_to_update["height"] = dimensions.height
+        updated_fields.extend(["width", "height"])
+    existing = {field.id for field in layout.fields or []}
+    field_rows: Dict[Optional[int], List[dict]] = {}
+    for field in fields or []:
+        if field.id is not None and field.id not in existing:
+            raise ValueError(f"Field {field.id} is not part of layout {layoutId}.")
+        field_rows.setdefault(field.id, []).append(field_row(field))
+    if any(len(rows) > 1 for key, rows in field_rows.items() if key is not None):
+        raise ValueError("A field can be listed only once.")
+    removed = sorted(existing - set(field_rows)) if fields is not None else []
+    changed = []
+    async with prisma.get_client().tx() as transaction:
+        if data_to_update:
+            await prisma.models.FarmLayout.prisma(transaction).update(
+                where={"id": layout.id}, data=data_to_update
+            )
+        if fields is not None:
+            if removed:
+                in_use = await _fields_with_dependents(transaction, removed)
+                if in_use:
+                    raise ValueError(
+                        "Fields still have trees, readings, cohorts or harvests: "
+                        + ", ".join(map(str, in_use))
+                    )
+                await prisma.models.Field.prisma(transaction).delete_many(
+                    where={"id": {"in": removed}}
+                )
+            for field_id, rows in field_rows.items():
+                for row in rows:
+                    if field_id is None:
+                        changed.append(
+                            await prisma.models.Field.prisma(transaction).create(
+                                data={"layoutId": layout.id, **row}
+                            )
+                        )
+                    else:
+                        changed.append(
+                            await prisma.models.Field.prisma(transaction).update(
+                                where={"id": field_id}, data=row
+                            )
+                        )
+            updated_fields.append("fields")
+    for field_id in removed:
+        field_index.remove(field_id)
+    for field in changed:
+        track_field(field)
+    if any(field.id in existing for field in changed):
+        invalidate_tree_grid()
     return UpdateFarmLayoutResponse(
         success=True, layoutId=layoutId, updatedFields=updated_fields
     )
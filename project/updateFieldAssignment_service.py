@@ -4,6 +4,7 @@ from typing import List
 import prisma
 import prisma.enums
 import prisma.models
+from project.treatmentWindow import invalidate_treatment_window
 from pydantic import BaseModel
 
 
@@ -60,6 +61,8 @@ async def updateFieldAssignment(
             where={"id": adjustment.scheduleId},
             data={"scheduledOn": adjustment.newDate, "status": adjustment.newStatus},
         )
+        if schedule.type == prisma.enums.ScheduleType.TREATMENT:
+            invalidate_treatment_window()
         affected_schedules.append(
             ScheduleDetails(
                 scheduleId=schedule.id,
@@ -3,6 +3,7 @@ from typing import Optional
 
 import prisma
 import prisma.models
+from project.stockLedger import set_stock_level
 from pydantic import BaseModel
 
 
@@ -36,6 +37,7 @@ async def updateInventoryItem(
     """
     Updates existing inventory item details based on the item ID provided. Can include updates to quantity, condition, and location.
     This function aims to update inventory data in a database, effectively reflecting its current status.
+    A new quantity is recorded as an ADJUSTED inventory event and recomputes reOrderNeed against the item's reorder level, the larger of its minimum stock level and its forecast reorder point.
 
     Args:
         itemId (int): The unique identifier for the inventory item to update.
@@ -49,13 +51,9 @@ async def updateInventoryItem(
     item = await prisma.models.Item.prisma().find_unique(where={"id": itemId})
     if item is None:
         raise ValueError("No item found with the given ID.")
-    update_data = {}
     if quantity is not None:
-        update_data["stockLevel"] = quantity
-        update_data["reOrderNeed"] = quantity <= item.minStockLevel
-    updated_item = await prisma.models.Item.prisma().update(
-        where={"id": itemId}, data=update_data
-    )
+        await set_stock_level(itemId, quantity)
+    updated_item = await prisma.models.Item.prisma().find_unique(where={"id": itemId})
     return UpdateInventoryItemResponse(
         itemId=updated_item.id,
         name=updated_item.name,
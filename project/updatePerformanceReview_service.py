@@ -3,6 +3,7 @@ from typing import Optional
 
 import prisma
 import prisma.models
+from project.performanceAnalytics import refresh_user_summary
 from pydantic import BaseModel
 
 
@@ -40,13 +41,11 @@ async def updatePerformanceReview(
     updated_review = await prisma.models.PerformanceReview.prisma().update(
         where={"id": id}, data={"score": score, "feedback": feedback or review.feedback}
     )
+    await refresh_user_summary(updated_review.userId)
     return PerformanceReviewResponse(
         id=updated_review.id,
-        user_id=updated_review.user_id,
-        review_date=updated_review.review_date,
+        user_id=updated_review.userId,
+        review_date=updated_review.reviewDate,
         score=updated_review.score,
         feedback=updated_review.feedback,
-    )  # TODO(autogpt): Cannot access member "user_id" for type "PerformanceReview"
-
-
-#     Member "user_id" is unknown. reportAttributeAccessIssue
+    )
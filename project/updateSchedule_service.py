@@ -0,0 +1,106 @@
+from datetime import datetime
+from typing import List, Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.deliveryCapacity import holds_delivery_slot, move_delivery_slot
+from project.scheduleIntervals import load_schedule_index, track
+from project.timestamps import to_utc
+from project.treatmentWindow import invalidate_treatment_window
+from pydantic import BaseModel
+
+
+class ScheduleResponse(BaseModel):
+    """
+    Result of updating a schedule. When the moved shift would overlap other shifts of the user, nothing is written and their ids are returned.
+    """
+
+    success: bool
+    message: str
+    scheduleId: int
+    conflictingScheduleIds: List[int] = []
+
+
+async def updateSchedule(
+    id: int,
+    scheduledOn: datetime,
+    type: prisma.enums.ScheduleType,
+    status: prisma.enums.ScheduleStatus,
+    userId: Optional[int],
+    endsOn: Optional[datetime] = None,
+) -> ScheduleResponse:
+    """
+    Updates an existing schedule entry, including moving it in time or to another user. The new slot is validated against the user's other shifts through the interval index before anything is written. A pending delivery's slot of delivery capacity moves with it, is taken when a schedule becomes a pending delivery and is given back when it stops being one; the update is rejected when the new day has no capacity left.
+
+    Args:
+        id (int): The schedule to update.
+        scheduledOn (datetime): New start of the shift.
+        type (prisma.enums.ScheduleType): New kind of work.
+        status (prisma.enums.ScheduleStatus): New status.
+        userId (Optional[int]): The staff member the shift belongs to.
+        endsOn (Optional[datetime]): New end of the shift. When omitted the shift keeps its current length.
+
+    Returns:
+        ScheduleResponse: Result of updating a schedule. When the moved shift would overlap other shifts of the user, nothing is written and their ids are returned.
+
+    Raises:
+        ValueError: If no schedule exists with the given ID.
+    """
+    existing = await prisma.models.Schedule.prisma().find_unique(where={"id": id})
+    if existing is None:
+        raise ValueError(f"Schedule with ID {id} does not exist.")
+    if endsOn is None and existing.endsOn is not None:
+        endsOn = scheduledOn + (existing.endsOn - existing.scheduledOn)
+    if endsOn is not None and endsOn <= scheduledOn:
+        return ScheduleResponse(
+            success=False, message="Shift must end after it starts.", scheduleId=id
+        )
+    index = await load_schedule_index()
+    async with index.write_lock:
+        conflicts = (
+            index.overlapping(
+                userId,
+                to_utc(scheduledOn),
+                to_utc(endsOn),
+                ignore_id=id,
+            )
+            if userId is not None
+            and endsOn is not None
+            and status != prisma.enums.ScheduleStatus.CANCELLED
+            else []
+        )
+        if conflicts:
+            return ScheduleResponse(
+                success=False,
+                message=f"User {userId} already has overlapping shifts.",
+                scheduleId=id,
+                conflictingScheduleIds=sorted(conflicts),
+            )
+        if not await move_delivery_slot(
+            (
+                existing.scheduledOn
+                if holds_delivery_slot(existing.type, existing.status)
+                else None
+            ),
+            scheduledOn if holds_delivery_slot(type, status) else None,
+        ):
+            return ScheduleResponse(
+                success=False,
+                message="No truck or driver capacity left on the requested day.",
+                scheduleId=id,
+            )
+        schedule = await prisma.models.Schedule.prisma().update(
+            where={"id": id},
+            data={
+                "scheduledOn": scheduledOn,
+                "endsOn": endsOn,
+                "type": type,
+                "status": status,
+                "userId": userId,
+            },
+        )
+        track(schedule)
+    if prisma.enums.ScheduleType.TREATMENT in (existing.type, type):
+        invalidate_treatment_window()
+    return ScheduleResponse(success=True, message="Schedule updated.", scheduleId=id)
@@ -1,7 +1,10 @@
+from datetime import timedelta
 from typing import Optional
 
 import prisma
+import prisma.enums
 import prisma.models
+from project.stockLedger import StockChange, apply_stock_changes
 from pydantic import BaseModel
 
 
@@ -51,19 +54,19 @@ async def updateSeedlingPurchase(
         updated_data["itemId"] = newSupplierId
     if newQuantity is not None and newQuantity != existing_purchase.quantity:
         inventory_adjustments.append(
-            {
-                "itemId": existing_purchase.itemId,
-                "eventType": "ADJUSTED",
-                "quantityChange": newQuantity - existing_purchase.quantity,
-            }
+            StockChange(
+                existing_purchase.itemId,
+                newQuantity - existing_purchase.quantity,
+                prisma.enums.InventoryEventType.ADJUSTED,
+            )
         )
         updated_data["quantity"] = newQuantity
-    if updated_data:
-        await prisma.models.LineItem.prisma().update(
-            where={"id": purchaseId}, data=updated_data
-        )
-    for adjustment in inventory_adjustments:
-        await prisma.models.InventoryEvent.prisma().create(data=adjustment)
+    async with prisma.get_client().tx(timeout=timedelta(seconds=30)) as transaction:
+        if updated_data:
+            await prisma.models.LineItem.prisma(transaction).update(
+                where={"id": purchaseId}, data=updated_data
+            )
+        await apply_stock_changes(inventory_adjustments, transaction)
     updated_purchase = await prisma.models.LineItem.prisma().find_unique(
         where={"id": purchaseId}
     )
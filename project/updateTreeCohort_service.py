@@ -0,0 +1,71 @@
+import prisma
+import prisma.models
+from project.stockProjection import invalidate_stock_projection
+from pydantic import BaseModel
+
+
+class TreeCohortResponse(BaseModel):
+    """
+    The planting cohort as stored after the update.
+    """
+
+    id: int
+    fieldId: int
+    species: str
+    plantingYear: int
+    planted: int
+    survivalRate: float
+
+
+async def updateTreeCohort(
+    fieldId: int, species: str, plantingYear: int, survivalRate: float
+) -> TreeCohortResponse:
+    """
+    Sets the expected yearly survival rate of a planting cohort, creating the cohort if only its individually registered trees were known so far. The stock projection uses the new rate from the next request on.
+
+    Args:
+        fieldId (int): The field of the cohort.
+        species (str): The species of the cohort.
+        plantingYear (int): The planting year of the cohort.
+        survivalRate (float): Share of the cohort's trees expected to survive each year, greater than 0 and at most 1.
+
+    Returns:
+        TreeCohortResponse: The planting cohort as stored after the update.
+
+    Raises:
+        ValueError: If the survival rate is out of range or the species is unknown.
+    """
+    if not 0 < survivalRate <= 1:
+        raise ValueError("survivalRate must be greater than 0 and at most 1.")
+    tree_species = await prisma.models.TreeSpecies.prisma().find_unique(
+        where={"name": species.strip()}
+    )
+    if tree_species is None:
+        raise ValueError(f"Unknown species {species!r}.")
+    cohort = await prisma.models.TreeCohort.prisma().upsert(
+        where={
+            "fieldId_speciesId_plantingYear": {
+                "fieldId": fieldId,
+                "speciesId": tree_species.id,
+                "plantingYear": plantingYear,
+            }
+        },
+        data={
+            "create": {
+                "fieldId": fieldId,
+                "speciesId": tree_species.id,
+                "plantingYear": plantingYear,
+                "survivalRate": survivalRate,
+            },
+            "update": {"survivalRate": survivalRate},
+        },
+    )
+    invalidate_stock_projection()
+    return TreeCohortResponse(
+        id=cohort.id,
+        fieldId=cohort.fieldId,
+        species=tree_species.name,
+        plantingYear=cohort.plantingYear,
+        planted=cohort.planted,
+        survivalRate=cohort.survivalRate,
+    )
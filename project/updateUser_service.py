@@ -65,6 +65,10 @@ async def updateUser(
     updated_user = await prisma.models.User.prisma().update(
         where={"id": userId}, data=update_data, include={"profile": True}
     )
+    if role is not None:
+        await prisma.models.PerformanceSummary.prisma().update_many(
+            where={"userId": userId}, data={"role": updated_user.role}
+        )
     return UserUpdateResponse(
         userId=updated_user.id,
         name=f"{updated_user.profile.firstName} {updated_user.profile.lastName}"
@@ -0,0 +1,42 @@
+"""
+Shared process pool for CPU-bound planning work.
+
+Optimizers and renderers run in worker processes so that a long computation never blocks the
+event loop serving other requests. The pool is created on first use and shut down with the
+application. Functions submitted to it must be module-level and take picklable arguments.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) - 1))
+    return _executor
+
+
+async def run_in_process(function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs function(*args, **kwargs) in the shared process pool and awaits its result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pool(), partial(function, *args, **kwargs))
+
+
+def shutdown_pool() -> None:
+    """
+    Stops the worker processes, if any were started.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
@@ -0,0 +1,101 @@
+"""
+Upcoming treatments merge scheduled treatments, whose times raw queries return with an
+offset, with occurrences of recurring treatments, which are naive UTC.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import prisma.enums
+import prisma.models
+import project.getUpcomingTreatments_service as getUpcomingTreatments_service
+import project.treatmentWindow as treatmentWindow
+import pytest
+from project.recurringSchedules import Occurrence
+
+NOW = datetime.utcnow().replace(microsecond=0)
+# Two days ahead at UTC, reported in a +02:00 session time zone.
+SCHEDULED_ON = NOW + timedelta(days=2)
+RECURRING_ON = NOW + timedelta(days=1)
+
+
+class FakeClient:
+    async def query_raw(self, query, *params):
+        return [
+            {
+                "scheduleId": 7,
+                "scheduledOn": (SCHEDULED_ON + timedelta(hours=2)).replace(
+                    tzinfo=timezone(timedelta(hours=2))
+                ),
+                "treatmentType": "Fungicide",
+                "treeId": 11,
+                "row": 1,
+                "position": 2,
+                "fieldName": "North",
+            }
+        ]
+
+
+class FakeHealthLatest:
+    async def find_many(self, **kwargs):
+        return []
+
+
+async def fake_expand_rules(where, window_start, window_end):
+    return [
+        Occurrence(
+            ruleId=3,
+            occurrenceOn=RECURRING_ON,
+            scheduledOn=RECURRING_ON,
+            endsOn=RECURRING_ON + timedelta(hours=1),
+            type=prisma.enums.ScheduleType.TREATMENT,
+            label="Mowing",
+            status=prisma.enums.ScheduleStatus.PENDING,
+        )
+    ]
+
+
+@pytest.fixture(autouse=True)
+def fake_database(monkeypatch):
+    monkeypatch.setattr(treatmentWindow.prisma, "get_client", lambda: FakeClient())
+    monkeypatch.setattr(treatmentWindow, "expand_rules", fake_expand_rules)
+    monkeypatch.setattr(
+        prisma.models.TreeHealthLatest,
+        "prisma",
+        lambda *args: FakeHealthLatest(),
+        raising=False,
+    )
+    treatmentWindow.invalidate_treatment_window()
+    yield
+    treatmentWindow.invalidate_treatment_window()
+
+
+def test_window_orders_scheduled_and_recurring_treatments():
+    window = asyncio.run(treatmentWindow.treatment_window(NOW))
+    assert [entry.key for entry in window.entries] == [
+        (RECURRING_ON, 1, 3, 0),
+        (SCHEDULED_ON, 0, 7, 11),
+    ]
+    first = window.page(NOW, NOW + timedelta(days=30), (NOW, 0, 0, 0), 1)
+    assert [entry.ruleId for entry in first] == [3]
+    rest = window.page(NOW, NOW + timedelta(days=30), first[-1].key, 10)
+    assert [entry.scheduleId for entry in rest] == [7]
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_upcoming_treatments_pages_mixed_entries(monkeypatch, cached):
+    if not cached:
+        monkeypatch.setattr(treatmentWindow, "MAX_CACHED_ENTRIES", 0)
+    request = getUpcomingTreatments_service.GetUpcomingTreeTreatmentsRequest()
+    first = asyncio.run(
+        getUpcomingTreatments_service.getUpcomingTreatments(request, limit=1)
+    )
+    assert [treatment.ruleId for treatment in first.treatments] == [3]
+    rest = asyncio.run(
+        getUpcomingTreatments_service.getUpcomingTreatments(
+            request, first.nextCursor, limit=1
+        )
+    )
+    assert [treatment.date for treatment in rest.treatments] == [SCHEDULED_ON]
+    assert rest.treatments[0].tree.treeId == 11
+    assert rest.nextCursor is None